@@ -5,6 +5,15 @@ from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.tickets import service_tickets_bp
 from .blueprints.parts import parts_bp
+from .blueprints.metrics import metrics_bp
+from .blueprints.analytics import analytics_bp
+from .blueprints.exports import exports_bp
+from .blueprints.appointments import appointments_bp
+from .util.ratelimit import record_rate_limit_decision
+from .util.loader import reset_loaders
+from .util.reference import reset_reference_versions
+from .cli import (search_cli, analytics_cli, export_cli, import_cli, outbox_cli, reservations_cli, reorder_cli,
+                  archive_cli, partitions_cli, associations_cli)
 from flasgger import Swagger
 from config import DevelopmentConfig, TestConfig, ProductionConfig 
 import os 
@@ -28,6 +37,9 @@ def create_app(config_class=DevelopmentConfig):
     db.init_app(app)
     ma.init_app(app)
     limiter.init_app(app)
+    app.after_request(record_rate_limit_decision)
+    app.teardown_request(reset_loaders)
+    app.teardown_request(reset_reference_versions)
     
     # Initialize Swagger with the template defining security and ALL global definitions.
     Swagger(app, template={
@@ -243,6 +255,21 @@ def create_app(config_class=DevelopmentConfig):
     app.register_blueprint(mechanics_bp, url_prefix='/mechanics')
     app.register_blueprint(service_tickets_bp, url_prefix='/service-tickets')
     app.register_blueprint(parts_bp, url_prefix='/parts')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    app.register_blueprint(analytics_bp, url_prefix='/analytics')
+    app.register_blueprint(exports_bp, url_prefix='/exports')
+    app.register_blueprint(appointments_bp, url_prefix='/appointments')
+
+    app.cli.add_command(search_cli)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(import_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(reservations_cli)
+    app.cli.add_command(reorder_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(associations_cli)
     
     return app
 
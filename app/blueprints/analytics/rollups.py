@@ -0,0 +1,224 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, func, insert, event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import (db, TicketRollup, RolledUpTicket, ServiceTickets, ArchivedServiceTicket, Part,
+                        InventoryPartDescription, service_mechanics)
+from app.util import outbox
+
+GRANULARITIES = ("day", "week", "month")
+DIMENSIONS = ("all", "customer", "mechanic")
+
+_UPSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+def _dimension_keys(customer_id, mechanic_ids):
+    keys = [("all", 0)]
+    if customer_id is not None:
+        keys.append(("customer", customer_id))
+    keys.extend(("mechanic", mechanic_id) for mechanic_id in set(mechanic_ids))
+    return keys
+
+
+def _add_to_rollup(day, dimension, dimension_id, ticket_count, revenue, parts_cost, labor_total):
+    values = {
+        "day": day, "dimension": dimension, "dimension_id": dimension_id, "ticket_count": ticket_count,
+        "revenue": revenue, "parts_cost": parts_cost, "labor_total": labor_total,
+    }
+    upsert = _UPSERTS.get(db.session.get_bind().dialect.name)
+    if upsert is None:
+        # No native upsert on this backend: read-modify-write under a row lock.
+        row = db.session.scalars(select(TicketRollup).where(
+            TicketRollup.day == day, TicketRollup.dimension == dimension, TicketRollup.dimension_id == dimension_id
+        ).with_for_update()).first()
+        if row is None:
+            db.session.add(TicketRollup(**values))
+        else:
+            for key in ("ticket_count", "revenue", "parts_cost", "labor_total"):
+                setattr(row, key, getattr(row, key) + values[key])
+        return
+
+    table = TicketRollup.__table__
+    statement = upsert(table).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=["day", "dimension", "dimension_id"],
+        set_={key: table.c[key] + statement.excluded[key]
+              for key in ("ticket_count", "revenue", "parts_cost", "labor_total")},
+    )
+    db.session.execute(statement)
+
+
+def _apply_contribution(entry, sign):
+    """Add (sign=1) or take out (sign=-1) a RolledUpTicket's contribution."""
+    keys = _dimension_keys(entry.customer_id, entry.mechanic_ids)
+    for dimension, dimension_id in keys:
+        _add_to_rollup(entry.day, dimension, dimension_id, sign, sign * entry.revenue, sign * entry.parts_cost,
+                       sign * entry.labor_total)
+    if sign < 0:
+        # Drop rows nothing contributes to any more, as a rebuild would
+        for dimension, dimension_id in keys:
+            db.session.execute(delete(TicketRollup).where(
+                TicketRollup.day == entry.day, TicketRollup.dimension == dimension,
+                TicketRollup.dimension_id == dimension_id, TicketRollup.ticket_count <= 0))
+
+
+def _rolled_up(ticket_id):
+    return db.session.scalars(
+        select(RolledUpTicket).where(RolledUpTicket.ticket_id == ticket_id).with_for_update()
+    ).first()
+
+
+@outbox.handler("ticket.completed")
+def record_ticket_completion(event):
+    """
+    Add a just-completed ticket to the daily rollups for the whole shop, its
+    customer and each assigned mechanic. Runs from the outbox worker, in the
+    transaction that marks the event processed. A ticket completed again
+    replaces its earlier contribution instead of adding a second one.
+    """
+    entry = _rolled_up(event["ticket_id"])
+    if entry is None:
+        entry = RolledUpTicket(ticket_id=event["ticket_id"])
+        db.session.add(entry)
+    else:
+        _apply_contribution(entry, -1)
+    entry.day = datetime.fromisoformat(event["service_date"]).date()
+    entry.customer_id = event["customer_id"]
+    entry.mechanic_ids = sorted(set(event["mechanic_ids"]))
+    entry.revenue, entry.parts_cost, entry.labor_total = event["price"], event["parts_cost"], event["labor_total"]
+    _apply_contribution(entry, 1)
+
+
+@outbox.handler("ticket.reopened")
+def record_ticket_reopening(event):
+    """Take a ticket that left Complete back out of the rollups."""
+    entry = _rolled_up(event["ticket_id"])
+    if entry is None:
+        return
+    _apply_contribution(entry, -1)
+    db.session.delete(entry)
+
+
+@event.listens_for(Session, "before_flush")
+def _emit_reopened_tickets(session, flush_context, instances):
+    # Any write that moves a ticket out of Complete (status updates, batch
+    # set_status, re-assigning a mechanic) is caught here rather than in
+    # every route.
+    for obj in list(session.dirty):
+        if not isinstance(obj, ServiceTickets):
+            continue
+        history = inspect(obj).attrs.status.history
+        if history.deleted and history.deleted[0] == "Complete" and obj.status != "Complete":
+            outbox.emit("ticket.reopened", {"ticket_id": obj.id})
+
+
+def rebuild_rollups():
+    """
+    Recompute every rollup row (and the per-ticket contributions) from
+    completed tickets, live and archived. Returns the number of rollup rows
+    written.
+    """
+    parts_cost = select(
+        Part.ticket_id,
+        func.sum(InventoryPartDescription.price).label("parts_cost")
+    ).join(
+        InventoryPartDescription, InventoryPartDescription.id == Part.desc_id
+    ).where(Part.ticket_id.is_not(None)).group_by(Part.ticket_id).subquery()
+
+    tickets = db.session.execute(
+        select(ServiceTickets.id, ServiceTickets.customer_id, ServiceTickets.service_date, ServiceTickets.price,
+               func.coalesce(parts_cost.c.parts_cost, 0.0).label("parts_cost"))
+        .outerjoin(parts_cost, parts_cost.c.ticket_id == ServiceTickets.id)
+        .where(ServiceTickets.status == "Complete")
+    ).all()
+
+    mechanics = defaultdict(list)
+    for ticket_id, mechanic_id in db.session.execute(
+        select(service_mechanics.c.service_tickets_id, service_mechanics.c.mechanics_id)
+        .join(ServiceTickets, ServiceTickets.id == service_mechanics.c.service_tickets_id)
+        .where(ServiceTickets.status == "Complete")
+    ):
+        mechanics[ticket_id].append(mechanic_id)
+
+    # Archived tickets carry their parts cost and mechanics with them
+    archived = db.session.execute(
+        select(ArchivedServiceTicket.id, ArchivedServiceTicket.customer_id, ArchivedServiceTicket.service_date,
+               ArchivedServiceTicket.price, ArchivedServiceTicket.parts_cost, ArchivedServiceTicket.mechanic_ids)
+        .where(ArchivedServiceTicket.status == "Complete")
+    ).all()
+    for ticket in archived:
+        mechanics[ticket.id] = ticket.mechanic_ids
+
+    # Live tickets can still be reopened or completed again; record what
+    # each one contributes so that can be taken out exactly
+    db.session.execute(delete(RolledUpTicket))
+    if tickets:
+        db.session.execute(insert(RolledUpTicket), [
+            {"ticket_id": ticket.id, "day": ticket.service_date, "customer_id": ticket.customer_id,
+             "mechanic_ids": sorted(set(mechanics[ticket.id])), "revenue": ticket.price,
+             "parts_cost": ticket.parts_cost, "labor_total": ticket.price - ticket.parts_cost}
+            for ticket in tickets
+        ])
+    tickets = list(tickets) + archived
+
+    totals = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for ticket in tickets:
+        for key in _dimension_keys(ticket.customer_id, mechanics[ticket.id]):
+            row = totals[(ticket.service_date,) + key]
+            row[0] += 1
+            row[1] += ticket.price
+            row[2] += ticket.parts_cost
+            row[3] += ticket.price - ticket.parts_cost
+
+    db.session.execute(delete(TicketRollup))
+    if totals:
+        db.session.execute(insert(TicketRollup), [
+            {"day": day, "dimension": dimension, "dimension_id": dimension_id, "ticket_count": count,
+             "revenue": revenue, "parts_cost": parts, "labor_total": labor}
+            for (day, dimension, dimension_id), (count, revenue, parts, labor) in totals.items()
+        ])
+    db.session.commit()
+    return len(totals)
+
+
+def _period_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def read_rollups(granularity="day", dimension="all", dimension_id=None, start=None, end=None):
+    """Sum daily rollup rows into day/week/month buckets."""
+    query = select(TicketRollup).where(TicketRollup.dimension == dimension)
+    if dimension_id is not None:
+        query = query.where(TicketRollup.dimension_id == dimension_id)
+    if start is not None:
+        query = query.where(TicketRollup.day >= start)
+    if end is not None:
+        query = query.where(TicketRollup.day <= end)
+
+    buckets = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for row in db.session.scalars(query):
+        bucket = buckets[(_period_start(row.day, granularity), row.dimension_id)]
+        bucket[0] += row.ticket_count
+        bucket[1] += row.revenue
+        bucket[2] += row.parts_cost
+        bucket[3] += row.labor_total
+
+    return [
+        {
+            "period": period.isoformat(),
+            "dimension": dimension,
+            "dimension_id": dimension_id,
+            "ticket_count": count,
+            "revenue": round(revenue, 2),
+            "parts_cost": round(parts_cost, 2),
+            "average_parts_cost": round(parts_cost / count, 2) if count else 0.0,
+            "labor_total": round(labor, 2),
+        }
+        for (period, dimension_id), (count, revenue, parts_cost, labor) in sorted(buckets.items())
+    ]
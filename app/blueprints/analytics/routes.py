@@ -0,0 +1,84 @@
+from datetime import date
+from flask import request, jsonify
+from app.blueprints.analytics import analytics_bp
+from app.util.auth import token_required
+from .rollups import read_rollups, GRANULARITIES, DIMENSIONS
+
+
+@analytics_bp.route("/tickets", methods=["GET"])
+@token_required
+def read_ticket_analytics():
+    """
+    Get revenue and throughput analytics (Manager Only)
+    ---
+    tags:
+      - analytics
+    summary: Completed-ticket totals by day, week or month.
+    description: Reads pre-aggregated rollups that are updated as tickets are completed, so the cost of this route depends on the date range, not on the size of the ticket history. Weeks start on Monday. Requires a JWT with 'manager' role.
+    security:
+      - token: []
+    parameters:
+      - name: granularity
+        in: query
+        type: string
+        enum: ["day", "week", "month"]
+        default: day
+      - name: dimension
+        in: query
+        type: string
+        enum: ["all", "customer", "mechanic"]
+        default: all
+        description: Break the totals down per customer or per mechanic. A ticket counts fully towards every mechanic assigned to it.
+      - name: dimension_id
+        in: query
+        type: integer
+        required: false
+        description: Only return one customer or mechanic.
+      - name: start
+        in: query
+        type: string
+        format: date
+        required: false
+        description: First service date to include (YYYY-MM-DD).
+      - name: end
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Last service date to include (YYYY-MM-DD).
+    responses:
+      200:
+        description: One row per period (and per customer/mechanic for those dimensions).
+        examples:
+          application/json:
+            - period: "2026-01-01"
+              dimension: "all"
+              dimension_id: 0
+              ticket_count: 42
+              revenue: 9875.5
+              parts_cost: 3575.5
+              average_parts_cost: 85.13
+              labor_total: 6300.0
+      400:
+        description: Invalid parameter.
+      403:
+        description: Unauthorized to view analytics.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to view analytics."}), 403
+
+    granularity = request.args.get("granularity", "day")
+    if granularity not in GRANULARITIES:
+        return jsonify({"message": f"Invalid granularity. Allowed values are: {', '.join(GRANULARITIES)}"}), 400
+    dimension = request.args.get("dimension", "all")
+    if dimension not in DIMENSIONS:
+        return jsonify({"message": f"Invalid dimension. Allowed values are: {', '.join(DIMENSIONS)}"}), 400
+
+    try:
+        dimension_id = request.args.get("dimension_id", type=int)
+        start = date.fromisoformat(request.args["start"]) if "start" in request.args else None
+        end = date.fromisoformat(request.args["end"]) if "end" in request.args else None
+    except ValueError:
+        return jsonify({"message": "start and end must be dates (YYYY-MM-DD)."}), 400
+
+    return jsonify(read_rollups(granularity, dimension, dimension_id, start, end)), 200
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+appointments_bp = Blueprint("appointments_bp", __name__)
+
+from . import routes
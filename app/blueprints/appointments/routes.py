@@ -0,0 +1,374 @@
+from datetime import datetime, timedelta
+from flask import request, jsonify, current_app
+from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.blueprints.appointments import appointments_bp
+from app.models import db, Appointment, ServiceTickets, Mechanics
+from app.util.auth import token_required
+from app.util.pagination import parse_limit
+from app.util.schedule import find_conflicts, find_free_slots, working_hours
+from .schemas import appointment_schema, appointments_schema, appointment_payload_schema, appointment_move_schema
+
+
+def _parse_local_datetime(value):
+    """A query-string datetime. Times are shop-local and naive, like the booking payloads."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError(f"'{value}' has a UTC offset; use shop-local time without one.")
+    return parsed
+
+
+def _validate_booking(mechanic_id, bay, starts_at, ends_at):
+    """Error response for a booking that can't be made as given, or None."""
+    if ends_at <= starts_at:
+        return jsonify({"message": "ends_at must be after starts_at."}), 400
+    if not working_hours().fits(starts_at, ends_at):
+        return jsonify({"message": "Appointments must fall within one working day "
+                                   f"({current_app.config['SCHEDULE_DAY_START']}-"
+                                   f"{current_app.config['SCHEDULE_DAY_END']})."}), 400
+    if bay is not None and bay > current_app.config["SCHEDULE_BAYS"]:
+        return jsonify({"message": f"The shop has {current_app.config['SCHEDULE_BAYS']} bays."}), 400
+    mechanic = db.session.get(Mechanics, mechanic_id)
+    if mechanic is None or mechanic.deleted_at is not None:
+        return jsonify({"message": "Mechanic not found."}), 404
+    return None
+
+
+def _conflict(conflicts):
+    return jsonify({
+        "message": "The mechanic or bay is already booked at that time.",
+        "conflicts": appointments_schema.dump(conflicts),
+    }), 409
+
+
+def _commit_booking(appointment, status_code):
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Postgres exclusion constraint: a concurrent booking got there first
+        db.session.rollback()
+        return jsonify({"message": "The mechanic or bay was booked by another request."}), 409
+    return appointment_schema.jsonify(appointment), status_code
+
+
+@appointments_bp.route("/", methods=["POST"])
+@token_required
+def book_appointment():
+    """
+    Book an appointment (Manager Only)
+    ---
+    tags:
+      - appointments
+    summary: Books a mechanic (and optionally a bay) for a ticket.
+    description: The slot must lie inside one working day and must not overlap another booking of the same mechanic or bay. Times are shop-local, without a UTC offset.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [ticket_id, mechanic_id, starts_at]
+          properties:
+            ticket_id:
+              type: integer
+            mechanic_id:
+              type: integer
+            bay:
+              type: integer
+              description: Service bay number (1..SCHEDULE_BAYS); omit for work that needs no bay.
+            starts_at:
+              type: string
+              format: date-time
+            ends_at:
+              type: string
+              format: date-time
+            duration_minutes:
+              type: integer
+              description: Alternative to ends_at.
+    responses:
+      201:
+        description: Appointment booked.
+      400:
+        description: Invalid data or outside working hours.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Ticket or mechanic not found.
+      409:
+        description: The mechanic or bay is already booked; the body lists the conflicting appointments.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    try:
+        data = appointment_payload_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    ends_at = data.get("ends_at") or data["starts_at"] + timedelta(minutes=data["duration_minutes"])
+    if db.session.get(ServiceTickets, data["ticket_id"]) is None:
+        return jsonify({"message": "Service ticket not found."}), 404
+    error = _validate_booking(data["mechanic_id"], data.get("bay"), data["starts_at"], ends_at)
+    if error:
+        return error
+    conflicts = find_conflicts(data["mechanic_id"], data.get("bay"), data["starts_at"], ends_at)
+    if conflicts:
+        return _conflict(conflicts)
+
+    appointment = Appointment(ticket_id=data["ticket_id"], mechanic_id=data["mechanic_id"], bay=data.get("bay"),
+                              starts_at=data["starts_at"], ends_at=ends_at)
+    db.session.add(appointment)
+    return _commit_booking(appointment, 201)
+
+
+@appointments_bp.route("/<int:appointment_id>", methods=["PUT"])
+@token_required
+def move_appointment(appointment_id):
+    """
+    Move an appointment (Manager Only)
+    ---
+    tags:
+      - appointments
+    summary: Changes an appointment's time, mechanic or bay.
+    description: Fields left out keep their current value; moving only starts_at keeps the duration.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - name: appointment_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            mechanic_id:
+              type: integer
+            bay:
+              type: integer
+            starts_at:
+              type: string
+              format: date-time
+            ends_at:
+              type: string
+              format: date-time
+            duration_minutes:
+              type: integer
+    responses:
+      200:
+        description: Appointment moved.
+      400:
+        description: Invalid data or outside working hours.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Appointment or mechanic not found.
+      409:
+        description: The new slot is taken; the body lists the conflicting appointments.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None:
+        return jsonify({"message": "Appointment not found."}), 404
+    try:
+        data = appointment_move_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    mechanic_id = data.get("mechanic_id", appointment.mechanic_id)
+    bay = data["bay"] if "bay" in data else appointment.bay
+    starts_at = data.get("starts_at", appointment.starts_at)
+    if "ends_at" in data:
+        ends_at = data["ends_at"]
+    elif "duration_minutes" in data:
+        ends_at = starts_at + timedelta(minutes=data["duration_minutes"])
+    else:
+        ends_at = starts_at + (appointment.ends_at - appointment.starts_at)
+
+    error = _validate_booking(mechanic_id, bay, starts_at, ends_at)
+    if error:
+        return error
+    conflicts = find_conflicts(mechanic_id, bay, starts_at, ends_at, ignore_id=appointment_id)
+    if conflicts:
+        return _conflict(conflicts)
+
+    appointment.mechanic_id, appointment.bay = mechanic_id, bay
+    appointment.starts_at, appointment.ends_at = starts_at, ends_at
+    return _commit_booking(appointment, 200)
+
+
+@appointments_bp.route("/<int:appointment_id>", methods=["DELETE"])
+@token_required
+def cancel_appointment(appointment_id):
+    """
+    Cancel an appointment (Manager Only)
+    ---
+    tags:
+      - appointments
+    summary: Deletes an appointment and frees its slot.
+    security:
+      - token: []
+    parameters:
+      - name: appointment_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Appointment cancelled.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Appointment not found.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None:
+        return jsonify({"message": "Appointment not found."}), 404
+    db.session.delete(appointment)
+    db.session.commit()
+    return jsonify({"message": f"Appointment {appointment_id} cancelled."}), 200
+
+
+@appointments_bp.route("/", methods=["GET"])
+@token_required
+def read_appointments():
+    """
+    List appointments
+    ---
+    tags:
+      - appointments
+    summary: Appointments overlapping a time window, optionally for one mechanic, bay or ticket.
+    security:
+      - token: []
+    parameters:
+      - name: start
+        in: query
+        type: string
+        format: date-time
+        required: true
+      - name: end
+        in: query
+        type: string
+        format: date-time
+        required: true
+      - name: mechanic_id
+        in: query
+        type: integer
+        required: false
+      - name: bay
+        in: query
+        type: integer
+        required: false
+      - name: ticket_id
+        in: query
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Appointments ordered by start time.
+      400:
+        description: Missing or invalid window.
+    """
+    try:
+        start = _parse_local_datetime(request.args["start"])
+        end = _parse_local_datetime(request.args["end"])
+        filters = {name: int(request.args[name]) for name in ("mechanic_id", "bay", "ticket_id")
+                   if name in request.args}
+    except KeyError:
+        return jsonify({"message": "start and end are required."}), 400
+    except ValueError as e:
+        return jsonify({"message": f"Invalid parameter: {e}"}), 400
+
+    query = select(Appointment).where(Appointment.starts_at < end, Appointment.ends_at > start)
+    for name, value in filters.items():
+        query = query.where(getattr(Appointment, name) == value)
+    appointments = db.session.scalars(query.order_by(Appointment.starts_at, Appointment.id)).all()
+    return appointments_schema.jsonify(appointments), 200
+
+
+@appointments_bp.route("/free-slots", methods=["GET"])
+@token_required
+def read_free_slots():
+    """
+    Find free appointment slots
+    ---
+    tags:
+      - appointments
+    summary: The soonest slots where a mechanic (and a bay) are free for the whole duration.
+    description: Searched in memory against per-mechanic and per-bay calendars, so looking across every mechanic and a month of bookings takes milliseconds. Returns at most one slot per mechanic, soonest first.
+    security:
+      - token: []
+    parameters:
+      - name: duration_minutes
+        in: query
+        type: integer
+        required: true
+      - name: after
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Earliest acceptable start (default now).
+      - name: mechanic_id
+        in: query
+        type: integer
+        required: false
+        description: Only consider these mechanics (repeatable). Defaults to every mechanic.
+      - name: bay
+        in: query
+        type: string
+        default: any
+        description: "'any' to require some free bay, 'none' if the job needs no bay, or a bay number."
+      - name: limit
+        in: query
+        type: integer
+        default: 5
+    responses:
+      200:
+        description: Free slots.
+        examples:
+          application/json:
+            - starts_at: "2026-03-02T10:00:00"
+              ends_at: "2026-03-02T11:30:00"
+              mechanic_id: 4
+              bay: 2
+      400:
+        description: Invalid parameters.
+    """
+    try:
+        duration = timedelta(minutes=int(request.args["duration_minutes"]))
+        after = _parse_local_datetime(request.args["after"]) if "after" in request.args else datetime.now()
+        limit = parse_limit(request.args.get("limit"), default=5)
+        mechanic_ids = [int(value) for value in request.args.getlist("mechanic_id")]
+        bay = request.args.get("bay", "any")
+        bays = {"any": list(range(1, current_app.config["SCHEDULE_BAYS"] + 1)), "none": None}.get(bay)
+        if bay not in ("any", "none"):
+            bays = [int(bay)]
+    except KeyError:
+        return jsonify({"message": "duration_minutes is required."}), 400
+    except ValueError as e:
+        return jsonify({"message": f"Invalid parameter: {e}"}), 400
+
+    if not mechanic_ids:
+        mechanic_ids = db.session.scalars(select(Mechanics.id).where(Mechanics.role == "mechanic",
+                                                                     Mechanics.deleted_at.is_(None))).all()
+    try:
+        slots = find_free_slots(mechanic_ids, duration, after, bays, limit,
+                                current_app.config["SCHEDULE_SEARCH_DAYS"])
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    return jsonify([
+        {"starts_at": starts_at.isoformat(), "ends_at": (starts_at + duration).isoformat(),
+         "mechanic_id": mechanic_id, "bay": slot_bay}
+        for starts_at, mechanic_id, slot_bay in slots
+    ]), 200
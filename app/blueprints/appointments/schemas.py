@@ -0,0 +1,30 @@
+from marshmallow import fields, validate, validates_schema, ValidationError
+from app.extensions import ma
+from app.models import Appointment
+
+class AppointmentSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Appointment
+        include_fk = True
+
+appointment_schema = AppointmentSchema()
+appointments_schema = AppointmentSchema(many=True)
+
+class AppointmentPayloadSchema(ma.Schema):
+    ticket_id = fields.Integer(required=True)
+    mechanic_id = fields.Integer(required=True)
+    bay = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    starts_at = fields.NaiveDateTime(required=True)
+    ends_at = fields.NaiveDateTime()
+    duration_minutes = fields.Integer(validate=validate.Range(min=1))
+
+    @validates_schema
+    def validate_end(self, data, partial=None, **kwargs):
+        if "ends_at" in data and "duration_minutes" in data:
+            raise ValidationError("Give either ends_at or duration_minutes, not both.", "ends_at")
+        if not partial and "ends_at" not in data and "duration_minutes" not in data:
+            raise ValidationError("ends_at or duration_minutes is required.", "ends_at")
+
+appointment_payload_schema = AppointmentPayloadSchema()
+# Moving an existing appointment: every field optional, the ticket stays put
+appointment_move_schema = AppointmentPayloadSchema(exclude=("ticket_id",), partial=True)
@@ -1,11 +1,11 @@
 from app.blueprints.customers import customers_bp
 from .schemas import user_schema, users_schema, login_schema
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from marshmallow import ValidationError
-from app.models import Customers, db, ServiceTickets
-from app.extensions import limiter
+from app.models import Customers, db, ServiceTickets, soft_delete
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.util.auth import encode_token, token_required
+from app.util.query_params import date_window, QueryParamError
 from sqlalchemy import func
 
 # --- FLASGGER CONFIGURATION ---
@@ -92,7 +92,7 @@ def login():
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    customer = db.session.query(Customers).where(Customers.email==data['email']).first()
+    customer = db.session.query(Customers).where(Customers.email==data['email'], Customers.deleted_at.is_(None)).first()
 
     if customer and check_password_hash(customer.password, data["password"]):
         token = encode_token(customer.id, role="customer")
@@ -169,7 +169,7 @@ def read_customers():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
 
-    customers = db.session.query(Customers).paginate(page,per_page)
+    customers = db.session.query(Customers).where(Customers.deleted_at.is_(None)).paginate(page=page, per_page=per_page)
     return users_schema.jsonify(customers.items), 200
     
 
@@ -197,7 +197,7 @@ def read_customer(customer_id):
         description: Customer not found.
     """
     customer = db.session.get(Customers, customer_id)
-    if not customer:
+    if not customer or customer.deleted_at is not None:
         return jsonify({"message": "customer not found"}), 404
     return user_schema.jsonify(customer), 200
 
@@ -254,7 +254,6 @@ def update_user():
 
 
 @customers_bp.route('/<int:customer_id>', methods=['DELETE'])
-@limiter.limit("3 per day")
 @token_required
 def delete_customer(customer_id):
     """
@@ -263,7 +262,7 @@ def delete_customer(customer_id):
     tags:
       - customers
     summary: Deletes a customer account by ID.
-    description: This route allows a customer to delete their own account. It is protected by a rate limit of 3 deletions per day per IP.
+    description: This route allows a customer to delete their own account. The account is soft deleted -- its tickets keep pointing at it, but it can no longer log in or be read, and its email, phone and username are freed for a new sign-up. It is protected by a rate limit of 3 deletions per day per user (see RATELIMIT_POLICY).
     security:
       - token: []
     parameters:
@@ -284,13 +283,13 @@ def delete_customer(customer_id):
         description: Customer not found.
     """
     customer = db.session.get(Customers, customer_id)
-    if not customer:
+    if not customer or customer.deleted_at is not None:
         return jsonify({"message": "that customer is not in the database"}), 404
     
     if customer_id != int(request.user_id):
         return jsonify({"message": "we're sorry it seems as if you don't have access to that account."}), 403
     else:
-        db.session.delete(customer)
+        soft_delete(customer)
         db.session.commit()
         return jsonify({"message": f"Successfully deleted user {customer_id}"}), 200
 
@@ -303,7 +302,20 @@ def get_top_customers():
     tags:
       - customers
     summary: Retrieves a list of the top customers by total spending.
-    description: This route queries the database to find the customers with the highest total value of service tickets, providing a "big spenders" report.
+    description: This route queries the database to find the customers with the highest total value of service tickets serviced between start and end, providing a "big spenders" report. Without start and end the report covers the last 365 days (REPORT_WINDOW_DAYS).
+    parameters:
+      - name: start
+        in: query
+        type: string
+        format: date
+        required: false
+        description: First service date included (YYYY-MM-DD).
+      - name: end
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Last service date included (YYYY-MM-DD); defaults to today.
     responses:
       200:
         description: A list of the top spending customers.
@@ -311,12 +323,20 @@ def get_top_customers():
           type: array
           items:
             $ref: '#/definitions/TopSpenderResponse'
+      400:
+        description: Invalid start or end.
     """
+    try:
+        start, end = date_window(request.args, current_app.config["REPORT_WINDOW_DAYS"])
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
     # group by customer, sum the prices, and order by the total sum.
     customer_data = db.session.query(
         Customers.first_name,
         Customers.last_name,
-        func.sum(ServiceTickets.price).label("total_spent")).join(ServiceTickets).group_by(Customers.id, Customers.first_name, Customers.last_name).order_by(func.sum(ServiceTickets.price).desc()).all()
+        func.sum(ServiceTickets.price).label("total_spent")).join(ServiceTickets).where(
+        Customers.deleted_at.is_(None), ServiceTickets.service_date.between(start, end)).group_by(Customers.id, Customers.first_name, Customers.last_name).order_by(func.sum(ServiceTickets.price).desc()).all()
 
     results = [
         {
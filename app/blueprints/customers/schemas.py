@@ -4,6 +4,7 @@ from app.models import Customers
 class UserSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Customers
+        exclude = ("deleted_at",)
 
 user_schema = UserSchema()
 users_schema = UserSchema(many=True)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+exports_bp = Blueprint("exports_bp", __name__)
+
+from . import routes
@@ -0,0 +1,65 @@
+import tempfile
+from flask import request, jsonify, send_file
+from app.blueprints.exports import exports_bp
+from app.util.auth import token_required
+from app.util.export import export_dataset, ExportUnavailable, DATASETS, FORMATS
+
+
+@exports_bp.route("/<string:dataset>", methods=["GET"])
+@token_required
+def export_dataset_file(dataset):
+    """
+    Export a dataset as a columnar file (Manager Only)
+    ---
+    tags:
+      - exports
+    summary: Downloads a whole table as Parquet or Arrow IPC.
+    description: Streams the table out of the database in chunks and writes it as a columnar file, which is much faster than paging through the JSON list endpoints. Customer passwords are never exported. Requires a JWT with 'manager' role.
+    security:
+      - token: []
+    produces:
+      - application/vnd.apache.parquet
+      - application/vnd.apache.arrow.file
+    parameters:
+      - name: dataset
+        in: path
+        type: string
+        required: true
+        enum: ["service_tickets", "service_tickets_archive", "parts", "customers", "service_mechanics"]
+      - name: format
+        in: query
+        type: string
+        enum: ["parquet", "arrow"]
+        default: parquet
+    responses:
+      200:
+        description: The exported file.
+      400:
+        description: Unknown format.
+      403:
+        description: Unauthorized to export data.
+      404:
+        description: Unknown dataset.
+      501:
+        description: Columnar export is not available on this server (pyarrow missing).
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to export data."}), 403
+    if dataset not in DATASETS:
+        return jsonify({"message": f"Unknown dataset. Allowed values are: {', '.join(DATASETS)}"}), 404
+
+    format = request.args.get("format", "parquet")
+    if format not in FORMATS:
+        return jsonify({"message": f"Invalid format. Allowed values are: {', '.join(FORMATS)}"}), 400
+
+    # Spool to a temp file rather than memory; it's removed once the response is closed.
+    output = tempfile.TemporaryFile()
+    try:
+        export_dataset(dataset, output, format)
+    except ExportUnavailable as e:
+        output.close()
+        return jsonify({"message": str(e)}), 501
+    output.seek(0)
+
+    return send_file(output, mimetype=FORMATS[format]["mimetype"], as_attachment=True,
+                     download_name=f"{dataset}.{FORMATS[format]['extension']}")
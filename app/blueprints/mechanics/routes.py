@@ -1,11 +1,15 @@
 from app.blueprints.mechanics import mechanics_bp
 from .schemas import mechanic_schema, mechanics_schema, login_schema
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from marshmallow import ValidationError
-from app.models import Mechanics, db, ServiceTickets
+from app.models import Mechanics, db, ServiceTickets, service_mechanics, ACTIVE_TICKET_STATUSES, soft_delete
 from app.util.auth import token_required, encode_token
+from app.util.query_params import apply_list_params, date_window, QueryParamError
+from app.util.pagination import encode_cursor, decode_cursor, parse_limit, InvalidCursor
+from app.util.history import ticket_history, ticket_history_page
 from werkzeug.security import check_password_hash, generate_password_hash
-from sqlalchemy import func
+from sqlalchemy import func, select, and_, or_
+from datetime import date
 from app.blueprints.tickets.schemas import service_tickets_schema
 
 # NOTE: Swagger definitions (like MechResponse) have been moved to app/app_factory.py
@@ -45,7 +49,7 @@ def login():
     except ValidationError as e:
         return jsonify(e.messages), 400
     
-    mechanic = db.session.query(Mechanics).where(Mechanics.email == data['email']).first()
+    mechanic = db.session.query(Mechanics).where(Mechanics.email == data['email'], Mechanics.deleted_at.is_(None)).first()
 
     if mechanic and check_password_hash(mechanic.password, data['password']):
         token = encode_token(mechanic.id, role=mechanic.role)
@@ -112,7 +116,23 @@ def get_all_mechanics():
     tags:
       - mechanics
     summary: Retrieves a list of all mechanics.
-    description: This route provides a list of all mechanics stored in the database. No authentication is required for this route.
+    description: This route provides a list of mechanics stored in the database, optionally filtered, sorted and narrowed to selected fields. No authentication is required for this route.
+    parameters:
+      - name: filter[<field>][<op>]
+        in: query
+        type: string
+        required: false
+        description: "Filter on an indexed field (id, email, role). Operators: eq (default), ne, gt, gte, lt, lte, in (comma separated). e.g. filter[role]=manager"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma separated fields to sort by, prefix with - for descending. e.g. email"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of fields to return; only those columns are loaded.
     responses:
       200:
         description: A list of mechanics.
@@ -120,9 +140,16 @@ def get_all_mechanics():
           type: array
           items:
             $ref: '#/definitions/MechResponse'
+      400:
+        description: Invalid filter, sort or fields parameter.
     """
-    mechanics = db.session.query(Mechanics).all()
-    return mechanics_schema.jsonify(mechanics), 200
+    try:
+        query, schema = apply_list_params(Mechanics, request.args, mechanics_schema)
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
+    mechanics = db.session.scalars(query.where(Mechanics.deleted_at.is_(None))).all()
+    return schema.jsonify(mechanics), 200
 
 # Get Mechanic by ID Route
 @mechanics_bp.route("/<int:mechanic_id>", methods=["GET"])
@@ -152,7 +179,7 @@ def read_single_mechanic(mechanic_id):
         description: Mechanic not found.
     """
     mechanic = db.session.get(Mechanics, mechanic_id)
-    if not mechanic:
+    if not mechanic or mechanic.deleted_at is not None:
         return jsonify({"message": "Mechanic not found."}), 404
     return mechanic_schema.jsonify(mechanic), 200
 
@@ -195,7 +222,7 @@ def update_mechanic(mechanic_id):
         return jsonify({"message": "Unauthorized to update this mechanic."}), 403
     
     mechanic = db.session.get(Mechanics, mechanic_id)
-    if not mechanic:
+    if not mechanic or mechanic.deleted_at is not None:
         return jsonify({"message": "Mechanic not found."}), 404
     
     try:
@@ -222,7 +249,7 @@ def delete_mechanic(mechanic_id):
     tags:
       - mechanics
     summary: Deletes a mechanic account by ID.
-    description: This route allows a manager to permanently delete a mechanic's account. Requires a JWT with 'manager' role.
+    description: This route allows a manager to delete a mechanic's account. The account is soft deleted -- ticket history keeps pointing at it, but it can no longer log in, is hidden from lists and is never auto-assigned again, and its email is freed. Open tickets it is assigned to keep the assignment until a manager reassigns them. Requires a JWT with 'manager' role.
     security:
       - token: []
     parameters:
@@ -246,10 +273,10 @@ def delete_mechanic(mechanic_id):
         return jsonify({"message": "Unauthorized to delete this mechanic."}), 403
         
     mechanic = db.session.get(Mechanics, mechanic_id)
-    if not mechanic:
+    if not mechanic or mechanic.deleted_at is not None:
         return jsonify({"message": "Mechanic not found."}), 404
     
-    db.session.delete(mechanic)
+    soft_delete(mechanic)
     db.session.commit()
     return jsonify({"message": f"Successfully deleted mechanic {mechanic_id}."}), 200
 
@@ -262,23 +289,145 @@ def get_my_tickets():
     ---
     tags:
       - mechanics
-    summary: Retrieves all service tickets assigned to the logged-in mechanic.
-    description: This route uses the authenticated user's ID to fetch and return a list of their assigned service tickets.
+    summary: Retrieves the service tickets assigned to the logged-in mechanic.
+    description: This route uses the authenticated user's ID to return a list of their assigned service tickets, newest service date first. Passing limit or cursor opts in to keyset pagination instead, so every page costs the same however long the mechanic's history is; the response is then an object with the page's tickets and the next_cursor to fetch the following page.
     security:
       - token: []
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Page size (default 20, max 100). Returns one page instead of the whole list.
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: The next_cursor value from the previous page.
     responses:
       200:
-        description: A list of service tickets for the authenticated mechanic.
+        description: The authenticated mechanic's service tickets; one page of them when limit or cursor is given.
+        examples:
+          application/json:
+            - id: 1
+              status: In Progress
+      400:
+        description: Invalid limit or cursor.
       404:
-        description: No tickets found for this mechanic.
+        description: Mechanic not found.
     """
-    mechanic = db.session.query(Mechanics).where(Mechanics.id == request.user_id).first()
-    tickets = db.session.query(ServiceTickets).join(
-        ServiceTickets.mechanic
+    mechanic = db.session.get(Mechanics, int(request.user_id))
+    if mechanic is None or mechanic.deleted_at is not None:
+        return jsonify({"message": "Mechanic not found."}), 404
+    if "limit" not in request.args and "cursor" not in request.args:
+        return service_tickets_schema.jsonify(ticket_history(mechanic.service_ticket)), 200
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        tickets, next_cursor = ticket_history_page(mechanic.service_ticket, limit, request.args.get("cursor"))
+    except ValueError as e:  # bad limit, or InvalidCursor
+        return jsonify({"message": str(e)}), 400
+    return jsonify({
+        "tickets": service_tickets_schema.dump(tickets),
+        "next_cursor": next_cursor
+    }), 200
+
+# Get Mechanic's Active Work Queue
+@mechanics_bp.route("/my-queue", methods=["GET"])
+@token_required
+def get_my_queue():
+    """
+    Get a mechanic's active work queue
+    ---
+    tags:
+      - mechanics
+    summary: Retrieves the logged-in mechanic's open tickets, highest priority and oldest first.
+    description: Returns tickets assigned to the authenticated mechanic that are still being worked (Assigned, In Progress, Awaiting Parts), ordered by priority (descending), then service date and ID (ascending). Uses keyset pagination; pass the returned next_cursor to fetch the following page.
+    security:
+      - token: []
+    parameters:
+      - name: status
+        in: query
+        type: array
+        items:
+          type: string
+          enum: ["Assigned", "In Progress", "Awaiting Parts"]
+        collectionFormat: multi
+        required: false
+        description: Restrict the queue to these statuses. Defaults to all active statuses.
+      - name: limit
+        in: query
+        type: integer
+        default: 20
+        description: Page size (max 100).
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: The next_cursor value from the previous page.
+    responses:
+      200:
+        description: One page of the work queue.
+        examples:
+          application/json:
+            tickets: []
+            next_cursor: null
+      400:
+        description: Invalid status, limit or cursor.
+      403:
+        description: Only mechanics and managers have a work queue.
+    """
+    if request.role not in ["mechanic", "manager"]:
+        return jsonify({"message": "Only mechanics and managers have a work queue."}), 403
+
+    statuses = request.args.getlist("status") or ACTIVE_TICKET_STATUSES
+    invalid = [status for status in statuses if status not in ACTIVE_TICKET_STATUSES]
+    if invalid:
+        return jsonify({"message": f"Invalid status. Allowed values are: {', '.join(ACTIVE_TICKET_STATUSES)}"}), 400
+
+    try:
+        limit = parse_limit(request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # One indexed query: association index (mechanics_id, service_tickets_id)
+    # feeds the ticket index (status, priority, service_date, id).
+    query = select(ServiceTickets).join(
+        service_mechanics, service_mechanics.c.service_tickets_id == ServiceTickets.id
     ).where(
-        Mechanics.id == mechanic.id
-    ).all()
-    return service_tickets_schema.jsonify(tickets), 200
+        service_mechanics.c.mechanics_id == int(request.user_id),
+        ServiceTickets.status.in_(statuses)
+    )
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            priority, service_date, ticket_id = decode_cursor(cursor)
+            priority, ticket_id = int(priority), int(ticket_id)
+            service_date = date.fromisoformat(service_date)
+        except (InvalidCursor, TypeError, ValueError):
+            return jsonify({"message": "Invalid cursor."}), 400
+        query = query.where(or_(
+            ServiceTickets.priority < priority,
+            and_(ServiceTickets.priority == priority, ServiceTickets.service_date > service_date),
+            and_(ServiceTickets.priority == priority, ServiceTickets.service_date == service_date,
+                 ServiceTickets.id > ticket_id)
+        ))
+
+    query = query.order_by(
+        ServiceTickets.priority.desc(), ServiceTickets.service_date.asc(), ServiceTickets.id.asc()
+    ).limit(limit + 1)
+
+    tickets = db.session.scalars(query).all()
+    next_cursor = None
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        last = tickets[-1]
+        next_cursor = encode_cursor([last.priority, last.service_date.isoformat(), last.id])
+
+    return jsonify({
+        "tickets": service_tickets_schema.dump(tickets),
+        "next_cursor": next_cursor
+    }), 200
 
 # Advanced Query: Get mechanics by number of tickets worked on
 @mechanics_bp.route("/top-mechanics", methods=["GET"])
@@ -289,7 +438,20 @@ def get_top_mechanics():
     tags:
       - mechanics
     summary: Ranks mechanics by the number of service tickets they have worked on.
-    description: This route uses an advanced query to retrieve and rank all mechanics based on the count of service tickets they've been assigned.
+    description: This route uses an advanced query to retrieve and rank all mechanics based on the count of service tickets they've been assigned with a service date between start and end. Without start and end the report covers the last 365 days (REPORT_WINDOW_DAYS).
+    parameters:
+      - name: start
+        in: query
+        type: string
+        format: date
+        required: false
+        description: First service date included (YYYY-MM-DD).
+      - name: end
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Last service date included (YYYY-MM-DD); defaults to today.
     responses:
       200:
         description: A list of mechanics ranked by ticket count.
@@ -303,11 +465,20 @@ def get_top_mechanics():
               first_name: "Jane"
               last_name: "Smith"
               ticket_count: 3
+      400:
+        description: Invalid start or end.
     """
+    try:
+        start, end = date_window(request.args, current_app.config["REPORT_WINDOW_DAYS"])
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
     top_mechanics = db.session.query(
         Mechanics, func.count(ServiceTickets.id).label("ticket_count")
     ).join(
         ServiceTickets.mechanic
+    ).where(
+        Mechanics.deleted_at.is_(None), ServiceTickets.service_date.between(start, end)
     ).group_by(
         Mechanics.id
     ).order_by(
@@ -319,9 +490,9 @@ def get_top_mechanics():
             "id": mechanic.id,
             "first_name": mechanic.first_name,
             "last_name": mechanic.last_name,
-            "ticket_count": row.ticket_count
+            "ticket_count": ticket_count
         }
-        for mechanic, row in top_mechanics
+        for mechanic, ticket_count in top_mechanics
     ]
 
     return jsonify(results), 200
\ No newline at end of file
@@ -5,6 +5,7 @@ class MechanicSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Mechanics
         load_instance = False
+        exclude = ("deleted_at",)
 
 mechanic_schema = MechanicSchema()
 mechanics_schema = MechanicSchema(many=True)
@@ -0,0 +1,39 @@
+from flask import request, jsonify
+from app.blueprints.metrics import metrics_bp
+from app.util.auth import token_required
+from app.util.metrics import metrics
+
+
+@metrics_bp.route("/", methods=["GET"])
+@token_required
+def read_metrics():
+    """
+    Get in-process service metrics (Manager Only)
+    ---
+    tags:
+      - metrics
+    summary: Returns the counters collected by this worker process.
+    description: Includes rate limiter decisions (allowed/rejected) per endpoint and role. Counters are per worker process. Requires a JWT with 'manager' role.
+    security:
+      - token: []
+    parameters:
+      - name: name
+        in: query
+        type: string
+        required: false
+        description: Only return counters with this name (e.g. ratelimit_decisions).
+    responses:
+      200:
+        description: A list of counters.
+        examples:
+          application/json:
+            - name: "ratelimit_decisions"
+              labels: {"decision": "rejected", "endpoint": "customers_bp.login", "role": "anonymous"}
+              value: 12
+      403:
+        description: Unauthorized to read metrics.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to read metrics."}), 403
+
+    return jsonify(metrics.snapshot(request.args.get("name"))), 200
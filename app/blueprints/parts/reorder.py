@@ -0,0 +1,183 @@
+import math
+from datetime import date, datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, delete, insert, func, cast, case, and_, or_, Date
+from app.models import db, Part, PartReservation, InventoryPartDescription, ServiceTickets, ReorderSuggestion
+
+# Low-stock reorder suggestions.
+#
+# A batch job (``flask reorder compute``, run from cron) measures how fast
+# each part description is consumed and stores a ranked list of what to
+# reorder; GET /parts/reorder-suggestions only reads that list.
+#
+# Consumption is counted per day from Part.consumed_at (the ticket's
+# service_date for parts installed before that column existed) with one
+# GROUP BY over the history window. The per-day counts are laid out as one
+# row per part description in a flat Arrow array and the rolling sums come
+# from a single cumulative sum: window_sum[i] = cumsum[i] - cumsum[i - w].
+# Each row is padded with w leading zeros so a window never reaches into
+# the previous row. Arrow's group_by then reduces every row at once, so the
+# job does a fixed number of vectorized passes however many SKUs there are.
+#
+# For each description:
+#   daily velocity  = units consumed over the last REORDER_VELOCITY_DAYS / that many days
+#   peak velocity   = busiest REORDER_PEAK_WINDOW_DAYS window in the history / its length
+#   reorder point   = velocity * lead time + (peak - velocity) * lead time (safety stock),
+#                     unless the description sets reorder_point itself
+#   suggested qty   = reorder_quantity, in multiples large enough to clear the reorder
+#                     point, or enough to get back above it plus REORDER_COVER_DAYS of demand
+# A description is suggested when its free stock (not installed, not held) is at
+# or below a non-zero reorder point.
+
+
+class ReorderUnavailable(RuntimeError):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError as e:
+        raise ReorderUnavailable("Reorder suggestions require pyarrow (pip install pyarrow).") from e
+    return pyarrow, pyarrow.compute
+
+
+def _utcnow():
+    # Naive UTC; SQLite has no timezone-aware DateTime.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _consumption_day():
+    if db.session.get_bind().dialect.name == "sqlite":
+        # CAST(... AS DATE) has numeric affinity on SQLite
+        consumed_day = func.date(Part.consumed_at)
+    else:
+        consumed_day = cast(Part.consumed_at, Date)
+    return func.coalesce(consumed_day, ServiceTickets.service_date)
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def daily_consumption(start):
+    """[(desc_id, day, units)] for parts consumed on or after ``start``."""
+    day = _consumption_day().label("day")
+    rows = db.session.execute(
+        select(Part.desc_id, day, func.count())
+        .join(ServiceTickets, ServiceTickets.id == Part.ticket_id)
+        .where(or_(Part.consumed_at >= datetime.combine(start, datetime.min.time()),
+                   and_(Part.consumed_at.is_(None), ServiceTickets.service_date >= start)))
+        .group_by(Part.desc_id, day)
+    )
+    return [(desc_id, _as_date(day), units) for desc_id, day, units in rows]
+
+
+def velocities(rows, start, history_days, peak_window, velocity_days):
+    """
+    {desc_id: (daily_velocity, peak_daily_velocity)} from ``rows`` of
+    (desc_id, day, units) covering ``history_days`` days from ``start``.
+    """
+    pa, pc = _pyarrow()
+    desc_ids = sorted({desc_id for desc_id, _, _ in rows})
+    if not desc_ids:
+        return {}
+    position = {desc_id: i for i, desc_id in enumerate(desc_ids)}
+    width = peak_window + history_days
+
+    counts = [0] * (len(desc_ids) * width)
+    for desc_id, day, units in rows:
+        offset = (day - start).days
+        if 0 <= offset < history_days:
+            counts[position[desc_id] * width + peak_window + offset] = units
+
+    units = pa.array(counts, pa.int64())
+    cumulative = pc.cumulative_sum(units)
+    lagged = pa.concat_arrays([pa.array([0] * peak_window, pa.int64()),
+                               cumulative.slice(0, len(counts) - peak_window)])
+    index = pa.array(range(len(counts)), pa.int64())
+    offsets = pc.subtract(index, pc.multiply(pc.divide(index, width), width))
+    table = pa.table({
+        "row": pc.divide(index, width),
+        "window_sum": pc.subtract(cumulative, lagged),
+        "recent": pc.if_else(pc.greater_equal(offsets, width - velocity_days), units, 0),
+    }).filter(pc.greater_equal(offsets, peak_window))
+
+    grouped = table.group_by("row").aggregate([("recent", "sum"), ("window_sum", "max")]).to_pydict()
+    return {
+        desc_ids[row]: (recent / velocity_days, peak / peak_window)
+        for row, recent, peak in zip(grouped["row"], grouped["recent_sum"], grouped["window_sum_max"])
+    }
+
+
+def stock_levels(now):
+    """{desc_id: (on_hand, available)}: units not installed, and of those the ones not under a live hold."""
+    held = case((and_(PartReservation.status == "held", PartReservation.expires_at > now), 1), else_=0)
+    rows = db.session.execute(
+        select(Part.desc_id, func.count(), func.coalesce(func.sum(held), 0))
+        .outerjoin(PartReservation, PartReservation.id == Part.reservation_id)
+        .where(Part.ticket_id.is_(None))
+        .group_by(Part.desc_id)
+    )
+    return {desc_id: (on_hand, on_hand - held_units) for desc_id, on_hand, held_units in rows}
+
+
+def _suggested_quantity(reorder_point, available, reorder_quantity, target):
+    shortfall = reorder_point - available + 1
+    if reorder_quantity:
+        return reorder_quantity * math.ceil(shortfall / reorder_quantity)
+    return max(target - available, shortfall)
+
+
+def compute_suggestions(today=None):
+    """Recompute and store every reorder suggestion. Returns the number of suggestions."""
+    config = current_app.config
+    history_days = config["REORDER_HISTORY_DAYS"]
+    velocity_days = min(config["REORDER_VELOCITY_DAYS"], history_days)
+    peak_window = config["REORDER_PEAK_WINDOW_DAYS"]
+    now = _utcnow()
+    today = today or now.date()
+    start = today - timedelta(days=history_days - 1)
+
+    rates = velocities(daily_consumption(start), start, history_days, peak_window, velocity_days)
+    stock = stock_levels(now)
+
+    suggestions = []
+    for desc_id, manual_point, reorder_quantity, lead_time in db.session.execute(
+        select(InventoryPartDescription.id, InventoryPartDescription.reorder_point,
+               InventoryPartDescription.reorder_quantity, InventoryPartDescription.lead_time_days)
+    ):
+        velocity, peak = rates.get(desc_id, (0.0, 0.0))
+        on_hand, available = stock.get(desc_id, (0, 0))
+        lead_time = lead_time if lead_time is not None else config["REORDER_DEFAULT_LEAD_TIME_DAYS"]
+        if manual_point is not None:
+            reorder_point = manual_point
+        else:
+            reorder_point = math.ceil(velocity * lead_time + max(peak - velocity, 0.0) * lead_time)
+        if reorder_point <= 0 or available > reorder_point:
+            continue
+        target = reorder_point + math.ceil(velocity * config["REORDER_COVER_DAYS"])
+        suggestions.append({
+            "desc_id": desc_id,
+            "on_hand": on_hand,
+            "available": available,
+            "daily_velocity": round(velocity, 3),
+            "peak_daily_velocity": round(peak, 3),
+            "reorder_point": reorder_point,
+            "suggested_quantity": _suggested_quantity(reorder_point, available, reorder_quantity, target),
+            "days_of_cover": round(available / velocity, 1) if velocity else None,
+            "computed_at": now,
+        })
+
+    # Most urgent first: least cover, then furthest below the reorder point
+    suggestions.sort(key=lambda s: (s["days_of_cover"] is None, s["days_of_cover"] or 0.0,
+                                    s["available"] - s["reorder_point"], s["desc_id"]))
+    for rank, suggestion in enumerate(suggestions, start=1):
+        suggestion["rank"] = rank
+
+    db.session.execute(delete(ReorderSuggestion))
+    if suggestions:
+        db.session.execute(insert(ReorderSuggestion), suggestions)
+    db.session.commit()
+    return len(suggestions)
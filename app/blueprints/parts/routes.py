@@ -1,9 +1,20 @@
 from flask import request, jsonify
 from marshmallow import ValidationError
-from app.models import InventoryPartDescription, Part, db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from app.models import InventoryPartDescription, Part, ReorderSuggestion, db
 from app.util.auth import token_required
+from app.util.idempotency import idempotent
+from app.util.query_params import apply_list_params, QueryParamError
+from app.util.pagination import parse_limit, encode_cursor, decode_cursor, InvalidCursor
+from app.util.search import search_models
+from app.util.loader import prefetch
+from app.util.concurrency import StaleDataError, set_etag, if_match_failed, conflict_response
+from app.util.part_lookup import lookup_codes
 from . import parts_bp
-from .schemas import inventory_part_description_schema, part_schema, parts_schema, inventory_part_descriptions_schema
+from .schemas import (inventory_part_description_schema, part_schema, parts_schema, inventory_part_descriptions_schema,
+                      reorder_policy_schema, reorder_suggestions_schema, code_lookup_schema)
 
 
 # --- FLASGGER CONFIGURATION (CRITICAL: Definitions must be here for reference) ---
@@ -24,7 +35,9 @@ parts_bp.config = {
                 "name": {"type": "string"},
                 "price": {"type": "number"},
                 "supplier_id": {"type": "integer"},
-                "inventory_count": {"type": "integer"}
+                "inventory_count": {"type": "integer"},
+                "sku": {"type": "string", "description": "Optional stock-keeping unit; must be unique."},
+                "upc": {"type": "string", "description": "Optional UPC/EAN barcode (8-14 digits); must be unique."}
             },
             "required": ["name", "price", "supplier_id", "inventory_count"]
         },
@@ -33,7 +46,8 @@ parts_bp.config = {
         "PhysicalPartPayload": {
             "type": "object",
             "properties": {
-                "desc_id": {"type": "integer"}
+                "desc_id": {"type": "integer"},
+                "serial": {"type": "string", "description": "Optional manufacturer serial / barcode; must be unique."}
             },
             "required": ["desc_id"]
         },
@@ -91,6 +105,8 @@ def create_inventory_part_description():
         description: Invalid data provided.
       403:
         description: Unauthorized to create a new part.
+      409:
+        description: The SKU or UPC is already in use.
     """
     if request.role != "manager":
         return jsonify({"message": "Unauthorized to create a new part."}), 403
@@ -102,12 +118,17 @@ def create_inventory_part_description():
 
     new_part = InventoryPartDescription(**data)
     db.session.add(new_part)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Another part already uses this SKU or UPC."}), 409
     return inventory_part_description_schema.jsonify(new_part), 201
 
 
 @parts_bp.route("/add-physical-part", methods=["POST"])
 @token_required
+@idempotent
 def add_physical_part():
     """
     Add a new physical part to inventory
@@ -126,6 +147,11 @@ def add_physical_part():
         schema:
           # Correct Flasgger syntax for referencing a definition
           $ref: '#/definitions/PhysicalPartPayload'
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Unique key per logical request. Retries with the same key replay the first response instead of running again.
     responses:
       201:
         description: Physical part successfully created.
@@ -138,6 +164,8 @@ def add_physical_part():
         description: Unauthorized to add a new physical part.
       404:
         description: Inventory description not found.
+      409:
+        description: The serial is already in use.
       500:
         description: An error occurred.
     """
@@ -154,10 +182,13 @@ def add_physical_part():
         if not inventory_desc:
             return jsonify({"message": "Inventory description not found."}), 404
 
-        new_physical_part = Part(desc_id=desc_id)
+        new_physical_part = Part(desc_id=desc_id, serial=data.get("serial"))
         db.session.add(new_physical_part)
         db.session.commit()
         return jsonify({"message": f"Successfully created physical part with ID {new_physical_part.id}."}), 201
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Another part already has this serial."}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "An error occurred.", "error": str(e)}), 500
@@ -171,7 +202,23 @@ def read_all_parts():
     tags:
       - parts
     summary: Retrieves a list of all physical parts in the inventory.
-    description: This route returns a list of all part instances. It does not require authentication.
+    description: This route returns a list of part instances, optionally filtered, sorted and narrowed to selected fields in the database. It does not require authentication.
+    parameters:
+      - name: filter[<field>][<op>]
+        in: query
+        type: string
+        required: false
+        description: "Filter on an indexed field (id, desc_id, ticket_id). Operators: eq (default), ne, gt, gte, lt, lte, in (comma separated). e.g. filter[desc_id]=3"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma separated fields to sort by, prefix with - for descending. e.g. -id"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of fields to return; only those columns are loaded.
     responses:
       200:
         description: A list of all physical parts.
@@ -179,9 +226,75 @@ def read_all_parts():
           type: array
           items:
             $ref: '#/definitions/PartResponse'
+      400:
+        description: Invalid filter, sort or fields parameter.
+    """
+    try:
+        query, schema = apply_list_params(Part, request.args, parts_schema)
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
+    parts = db.session.scalars(query).all()
+    if "inventory_description" in schema.dump_fields:
+        # One IN query for all descriptions instead of a lazy load per part
+        prefetch(parts, "desc_id", InventoryPartDescription)
+    return schema.jsonify(parts), 200
+
+
+@parts_bp.route("/search", methods=["GET"])
+def search_parts():
+    """
+    Search the parts catalog
+    ---
+    tags:
+      - parts
+    summary: Full-text search over inventory part names.
+    description: Returns inventory part descriptions ranked by relevance, e.g. q=spark plug. It does not require authentication.
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Search text. All words must match; the last word also matches as a prefix.
+      - name: page
+        in: query
+        type: integer
+        default: 1
+        description: The page number to retrieve.
+      - name: per_page
+        in: query
+        type: integer
+        default: 20
+        description: Number of results per page (max 100).
+    responses:
+      200:
+        description: One page of ranked results.
+        examples:
+          application/json:
+            page: 1
+            per_page: 20
+            results: [{"id": 2, "name": "Spark Plug", "price": 5.0, "rank": 1.3}]
+      400:
+        description: Missing search text or invalid paging parameters.
     """
-    parts = db.session.query(Part).all()
-    return parts_schema.jsonify(parts), 200
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"message": "q is required."}), 400
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = parse_limit(request.args.get("per_page"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if page < 1:
+        return jsonify({"message": "page must be at least 1."}), 400
+
+    results = []
+    for description, rank in search_models(InventoryPartDescription, "inventory_part_descriptions", query, page, per_page):
+        result = inventory_part_description_schema.dump(description)
+        result["rank"] = rank
+        results.append(result)
+
+    return jsonify({"page": page, "per_page": per_page, "results": results}), 200
 
 
 @parts_bp.route("/<int:part_id>", methods=["GET"])
@@ -204,13 +317,19 @@ def read_single_part(part_id):
         description: Part found.
         schema:
           $ref: '#/definitions/PartResponse'
+        headers:
+          ETag:
+            type: string
+            description: The part's version; send it back in If-Match on updates.
+      304:
+        description: The part still matches the If-None-Match ETag.
       404:
         description: Part not found.
     """
     part = db.session.get(Part, part_id)
     if not part:
         return jsonify({"message": "Part not found."}), 404
-    return part_schema.jsonify(part), 200
+    return set_etag(part_schema.jsonify(part), part).make_conditional(request)
 
 
 @parts_bp.route("/<int:part_id>", methods=["PUT"])
@@ -236,6 +355,11 @@ def update_part(part_id):
         schema:
           # Correct Flasgger syntax for referencing a definition
           $ref: '#/definitions/PhysicalPartPayload'
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The part's ETag (its version_id). The request is rejected with 409 if the part has changed since.
     responses:
       200:
         description: Part updated successfully.
@@ -247,6 +371,8 @@ def update_part(part_id):
         description: Unauthorized to update this part.
       404:
         description: Part or Inventory description not found.
+      409:
+        description: The part was changed by another request; the body carries its current state.
       500:
         description: An error occurred.
     """
@@ -256,6 +382,8 @@ def update_part(part_id):
     part_to_update = db.session.get(Part, part_id)
     if not part_to_update:
         return jsonify({"message": "Part not found."}), 404
+    if if_match_failed(part_to_update):
+        return conflict_response(Part, part_id, part_schema)
 
     try:
         data = request.json
@@ -269,8 +397,10 @@ def update_part(part_id):
 
         part_to_update.desc_id = desc_id
         db.session.commit()
-        return part_schema.jsonify(part_to_update), 200
+        return set_etag(part_schema.jsonify(part_to_update), part_to_update), 200
 
+    except StaleDataError:
+        return conflict_response(Part, part_id, part_schema)
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "An error occurred.", "error": str(e)}), 500
@@ -315,3 +445,235 @@ def delete_part(part_id):
     db.session.delete(part_to_delete)
     db.session.commit()
     return jsonify({"message": f"Successfully deleted part {part_id}."}), 200
+
+
+@parts_bp.route("/descriptions/<int:desc_id>/reorder-policy", methods=["PUT"])
+@token_required
+def update_reorder_policy(desc_id):
+    """
+    Set a part description's reorder policy (Manager Only)
+    ---
+    tags:
+      - parts
+    summary: Sets the reorder point, order quantity and supplier lead time of a part type.
+    description: Any field left out is unchanged; null clears it. Without a reorder_point the reorder job derives one from consumption and lead time. Takes effect on the job's next run.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - name: desc_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            reorder_point:
+              type: integer
+              description: Reorder when free stock falls to this many units.
+            reorder_quantity:
+              type: integer
+              description: Order in multiples of this many units.
+            lead_time_days:
+              type: integer
+              description: Days from ordering to delivery.
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The description's ETag (its version_id). The request is rejected with 409 if it has changed since.
+    responses:
+      200:
+        description: Policy updated.
+        schema:
+          $ref: '#/definitions/PartDescriptionResponse'
+      400:
+        description: Invalid data provided.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Part description not found.
+      409:
+        description: The description was changed by another request; the body carries its current state.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to change reorder policies."}), 403
+    description = db.session.get(InventoryPartDescription, desc_id)
+    if not description:
+        return jsonify({"message": "Inventory description not found."}), 404
+    if if_match_failed(description):
+        return conflict_response(InventoryPartDescription, desc_id, inventory_part_description_schema)
+    try:
+        data = reorder_policy_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    for key, value in data.items():
+        setattr(description, key, value)
+    try:
+        db.session.commit()
+    except StaleDataError:
+        return conflict_response(InventoryPartDescription, desc_id, inventory_part_description_schema)
+    return set_etag(inventory_part_description_schema.jsonify(description), description), 200
+
+
+@parts_bp.route("/reorder-suggestions", methods=["GET"])
+@token_required
+def read_reorder_suggestions():
+    """
+    Get low-stock reorder suggestions (Manager Only)
+    ---
+    tags:
+      - parts
+    summary: Part types at or below their reorder point, most urgent first.
+    description: Computed by the scheduled reorder job (`flask reorder compute`), not per request; computed_at says when. Ordered by days of free stock left at the current consumption rate. Uses keyset pagination; pass the returned next_cursor to fetch the following page.
+    security:
+      - token: []
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        default: 50
+        description: Page size (max 500).
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: The next_cursor value from the previous page.
+    responses:
+      200:
+        description: One page of suggestions.
+        examples:
+          application/json:
+            suggestions:
+              - rank: 1
+                desc_id: 7
+                inventory_description: {"id": 7, "name": "Spark Plug", "price": 9.5}
+                on_hand: 4
+                available: 2
+                daily_velocity: 1.25
+                peak_daily_velocity: 2.0
+                reorder_point: 15
+                suggested_quantity: 48
+                days_of_cover: 1.6
+                computed_at: "2026-03-02T04:00:00"
+            next_cursor: null
+      400:
+        description: Invalid limit or cursor.
+      403:
+        description: Unauthorized. Must be a manager.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to view reorder suggestions."}), 403
+    try:
+        limit = parse_limit(request.args.get("limit"), default=50, maximum=500)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = select(ReorderSuggestion).options(joinedload(ReorderSuggestion.inventory_description))
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            (rank,) = decode_cursor(cursor)
+            rank = int(rank)
+        except (InvalidCursor, TypeError, ValueError):
+            return jsonify({"message": "Invalid cursor."}), 400
+        query = query.where(ReorderSuggestion.rank > rank)
+
+    suggestions = db.session.scalars(query.order_by(ReorderSuggestion.rank).limit(limit + 1)).all()
+    next_cursor = None
+    if len(suggestions) > limit:
+        suggestions = suggestions[:limit]
+        next_cursor = encode_cursor([suggestions[-1].rank])
+
+    return jsonify({
+        "suggestions": reorder_suggestions_schema.dump(suggestions),
+        "next_cursor": next_cursor
+    }), 200
+
+
+def _lookup(codes):
+    return lookup_codes(codes, part_schema.dump, inventory_part_description_schema.dump)
+
+
+@parts_bp.route("/lookup", methods=["GET"])
+def lookup_part_code():
+    """
+    Look up a scanned barcode or serial
+    ---
+    tags:
+      - parts
+    summary: Resolves a part serial, SKU or UPC to the part or part type it identifies.
+    description: Case and surrounding whitespace are ignored. Serials resolve to the physical part (with its description); SKUs and UPCs to the part description. Recently scanned codes are answered from memory. It does not require authentication.
+    parameters:
+      - name: code
+        in: query
+        type: string
+        required: true
+    responses:
+      200:
+        description: The code was found.
+        examples:
+          application/json:
+            code: "SN-0042"
+            kind: "serial"
+            part: {"id": 12, "desc_id": 3, "ticket_id": null, "serial": "SN-0042"}
+            description: {"id": 3, "name": "Spark Plug", "price": 9.5, "sku": "SP-100", "upc": "012345678905"}
+      400:
+        description: Missing code.
+      404:
+        description: No part has this code.
+    """
+    code = request.args.get("code", "").strip()
+    if not code:
+        return jsonify({"message": "code is required."}), 400
+    result = next(iter(_lookup([code]).values()))
+    if result is None:
+        return jsonify({"message": f"No part has the code '{code}'."}), 404
+    return jsonify(result), 200
+
+
+@parts_bp.route("/lookup", methods=["POST"])
+def lookup_part_codes():
+    """
+    Look up a batch of scanned codes
+    ---
+    tags:
+      - parts
+    summary: Resolves up to 500 serials, SKUs or UPCs at once (e.g. a whole shelf).
+    description: Codes not in the in-memory cache are resolved together in a single query. It does not require authentication.
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [codes]
+          properties:
+            codes:
+              type: array
+              items:
+                type: string
+    responses:
+      200:
+        description: Results keyed by normalized code, plus the codes that matched nothing.
+        examples:
+          application/json:
+            results: {"SN-0042": {"code": "SN-0042", "kind": "serial", "part": {}, "description": {}}}
+            missing: ["SN-9999"]
+      400:
+        description: Invalid payload.
+    """
+    try:
+        data = code_lookup_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+    results = _lookup(data["codes"])
+    return jsonify({
+        "results": {code: result for code, result in results.items() if result is not None},
+        "missing": [code for code, result in results.items() if result is None],
+    }), 200
@@ -1,11 +1,16 @@
 from app.extensions import ma
-from app.models import InventoryPartDescription, Part
-from marshmallow import fields
+from app.models import InventoryPartDescription, Part, ReorderSuggestion
+from marshmallow import fields, validate
 
 class InventoryPartDescriptionSchema(ma.SQLAlchemyAutoSchema):
+    # UPC-A / EAN-8 / EAN-13 / GTIN-14 digits
+    upc = fields.String(allow_none=True, validate=validate.Regexp(r"^\s*\d{8,14}\s*$", error="Not a valid UPC/EAN."))
+
     class Meta:
         model = InventoryPartDescription
         load_instance = False 
+        # Managed by SQLAlchemy; clients read it (or the ETag) and send it back in If-Match
+        dump_only = ("version_id",)
         
 inventory_part_description_schema = InventoryPartDescriptionSchema()
 inventory_part_descriptions_schema = InventoryPartDescriptionSchema(many=True)
@@ -19,6 +24,32 @@ class PartSchema(ma.SQLAlchemyAutoSchema):
         load_instance = False
         # Ensure that the desc_id foreign key is included in the serialized output
         include_fk = True
+        # Holds are placed through /service-tickets/<id>/reservations
+        dump_only = ("version_id", "reservation_id")
 
 part_schema = PartSchema()
-parts_schema = PartSchema(many=True)
\ No newline at end of file
+parts_schema = PartSchema(many=True)
+
+class ReorderPolicySchema(ma.Schema):
+    # null clears a setting: the reorder point is computed again / the default lead time applies
+    reorder_point = fields.Integer(allow_none=True, validate=validate.Range(min=0))
+    reorder_quantity = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    lead_time_days = fields.Integer(allow_none=True, validate=validate.Range(min=0))
+
+reorder_policy_schema = ReorderPolicySchema()
+
+class ReorderSuggestionSchema(ma.SQLAlchemyAutoSchema):
+    inventory_description = fields.Nested(InventoryPartDescriptionSchema, only=("id", "name", "price"))
+
+    class Meta:
+        model = ReorderSuggestion
+        include_fk = True
+        exclude = ("id",)
+
+reorder_suggestions_schema = ReorderSuggestionSchema(many=True)
+
+class CodeLookupSchema(ma.Schema):
+    codes = fields.List(fields.String(validate=validate.Length(min=1, max=100)), required=True,
+                        validate=validate.Length(min=1, max=500))
+
+code_lookup_schema = CodeLookupSchema()
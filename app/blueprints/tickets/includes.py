@@ -0,0 +1,60 @@
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import ServiceTickets, Part
+from app.util.query_params import QueryParamError
+from app.blueprints.customers.schemas import UserSchema
+from app.blueprints.mechanics.schemas import MechanicSchema
+from app.blueprints.parts.schemas import PartSchema
+
+# ?include=customer,mechanics,parts.inventory_description
+#
+# Each include maps to one eager-load option, so a ticket (or a page of
+# tickets) with its whole graph costs a fixed number of queries: the tickets
+# (with the customer joined in), one SELECT ... IN for the mechanics and one
+# for the parts (with their inventory descriptions joined in).
+
+INCLUDES = ("customer", "mechanics", "parts", "parts.inventory_description")
+
+_customer_schema = UserSchema(exclude=("password",))
+_mechanics_schema = MechanicSchema(many=True, exclude=("password",))
+_parts_schema = PartSchema(many=True, exclude=("inventory_description",))
+_parts_with_description_schema = PartSchema(many=True)
+
+
+def parse_includes(value):
+    """Parse the ``include`` query parameter into a set of include paths."""
+    if not value:
+        return set()
+    includes = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = includes - set(INCLUDES)
+    if unknown:
+        raise QueryParamError(f"Cannot include '{', '.join(sorted(unknown))}'. Allowed: {', '.join(INCLUDES)}.")
+    if "parts.inventory_description" in includes:
+        includes.add("parts")
+    return includes
+
+
+def include_options(includes):
+    """Loader options that fetch ``includes`` eagerly."""
+    options = []
+    if "customer" in includes:
+        # Many-to-one: join it into the ticket query
+        options.append(joinedload(ServiceTickets.customer))
+    if "mechanics" in includes:
+        options.append(selectinload(ServiceTickets.mechanic))
+    if "parts.inventory_description" in includes:
+        options.append(selectinload(ServiceTickets.parts).joinedload(Part.inventory_description))
+    elif "parts" in includes:
+        options.append(selectinload(ServiceTickets.parts))
+    return options
+
+
+def dump_included(ticket, result, includes):
+    """Add the included related objects to ``result`` (the dumped ``ticket``)."""
+    if "customer" in includes:
+        result["customer"] = _customer_schema.dump(ticket.customer) if ticket.customer else None
+    if "mechanics" in includes:
+        result["mechanics"] = _mechanics_schema.dump(ticket.mechanic)
+    if "parts" in includes:
+        schema = _parts_with_description_schema if "parts.inventory_description" in includes else _parts_schema
+        result["parts"] = schema.dump(ticket.parts)
+    return result
@@ -0,0 +1,117 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models import db, ServiceTickets, Mechanics, Part
+from app.util.outbox import emit
+from app.util.loader import get_loader
+from app.util.reference import part_catalog
+from app.util.reservations import (fulfill_ticket_reservations, release_ticket_reservations, blocking_hold,
+                                   install_part)
+
+FLAT_LABOR_CHARGE = 150.00
+
+
+def complete_ticket(ticket):
+    """Price a ticket that is being completed (parts + flat labor) and queue ticket.completed."""
+    # Parts still on hold for the ticket are installed now
+    fulfill_ticket_reservations(ticket)
+    # The unit price lives on the part's inventory description, which the
+    # in-process parts catalog already holds
+    catalog = part_catalog()
+    total_parts_cost = sum(catalog[part.desc_id].price for part in ticket.parts if part.desc_id in catalog)
+    final_price = total_parts_cost + FLAT_LABOR_CHARGE
+    ticket.price = final_price
+
+    # Analytics rollups are updated off the request path by the outbox worker
+    emit("ticket.completed", {
+        "ticket_id": ticket.id,
+        "customer_id": ticket.customer_id,
+        "mechanic_ids": [mechanic.id for mechanic in ticket.mechanic],
+        "service_date": ticket.service_date.isoformat(),
+        "price": final_price,
+        "parts_cost": total_parts_cost,
+        "labor_total": FLAT_LABOR_CHARGE,
+    })
+
+
+class BatchError(Exception):
+    """An operation in a batch can't be applied; nothing in the batch is committed."""
+
+    def __init__(self, message, status_code, ticket_id, index):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.ticket_id = ticket_id
+        self.index = index
+
+    def to_dict(self):
+        return {"message": self.message, "ticket_id": self.ticket_id, "operation": self.index}
+
+
+def apply_batches(batches):
+    """
+    Apply ``batches`` ([(ticket_id, [operation, ...]), ...]) in order, in the
+    current transaction, and return the tickets by id. Tickets, mechanics
+    and parts are each loaded with a single IN query up front (mechanics
+    and parts through the request's batch loaders); prices come from the
+    in-process parts catalog. Raises BatchError
+    on the first operation that can't be applied; the caller rolls back.
+    The caller commits.
+    """
+    ticket_ids = {ticket_id for ticket_id, _ in batches}
+    mechanic_ids = {op["mechanic_id"] for _, ops in batches for op in ops if "mechanic_id" in op}
+    part_ids = {op["part_id"] for _, ops in batches for op in ops if op["op"] == "add_part"}
+
+    tickets = {ticket.id: ticket for ticket in db.session.scalars(
+        select(ServiceTickets).where(ServiceTickets.id.in_(ticket_ids)).options(
+            selectinload(ServiceTickets.mechanic),
+            selectinload(ServiceTickets.parts))
+    )}
+    mechanics = get_loader(Mechanics)
+    mechanics.want(*mechanic_ids)
+    parts = get_loader(Part)
+    parts.want(*part_ids)
+
+    for ticket_id, operations in batches:
+        ticket = tickets.get(ticket_id)
+        if ticket is None:
+            raise BatchError("Service ticket not found.", 404, ticket_id, None)
+
+        for index, operation in enumerate(operations):
+            op = operation["op"]
+
+            if op in ("assign_mechanic", "remove_mechanic"):
+                mechanic = mechanics.load(operation["mechanic_id"])
+                if mechanic is None:
+                    raise BatchError(f"Mechanic ID {operation['mechanic_id']} not found.", 404, ticket_id, index)
+                if op == "assign_mechanic":
+                    if mechanic.deleted_at is not None:
+                        raise BatchError(f"Mechanic ID {mechanic.id} not found.", 404, ticket_id, index)
+                    if mechanic not in ticket.mechanic:
+                        ticket.mechanic.append(mechanic)
+                        emit("mechanic.assigned", {"ticket_id": ticket.id, "mechanic_id": mechanic.id})
+                    ticket.status = "Assigned"
+                elif mechanic in ticket.mechanic:
+                    ticket.mechanic.remove(mechanic)
+                else:
+                    raise BatchError(f"Mechanic ID {mechanic.id} is not assigned to this ticket.", 404,
+                                     ticket_id, index)
+
+            elif op == "add_part":
+                part = parts.load(operation["part_id"])
+                if part is None:
+                    raise BatchError(f"Part ID {operation['part_id']} not found.", 404, ticket_id, index)
+                # Installing is a versioned update; a concurrent install fails the commit
+                if part.ticket_id is not None:
+                    raise BatchError(f"Part ID {part.id} is already installed on a ticket.", 409, ticket_id, index)
+                if blocking_hold(part, ticket):
+                    raise BatchError(f"Part ID {part.id} is reserved for another ticket.", 409, ticket_id, index)
+                install_part(part, ticket)
+
+            elif op == "set_status":
+                if operation["status"] == "Complete" and ticket.status != "Complete":
+                    complete_ticket(ticket)
+                elif operation["status"] == "Cancelled" and ticket.status != "Cancelled":
+                    release_ticket_reservations(ticket)
+                ticket.status = operation["status"]
+
+    return tickets
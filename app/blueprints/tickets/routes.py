@@ -1,14 +1,34 @@
 from app.blueprints.tickets import service_tickets_bp
-from .schemas import service_ticket_schema, service_tickets_schema
-from flask import request, jsonify
+from .schemas import (service_ticket_schema, service_tickets_schema, ticket_batch_schema, multi_ticket_batch_schema,
+                      new_service_ticket_schema, auto_assign_batch_schema, part_reservation_schema, part_reservations_schema,
+                      reservation_payload_schema, archived_ticket_schema, archived_tickets_schema)
+from .operations import FLAT_LABOR_CHARGE, BatchError, apply_batches, complete_ticket
+from .includes import parse_includes, include_options, dump_included
+from datetime import timedelta
+from flask import request, jsonify, current_app
 from marshmallow import ValidationError
 # Assuming these model names based on the file provided
-from app.models import ServiceTickets, Mechanics, db, Part 
+from app.models import (ServiceTickets, ArchivedServiceTicket, Mechanics, db, Part, PartReservation, TICKET_STATUSES,
+                        normalize_vin)
+from app.blueprints.parts.schemas import part_schema
 from app.util.auth import encode_token, token_required
+from app.util.idempotency import idempotent
+from app.util.query_params import apply_list_params, QueryParamError
+from app.util.pagination import parse_limit
+from app.util.search import search_models
+from app.util.outbox import emit
+from app.util.concurrency import StaleDataError, set_etag, if_match_failed, conflict_response
+from app.util.vin_index import get_vin_prefix_index, vin_prefix_upper_bound
+from app.util.workload import reserve_assignment, OPEN_TICKET_STATUSES
+from app.util.history import is_assigned
+from app.util.reference import part_catalog
+from app.util.reservations import (ReservationError, reserve, release, fulfill, blocking_hold, install_part,
+                                   release_ticket_reservations)
+from sqlalchemy import select, union
+from sqlalchemy.orm import selectinload
 
 # --- Constants ---
-FLAT_LABOR_CHARGE = 150.00
-ALLOWED_STATUSES = ["Pending", "Assigned", "In Progress", "Awaiting Parts", "Complete", "Cancelled"]
+ALLOWED_STATUSES = TICKET_STATUSES
 
 # The blueprint documentation includes the definitions the Swagger UI requires.
 service_tickets_bp.config = {
@@ -53,6 +73,16 @@ service_tickets_bp.config = {
                 "part_id": {"type": "integer"},
                 "description": {"type": "string"}
             }
+        },
+        "TicketBatchOperation": {
+            "type": "object",
+            "properties": {
+                "op": {"type": "string", "enum": ["assign_mechanic", "remove_mechanic", "add_part", "set_status"]},
+                "mechanic_id": {"type": "integer", "description": "For assign_mechanic and remove_mechanic."},
+                "part_id": {"type": "integer", "description": "For add_part."},
+                "status": {"type": "string", "enum": ALLOWED_STATUSES, "description": "For set_status."}
+            },
+            "required": ["op"]
         }
     }
 }
@@ -61,6 +91,7 @@ service_tickets_bp.config = {
 
 @service_tickets_bp.route("/", methods=['POST'])
 @token_required
+@idempotent
 def create_service_ticket():
     """
     Create a new service ticket
@@ -68,7 +99,7 @@ def create_service_ticket():
     tags:
       - service_tickets
     summary: Creates a new service ticket.
-    description: This route allows a customer or manager to create a new service ticket for an issue.
+    description: This route allows a customer or manager to create a new service ticket for an issue. New tickets always start Pending at the default priority; status and priority are rejected here and change through the status route.
     security:
       - token: []
     consumes:
@@ -78,6 +109,11 @@ def create_service_ticket():
         name: body
         schema:
           $ref: '#/definitions/ServiceTicketPayload'
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Unique key per logical request. Retries with the same key replay the first response instead of running again.
     responses:
       201:
         description: Service ticket successfully created.
@@ -85,9 +121,13 @@ def create_service_ticket():
           $ref: '#/definitions/ServiceTicketResponse'
       400:
         description: Invalid data provided.
+      409:
+        description: A request with the same Idempotency-Key is still in progress.
+      422:
+        description: The Idempotency-Key was already used for a different request.
     """
     try:
-        data = service_ticket_schema.load(request.json)
+        data = new_service_ticket_schema.load(request.json)
     except ValidationError as e:
         return jsonify(e.messages), 400
 
@@ -119,6 +159,11 @@ def assign_mechanic(ticket_id, mechanic_id):
         type: integer
         required: true
         description: The ID of the mechanic to assign.
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The ticket's ETag (its version_id). The request is rejected with 409 if the ticket has changed since.
     responses:
       200:
         description: Mechanic assigned successfully.
@@ -129,6 +174,8 @@ def assign_mechanic(ticket_id, mechanic_id):
         description: Unauthorized to perform this action.
       404:
         description: Service Ticket or Mechanic not found.
+      409:
+        description: The ticket was changed by another request; the body carries its current state.
     """
     ticket = db.session.get(ServiceTickets, ticket_id)
     if request.role != "manager":
@@ -136,16 +183,162 @@ def assign_mechanic(ticket_id, mechanic_id):
     if ticket is None:
         return jsonify({"message": "Service Ticket not found."}), 404
     
+    if if_match_failed(ticket):
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+    
     mechanic = db.session.get(Mechanics, mechanic_id)
-    if mechanic is None:
+    if mechanic is None or mechanic.deleted_at is not None:
         return jsonify({"message": "Mechanic not found."}), 404
     
-    # Core business logic: Assign and update status
-    ticket.mechanic.append(mechanic)
+    # Core business logic: Assign and update status. Re-assigning is a no-op
+    # (the association is keyed on the pair).
+    if not is_assigned(ticket.id, mechanic.id):
+        ticket.mechanic.append(mechanic)
+        emit("mechanic.assigned", {"ticket_id": ticket.id, "mechanic_id": mechanic.id})
     ticket.status = "Assigned"
     
-    db.session.commit()
-    return jsonify({"message": f"Mechanic ID {mechanic_id} assigned to Service Ticket ID {ticket_id} successfully. Status set to 'Assigned'."}), 200
+    try:
+        db.session.commit()
+    except StaleDataError:
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+    response = jsonify({"message": f"Mechanic ID {mechanic_id} assigned to Service Ticket ID {ticket_id} successfully. Status set to 'Assigned'."})
+    return set_etag(response, ticket), 200
+
+@service_tickets_bp.route("/<int:ticket_id>/auto-assign", methods=["POST"])
+@token_required
+def auto_assign_mechanic(ticket_id):
+    """
+    Assign the least-loaded mechanic to a service ticket (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Picks the mechanic with the fewest open tickets and assigns them.
+    description: Open-ticket counts per mechanic are kept in memory in a priority queue, so the choice does not scan the mechanics or their tickets. Ties go to the lowest mechanic ID. The ticket status is set to 'Assigned'.
+    security:
+      - token: []
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+        description: The ID of the service ticket.
+    responses:
+      200:
+        description: Mechanic assigned.
+        examples:
+          application/json:
+            ticket_id: 101
+            mechanic_id: 3
+      403:
+        description: Unauthorized to perform this action.
+      404:
+        description: Service ticket not found.
+      409:
+        description: The ticket already has a mechanic, is closed, or was changed by another request.
+      503:
+        description: There are no mechanics to assign.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    ticket = db.session.get(ServiceTickets, ticket_id)
+    if ticket is None:
+        return jsonify({"message": "Service Ticket not found."}), 404
+    if ticket.mechanic:
+        return jsonify({"message": f"Service Ticket ID {ticket_id} already has a mechanic assigned."}), 409
+    if ticket.status not in OPEN_TICKET_STATUSES:
+        return jsonify({"message": f"Service Ticket ID {ticket_id} is {ticket.status}."}), 409
+
+    mechanic = reserve_assignment(ticket)
+    if mechanic is None:
+        return jsonify({"message": "No mechanics available."}), 503
+    ticket.mechanic.append(mechanic)
+    ticket.status = "Assigned"
+    emit("mechanic.assigned", {"ticket_id": ticket.id, "mechanic_id": mechanic.id})
+
+    try:
+        db.session.commit()
+    except StaleDataError:
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+    return set_etag(jsonify({"ticket_id": ticket_id, "mechanic_id": mechanic.id}), ticket), 200
+
+
+@service_tickets_bp.route("/auto-assign", methods=["POST"])
+@token_required
+def auto_assign_mechanics():
+    """
+    Auto-assign mechanics to several service tickets (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Spreads a list of tickets over the least-loaded mechanics in one transaction.
+    description: Tickets are assigned in the order given, each to the mechanic with the fewest open tickets at that moment (counting the assignments made earlier in the same call). Tickets that already have a mechanic or are closed are skipped.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [ticket_ids]
+          properties:
+            ticket_ids:
+              type: array
+              items:
+                type: integer
+    responses:
+      200:
+        description: Assignments made and tickets skipped.
+        examples:
+          application/json:
+            assigned: [{"ticket_id": 101, "mechanic_id": 3}, {"ticket_id": 102, "mechanic_id": 4}]
+            skipped: [{"ticket_id": 103, "reason": "already assigned"}]
+      400:
+        description: Invalid ticket list.
+      403:
+        description: Unauthorized to perform this action.
+      409:
+        description: A ticket was changed by another request; nothing was assigned.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    try:
+        data = auto_assign_batch_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    ticket_ids = list(dict.fromkeys(data["ticket_ids"]))
+    tickets = {ticket.id: ticket for ticket in db.session.scalars(
+        select(ServiceTickets).where(ServiceTickets.id.in_(ticket_ids)).options(selectinload(ServiceTickets.mechanic))
+    )}
+
+    assigned, skipped = [], []
+    for ticket_id in ticket_ids:
+        ticket = tickets.get(ticket_id)
+        if ticket is None:
+            skipped.append({"ticket_id": ticket_id, "reason": "not found"})
+        elif ticket.mechanic:
+            skipped.append({"ticket_id": ticket_id, "reason": "already assigned"})
+        elif ticket.status not in OPEN_TICKET_STATUSES:
+            skipped.append({"ticket_id": ticket_id, "reason": f"ticket is {ticket.status}"})
+        else:
+            mechanic = reserve_assignment(ticket)
+            if mechanic is None:
+                skipped.append({"ticket_id": ticket_id, "reason": "no mechanics available"})
+                continue
+            ticket.mechanic.append(mechanic)
+            ticket.status = "Assigned"
+            emit("mechanic.assigned", {"ticket_id": ticket.id, "mechanic_id": mechanic.id})
+            assigned.append({"ticket_id": ticket_id, "mechanic_id": mechanic.id})
+
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"message": "A ticket was modified by another request. Nothing was assigned."}), 409
+    return jsonify({"assigned": assigned, "skipped": skipped}), 200
+
 
 @service_tickets_bp.route('/<int:ticket_id>/remove-mechanic/<int:mechanic_id>', methods=['PUT'])
 @token_required
@@ -187,8 +380,8 @@ def remove_mechanic(ticket_id, mechanic_id):
     if mechanic is None:
         return jsonify({"message": "Mechanic not found."}), 404
     
-    # Ensure mechanic is in the list before trying to remove to prevent ValueError
-    if mechanic in ticket.mechanic:
+    # EXISTS on the association key instead of loading the assignments
+    if is_assigned(ticket.id, mechanic.id):
         ticket.mechanic.remove(mechanic)
         db.session.commit()
         return jsonify({"message": f"Mechanic ID {mechanic_id} removed from Service Ticket ID {ticket_id} successfully."}), 200
@@ -219,6 +412,11 @@ def update_ticket_status(ticket_id):
         name: body
         schema:
           $ref: '#/definitions/TicketStatusUpdatePayload'
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The ticket's ETag (its version_id). The request is rejected with 409 if the ticket has changed since.
     responses:
       200:
         description: Ticket status successfully updated.
@@ -230,6 +428,8 @@ def update_ticket_status(ticket_id):
         description: User is not authorized (Not a Mechanic or Manager).
       404:
         description: Service ticket not found.
+      409:
+        description: The ticket was changed by another request; the body carries its current state.
     """
     # Check authorization (Mechanic or Manager)
     if request.role not in ["mechanic", "manager"]:
@@ -238,6 +438,8 @@ def update_ticket_status(ticket_id):
     ticket = db.session.get(ServiceTickets, ticket_id)
     if not ticket:
         return jsonify({"message": "Service ticket not found."}), 404
+    if if_match_failed(ticket):
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
 
     try:
         data = request.json
@@ -248,23 +450,22 @@ def update_ticket_status(ticket_id):
             return jsonify({"message": f"Invalid or missing status. Allowed values are: {', '.join(ALLOWED_STATUSES)}"}), 400
 
         # --- FINAL PRICE CALCULATION LOGIC ---
+        # Parts cost + flat labor; the analytics update is queued on the outbox
         if new_status == "Complete" and ticket.status != "Complete":
-            # 1. Calculate total cost of parts attached to the ticket
-            # Assuming 'Part' model has a 'price' attribute
-            total_parts_cost = sum(part.price for part in ticket.parts)
-            
-            # 2. Calculate final price
-            final_price = total_parts_cost + FLAT_LABOR_CHARGE
-
-            # 3. Update the ticket price
-            ticket.price = final_price
+            complete_ticket(ticket)
+        elif new_status == "Cancelled" and ticket.status != "Cancelled":
+            # Give held stock back
+            release_ticket_reservations(ticket)
             
         # Update the status
         ticket.status = new_status
         db.session.commit()
 
-        return service_ticket_schema.jsonify(ticket), 200
+        return set_etag(service_ticket_schema.jsonify(ticket), ticket), 200
 
+    except StaleDataError:
+        # Someone else updated the ticket between our read and this write
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
     except Exception as e:
         # A specific error could be raised if 'part.price' is None or not a number, 
         # but catching the general exception protects the transaction.
@@ -273,6 +474,151 @@ def update_ticket_status(ticket_id):
         return jsonify({"message": "An error occurred during status update."}), 500
 
 
+@service_tickets_bp.route("/<int:ticket_id>/batch", methods=["POST"])
+@token_required
+def batch_ticket_operations(ticket_id):
+    """
+    Apply several operations to a service ticket at once (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Assigns/removes mechanics, adds parts and sets the status in one call.
+    description: Operations are applied in order in a single transaction; if any of them fails nothing is saved. All referenced mechanics and parts are looked up with one query each.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+        description: The ID of the service ticket.
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [operations]
+          properties:
+            operations:
+              type: array
+              items:
+                $ref: '#/definitions/TicketBatchOperation'
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The ticket's ETag (its version_id). The request is rejected with 409 if the ticket has changed since.
+    responses:
+      200:
+        description: All operations applied; returns the final ticket.
+        schema:
+          $ref: '#/definitions/ServiceTicketResponse'
+      400:
+        description: Invalid operation list.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: The ticket, or a mechanic or part referenced by an operation, was not found.
+      409:
+        description: A part is already installed, or the ticket was changed by another request.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    try:
+        data = ticket_batch_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    ticket = db.session.get(ServiceTickets, ticket_id)
+    if ticket is None:
+        return jsonify({"message": "Service ticket not found."}), 404
+    if if_match_failed(ticket):
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+
+    try:
+        apply_batches([(ticket_id, data["operations"])])
+        db.session.commit()
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+    except StaleDataError:
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+
+    return set_etag(service_ticket_schema.jsonify(ticket), ticket), 200
+
+
+@service_tickets_bp.route("/batch", methods=["POST"])
+@token_required
+def batch_multi_ticket_operations():
+    """
+    Apply operations to several service tickets at once (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Batch operations across multiple tickets in one transaction.
+    description: Each entry names a ticket and its ordered operations. Everything is applied in one transaction; if any operation fails nothing is saved. Tickets, mechanics and parts are each looked up with a single query.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [tickets]
+          properties:
+            tickets:
+              type: array
+              items:
+                type: object
+                required: [ticket_id, operations]
+                properties:
+                  ticket_id:
+                    type: integer
+                  operations:
+                    type: array
+                    items:
+                      $ref: '#/definitions/TicketBatchOperation'
+    responses:
+      200:
+        description: All operations applied; returns the final tickets in request order.
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/ServiceTicketResponse'
+      400:
+        description: Invalid operation list.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: A ticket, mechanic or part was not found.
+      409:
+        description: A part is already installed, or a ticket was changed by another request.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "You are not a manager."}), 403
+    try:
+        data = multi_ticket_batch_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    batches = [(item["ticket_id"], item["operations"]) for item in data["tickets"]]
+    try:
+        tickets = apply_batches(batches)
+        db.session.commit()
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"message": "A ticket or part was modified by another request. Nothing was applied."}), 409
+
+    ordered_ids = list(dict.fromkeys(ticket_id for ticket_id, _ in batches))
+    return service_tickets_schema.jsonify([tickets[ticket_id] for ticket_id in ordered_ids]), 200
+
+
 @service_tickets_bp.route("/", methods=['GET'])
 @token_required
 def read_service_tickets():
@@ -282,9 +628,30 @@ def read_service_tickets():
     tags:
       - service_tickets
     summary: Retrieves a list of all service tickets.
-    description: This route returns a list of all existing service tickets.
+    description: This route returns a list of service tickets, optionally filtered, sorted and narrowed to selected fields in the database.
     security:
       - token: []
+    parameters:
+      - name: filter[<field>][<op>]
+        in: query
+        type: string
+        required: false
+        description: "Filter on an indexed field (id, customer_id, service_date, price, status, priority). Operators: eq (default), ne, gt, gte, lt, lte, in (comma separated). e.g. filter[service_date][gte]=2026-01-01"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma separated fields to sort by, prefix with - for descending. e.g. -price,id"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma separated list of fields to return; only those columns are loaded.
+      - name: include
+        in: query
+        type: string
+        required: false
+        description: "Comma separated related objects to embed: customer, mechanics, parts, parts.inventory_description. The whole graph is loaded in a fixed number of queries."
     responses:
       200:
         description: A list of service tickets.
@@ -292,9 +659,178 @@ def read_service_tickets():
           type: array
           items:
             $ref: '#/definitions/ServiceTicketResponse'
+      400:
+        description: Invalid filter, sort or fields parameter.
+    """
+    try:
+        query, schema = apply_list_params(ServiceTickets, request.args, service_tickets_schema)
+        includes = parse_includes(request.args.get("include"))
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
+    service_tickets = db.session.scalars(query.options(*include_options(includes))).unique().all()
+    return jsonify([
+        dump_included(ticket, result, includes) for ticket, result in zip(service_tickets, schema.dump(service_tickets))
+    ]), 200
+
+@service_tickets_bp.route("/search", methods=['GET'])
+@token_required
+def search_service_tickets():
+    """
+    Search service tickets
+    ---
+    tags:
+      - service_tickets
+    summary: Full-text search over ticket descriptions and VINs.
+    description: Returns service tickets ranked by relevance, e.g. q=brake squeal 2019 Civic. Backed by a full-text index (FTS5 on SQLite, tsvector/GIN on Postgres).
+    security:
+      - token: []
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Search text. All words must match; the last word also matches as a prefix.
+      - name: page
+        in: query
+        type: integer
+        default: 1
+        description: The page number to retrieve.
+      - name: per_page
+        in: query
+        type: integer
+        default: 20
+        description: Number of results per page (max 100).
+    responses:
+      200:
+        description: One page of ranked results.
+        examples:
+          application/json:
+            page: 1
+            per_page: 20
+            results: [{"id": 7, "vin": "1HGCM82633A004352", "service_description": "Brake squeal on 2019 Civic", "rank": 4.2}]
+      400:
+        description: Missing search text or invalid paging parameters.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"message": "q is required."}), 400
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = parse_limit(request.args.get("per_page"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    if page < 1:
+        return jsonify({"message": "page must be at least 1."}), 400
+
+    results = []
+    for ticket, rank in search_models(ServiceTickets, "service_tickets", query, page, per_page):
+        result = service_ticket_schema.dump(ticket)
+        result["rank"] = rank
+        results.append(result)
+
+    return jsonify({"page": page, "per_page": per_page, "results": results}), 200
+
+@service_tickets_bp.route("/by-vin/<string:vin>", methods=['GET'])
+@token_required
+def read_vehicle_history(vin):
+    """
+    Get a vehicle's service history
+    ---
+    tags:
+      - service_tickets
+    summary: Retrieves every service ticket for one VIN, oldest first.
+    description: The VIN is normalized (uppercased, spaces and dashes removed) before the lookup, which is a single range scan on the VIN index of the live and of the archive table. Archived tickets are included and marked with archived true.
+    security:
+      - token: []
+    parameters:
+      - name: vin
+        in: path
+        type: string
+        required: true
+        description: The vehicle identification number.
+    responses:
+      200:
+        description: The vehicle's service tickets (empty if the vehicle has never been serviced).
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/ServiceTicketResponse'
+      400:
+        description: The VIN contains no letters or digits.
     """
-    service_tickets = db.session.query(ServiceTickets).all()
-    return service_tickets_schema.jsonify(service_tickets), 200
+    vin = normalize_vin(vin)
+    if not vin:
+        return jsonify({"message": "Invalid VIN."}), 400
+
+    tickets = db.session.scalars(
+        select(ServiceTickets).where(ServiceTickets.vin == vin).order_by(ServiceTickets.service_date, ServiceTickets.id)
+    ).all()
+    archived = db.session.scalars(
+        select(ArchivedServiceTicket).where(ArchivedServiceTicket.vin == vin)
+    ).all()
+    # Archived tickets are the older ones, but merge by date anyway (ids are shared)
+    history = sorted(
+        archived_tickets_schema.dump(archived) + service_tickets_schema.dump(tickets),
+        key=lambda ticket: (ticket["service_date"], ticket["id"])
+    )
+    return jsonify(history), 200
+
+@service_tickets_bp.route("/by-vin", methods=['GET'])
+@token_required
+def search_vins():
+    """
+    Find vehicles by partial VIN
+    ---
+    tags:
+      - service_tickets
+    summary: Lists known VINs starting with a prefix (autocomplete).
+    description: For partial VINs read off a windshield. Returns matching VINs in sorted order; use /service-tickets/by-vin/{vin} for a vehicle's history.
+    security:
+      - token: []
+    parameters:
+      - name: vin_prefix
+        in: query
+        type: string
+        required: true
+        description: The start of the VIN, e.g. 1HGCM.
+      - name: limit
+        in: query
+        type: integer
+        default: 20
+        description: Maximum number of VINs to return (max 100).
+    responses:
+      200:
+        description: Matching VINs.
+        examples:
+          application/json:
+            vin_prefix: "1HGCM"
+            vins: ["1HGCM82633A004352", "1HGCM82633A004353"]
+      400:
+        description: Missing or invalid vin_prefix or limit.
+    """
+    prefix = normalize_vin(request.args.get("vin_prefix", ""))
+    if not prefix:
+        return jsonify({"message": "vin_prefix is required."}), 400
+    try:
+        limit = parse_limit(request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    index = get_vin_prefix_index()
+    if index is not None:
+        vins = index.search(prefix, limit)
+    else:
+        upper = vin_prefix_upper_bound(prefix)
+        # UNION drops the duplicates; archived vehicles are still known vehicles
+        vins = union(
+            select(ServiceTickets.vin).where(ServiceTickets.vin >= prefix, ServiceTickets.vin < upper),
+            select(ArchivedServiceTicket.vin).where(ArchivedServiceTicket.vin >= prefix,
+                                                    ArchivedServiceTicket.vin < upper)
+        ).subquery()
+        vins = db.session.scalars(select(vins.c.vin).order_by(vins.c.vin).limit(limit)).all()
+
+    return jsonify({"vin_prefix": prefix, "vins": vins}), 200
 
 @service_tickets_bp.route("/<int:ticket_id>", methods=['GET'])
 @token_required
@@ -305,7 +841,7 @@ def read_single_service_ticket(ticket_id):
     tags:
       - service_tickets
     summary: Retrieves a single service ticket by its ID.
-    description: This route returns details for a specific service ticket.
+    description: This route returns details for a specific service ticket. Tickets moved to the archive are returned from there, read-only, with "archived" set and their mechanics and parts as recorded when they were archived (include is ignored for them).
     security:
       - token: []
     parameters:
@@ -314,29 +850,54 @@ def read_single_service_ticket(ticket_id):
         type: integer
         required: true
         description: The ID of the service ticket to retrieve.
+      - name: include
+        in: query
+        type: string
+        required: false
+        description: "Comma separated related objects to embed: customer, mechanics, parts, parts.inventory_description. The whole graph is loaded in a fixed number of queries."
     responses:
       200:
         description: Service ticket found.
         schema:
           $ref: '#/definitions/ServiceTicketResponse'
+        headers:
+          ETag:
+            type: string
+            description: The ticket's version; send it back in If-Match on updates.
+      304:
+        description: The ticket still matches the If-None-Match ETag.
+      400:
+        description: Unknown include.
       404:
         description: Service ticket not found.
     """
-    ticket = db.session.get(ServiceTickets, ticket_id)
+    try:
+        includes = parse_includes(request.args.get("include"))
+    except QueryParamError as e:
+        return jsonify({"message": str(e)}), 400
+
+    ticket = db.session.scalars(
+        select(ServiceTickets).where(ServiceTickets.id == ticket_id).options(*include_options(includes))
+    ).first()
     if not ticket:
-        return jsonify({"message": "Service ticket not found"}), 404
-    return service_ticket_schema.jsonify(ticket), 200
+        archived = db.session.get(ArchivedServiceTicket, ticket_id)
+        if archived is None:
+            return jsonify({"message": "Service ticket not found"}), 404
+        return archived_ticket_schema.jsonify(archived), 200
+    response = jsonify(dump_included(ticket, service_ticket_schema.dump(ticket), includes))
+    return set_etag(response, ticket).make_conditional(request)
 
 @service_tickets_bp.route("/<int:ticket_id>/add-part/<int:part_id>", methods=['PUT'])
 @token_required
+@idempotent
 def add_part_to_ticket(ticket_id, part_id):
     """
     Add a part to a service ticket (Manager Only)
     ---
     tags:
       - service_tickets
-    summary: Adds a physical part to a service ticket and decrements inventory.
-    description: A manager uses this route to associate a part with a ticket. The part's inventory count is decremented automatically.
+    summary: Installs an in-stock physical part on a service ticket.
+    description: A manager uses this route to associate a part with a ticket. A physical part is in stock until it is installed on a ticket; two requests racing for the same part cannot both win.
     security:
       - token: []
     parameters:
@@ -350,15 +911,25 @@ def add_part_to_ticket(ticket_id, part_id):
         type: integer
         required: true
         description: The ID of the physical part to add.
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Unique key per logical request. Retries with the same key replay the first response instead of running again.
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: The ticket's ETag (its version_id). The request is rejected with 409 if the ticket has changed since.
     responses:
       200:
         description: Part added successfully and inventory updated.
-      400:
-        description: Part is out of stock.
       403:
         description: Unauthorized to add a part.
       404:
         description: Service Ticket or Part not found.
+      409:
+        description: The part is already installed on a ticket (or the ticket changed); the body carries the current state.
     """
     if request.role != "manager":
         return jsonify({"message": "Unauthorized to add a part to this ticket. Must be a manager."}), 403
@@ -367,20 +938,28 @@ def add_part_to_ticket(ticket_id, part_id):
     if not ticket:
         return jsonify({"message": "Service Ticket not found."}), 404
     
+    if if_match_failed(ticket):
+        return conflict_response(ServiceTickets, ticket_id, service_ticket_schema)
+    
     part = db.session.get(Part, part_id)
     if not part:
         return jsonify({"message": "Part not found."}), 404
     
-    # Check inventory before adding
-    # Assuming the Part model has an 'inventory_count' attribute
-    if part.inventory_count <= 0: 
-        return jsonify({"message": f"Part ID {part_id} is out of stock."}), 400
+    # A physical part is in stock until it is installed on a ticket
+    if part.ticket_id is not None:
+        return conflict_response(Part, part_id, part_schema, f"Part ID {part_id} is already installed on a ticket.")
+    if blocking_hold(part, ticket):
+        return conflict_response(Part, part_id, part_schema, f"Part ID {part_id} is reserved for another ticket.")
         
-    ticket.parts.append(part)
-    part.inventory_count -= 1 # Crucial inventory decrement
+    # The part's version_id makes this a conditional UPDATE: if another request
+    # installed the same part since we read it, no row matches and we get a 409.
+    install_part(part, ticket)
     
-    db.session.commit()
-    return jsonify({"message": f"Successfully added part {part_id} to service ticket {ticket_id}. Inventory count decremented."}), 200
+    try:
+        db.session.commit()
+    except StaleDataError:
+        return conflict_response(Part, part_id, part_schema, f"Part ID {part_id} was taken by another request.")
+    return jsonify({"message": f"Successfully added part {part_id} to service ticket {ticket_id}."}), 200
 
 @service_tickets_bp.route("/<int:ticket_id>/parts", methods=['GET'])
 @token_required
@@ -391,7 +970,7 @@ def read_ticket_parts(ticket_id):
     tags:
       - service_tickets
     summary: Retrieves all parts associated with a service ticket.
-    description: This route returns a list of all physical parts that have been added to a specific service ticket.
+    description: This route returns a list of all physical parts that have been added to a specific service ticket. For an archived ticket the parts come from its archive snapshot.
     security:
       - token: []
     parameters:
@@ -412,17 +991,236 @@ def read_ticket_parts(ticket_id):
     """
     ticket = db.session.get(ServiceTickets, ticket_id)
     if not ticket:
-        return jsonify({"message": "Service ticket not found."}), 404
+        archived = db.session.get(ArchivedServiceTicket, ticket_id)
+        if archived is None:
+            return jsonify({"message": "Service ticket not found."}), 404
+        return jsonify([{"part_id": part["id"], "description": part["name"]} for part in archived.parts]), 200
 
-    # FIX: Added a check for part.inventory_description existence to prevent an AttributeError
-    # (a common "pointer error" when a relationship isn't properly loaded or is NULL).
+    # Names come from the in-process parts catalog, not a join per request
+    catalog = part_catalog()
     parts_list = [
         {
-            "part_id": part.id, 
-            "description": part.inventory_description.name if part.inventory_description else "Description N/A"
+            "part_id": part_id,
+            "description": catalog[desc_id].name if desc_id in catalog else "Description N/A"
         }
-        for part in ticket.parts
+        for part_id, desc_id in db.session.execute(
+            select(Part.id, Part.desc_id).where(Part.ticket_id == ticket_id).order_by(Part.id))
     ]
     
     return jsonify(parts_list), 200
 
+
+# --- Part reservations ---
+
+def _ticket_reservation(ticket_id, reservation_id):
+    reservation = db.session.get(PartReservation, reservation_id)
+    if reservation is None or reservation.ticket_id != ticket_id:
+        return None
+    return reservation
+
+
+@service_tickets_bp.route("/<int:ticket_id>/reservations", methods=["POST"])
+@token_required
+@idempotent
+def reserve_parts(ticket_id):
+    """
+    Reserve parts for a service ticket (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Places a time-limited hold on N in-stock units of a part description.
+    description: The held units can't be reserved or installed by any other ticket until the hold is fulfilled, released or expires. Completing the ticket installs every live hold. Concurrent reservations for the same part never receive the same unit.
+    security:
+      - token: []
+    consumes:
+      - application/json
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        schema:
+          type: object
+          required: [desc_id]
+          properties:
+            desc_id:
+              type: integer
+              description: The inventory part description to reserve units of.
+            quantity:
+              type: integer
+              default: 1
+            ttl_minutes:
+              type: integer
+              description: How long to hold the units (defaults to RESERVATION_TTL_MINUTES).
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Unique key per logical request. Retries with the same key replay the first response instead of running again.
+    responses:
+      201:
+        description: Units held; the body lists them and the expiry time (UTC).
+      400:
+        description: Invalid data.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Service ticket or part description not found.
+      409:
+        description: Not enough free stock, or the ticket is closed.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to reserve parts. Must be a manager."}), 403
+    ticket = db.session.get(ServiceTickets, ticket_id)
+    if not ticket:
+        return jsonify({"message": "Service ticket not found."}), 404
+    if ticket.status not in OPEN_TICKET_STATUSES:
+        return jsonify({"message": f"Service ticket {ticket_id} is {ticket.status}."}), 409
+    try:
+        data = reservation_payload_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    ttl_minutes = min(data.get("ttl_minutes", current_app.config["RESERVATION_TTL_MINUTES"]),
+                      current_app.config["RESERVATION_MAX_TTL_MINUTES"])
+    try:
+        reservation = reserve(ticket, data["desc_id"], data["quantity"], timedelta(minutes=ttl_minutes))
+        db.session.commit()
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({"message": e.message}), e.status_code
+    except StaleDataError:
+        # A unit was claimed by a concurrent request between our read and write
+        db.session.rollback()
+        return jsonify({"message": "The stock changed while reserving; try again."}), 409
+    return part_reservation_schema.jsonify(reservation), 201
+
+
+@service_tickets_bp.route("/<int:ticket_id>/reservations", methods=["GET"])
+@token_required
+def read_ticket_reservations(ticket_id):
+    """
+    List a service ticket's part reservations
+    ---
+    tags:
+      - service_tickets
+    summary: All reservations of a ticket, newest first.
+    description: A reservation with status 'held' and an expires_at in the past has lapsed; its units are free again.
+    security:
+      - token: []
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Reservations.
+      404:
+        description: Service ticket not found.
+    """
+    ticket = db.session.scalars(
+        select(ServiceTickets).where(ServiceTickets.id == ticket_id)
+        .options(selectinload(ServiceTickets.reservations).selectinload(PartReservation.parts))
+    ).first()
+    if not ticket:
+        return jsonify({"message": "Service ticket not found."}), 404
+    reservations = sorted(ticket.reservations, key=lambda reservation: reservation.id, reverse=True)
+    return part_reservations_schema.jsonify(reservations), 200
+
+
+@service_tickets_bp.route("/<int:ticket_id>/reservations/<int:reservation_id>/fulfill", methods=["POST"])
+@token_required
+def fulfill_reservation(ticket_id, reservation_id):
+    """
+    Install reserved parts (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Turns a live hold into parts installed on the ticket.
+    security:
+      - token: []
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+      - name: reservation_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Units installed; the body lists their ids.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Reservation not found on this ticket.
+      409:
+        description: The reservation has expired or was already fulfilled or released.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to install parts. Must be a manager."}), 403
+    reservation = _ticket_reservation(ticket_id, reservation_id)
+    if reservation is None:
+        return jsonify({"message": "Reservation not found."}), 404
+    try:
+        installed = fulfill(reservation, reservation.ticket)
+        db.session.commit()
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({"message": e.message}), e.status_code
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"message": "The reservation changed while installing; try again."}), 409
+    return jsonify({"message": f"Installed {len(installed)} part(s) on service ticket {ticket_id}.",
+                    "part_ids": [part.id for part in installed]}), 200
+
+
+@service_tickets_bp.route("/<int:ticket_id>/reservations/<int:reservation_id>", methods=["DELETE"])
+@token_required
+def release_reservation(ticket_id, reservation_id):
+    """
+    Release a part reservation (Manager Only)
+    ---
+    tags:
+      - service_tickets
+    summary: Ends a hold early and returns its units to stock.
+    security:
+      - token: []
+    parameters:
+      - name: ticket_id
+        in: path
+        type: integer
+        required: true
+      - name: reservation_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Reservation released.
+      403:
+        description: Unauthorized. Must be a manager.
+      404:
+        description: Reservation not found on this ticket.
+      409:
+        description: The reservation was already fulfilled.
+    """
+    if request.role != "manager":
+        return jsonify({"message": "Unauthorized to release parts. Must be a manager."}), 403
+    reservation = _ticket_reservation(ticket_id, reservation_id)
+    if reservation is None:
+        return jsonify({"message": "Reservation not found."}), 404
+    if reservation.status == "fulfilled":
+        return jsonify({"message": f"Reservation ID {reservation_id} was already fulfilled."}), 409
+    if reservation.status == "held":
+        release(reservation)
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return jsonify({"message": "The reservation changed while releasing; try again."}), 409
+    return part_reservation_schema.jsonify(reservation), 200
@@ -1,12 +1,91 @@
+from marshmallow import fields, validate, validates_schema, ValidationError
 from app.extensions import ma
-from app.models import ServiceTickets
+from app.models import ServiceTickets, ArchivedServiceTicket, PartReservation, TICKET_STATUSES
 from app.blueprints.mechanics.schemas import MechanicSchema
 
 class ServiceTicketSchema(ma.SQLAlchemyAutoSchema):
     mechanics = ma.Nested(MechanicSchema, many=True)
+    status = ma.auto_field(validate=validate.OneOf(TICKET_STATUSES))
+    priority = ma.auto_field(validate=validate.Range(min=0))
     class Meta:
         model = ServiceTickets
         include_fk = True
+        dump_only = ("version_id",)
 
 service_ticket_schema = ServiceTicketSchema()
-service_tickets_schema = ServiceTicketSchema(many=True)
\ No newline at end of file
+service_tickets_schema = ServiceTicketSchema(many=True)
+# New tickets start out Pending at the default priority; status only moves
+# through the status/batch routes so completion always runs complete_ticket.
+new_service_ticket_schema = ServiceTicketSchema(dump_only=("version_id", "status", "priority"))
+
+class ArchivedServiceTicketSchema(ma.SQLAlchemyAutoSchema):
+    archived = fields.Constant(True, dump_only=True)
+    class Meta:
+        model = ArchivedServiceTicket
+        include_fk = True
+
+archived_ticket_schema = ArchivedServiceTicketSchema()
+archived_tickets_schema = ArchivedServiceTicketSchema(many=True)
+
+# --- Batch operations ---
+
+BATCH_OPERATIONS = {
+    "assign_mechanic": "mechanic_id",
+    "remove_mechanic": "mechanic_id",
+    "add_part": "part_id",
+    "set_status": "status",
+}
+
+class BatchOperationSchema(ma.Schema):
+    op = fields.String(required=True, validate=validate.OneOf(list(BATCH_OPERATIONS)))
+    mechanic_id = fields.Integer()
+    part_id = fields.Integer()
+    status = fields.String(validate=validate.OneOf(TICKET_STATUSES))
+
+    @validates_schema
+    def validate_arguments(self, data, **kwargs):
+        argument = BATCH_OPERATIONS.get(data.get("op"))
+        if argument and data.get(argument) is None:
+            raise ValidationError(f"'{data['op']}' requires {argument}.", argument)
+
+class TicketBatchSchema(ma.Schema):
+    operations = fields.List(fields.Nested(BatchOperationSchema), required=True,
+                             validate=validate.Length(min=1, max=100))
+
+class MultiTicketBatchItemSchema(TicketBatchSchema):
+    ticket_id = fields.Integer(required=True)
+
+class MultiTicketBatchSchema(ma.Schema):
+    tickets = fields.List(fields.Nested(MultiTicketBatchItemSchema), required=True,
+                          validate=validate.Length(min=1, max=50))
+
+ticket_batch_schema = TicketBatchSchema()
+multi_ticket_batch_schema = MultiTicketBatchSchema()
+
+class AutoAssignBatchSchema(ma.Schema):
+    ticket_ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1, max=500))
+
+auto_assign_batch_schema = AutoAssignBatchSchema()
+
+
+# --- Part reservations ---
+
+class PartReservationSchema(ma.SQLAlchemyAutoSchema):
+    part_ids = fields.Method("get_part_ids", dump_only=True)
+
+    class Meta:
+        model = PartReservation
+        include_fk = True
+
+    def get_part_ids(self, reservation):
+        return sorted(part.id for part in reservation.parts)
+
+part_reservation_schema = PartReservationSchema()
+part_reservations_schema = PartReservationSchema(many=True)
+
+class ReservationPayloadSchema(ma.Schema):
+    desc_id = fields.Integer(required=True)
+    quantity = fields.Integer(load_default=1, validate=validate.Range(min=1, max=100))
+    ttl_minutes = fields.Integer(validate=validate.Range(min=1))
+
+reservation_payload_schema = ReservationPayloadSchema()
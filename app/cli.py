@@ -0,0 +1,192 @@
+import click
+from flask.cli import AppGroup
+
+# Maintenance commands, registered on the app in create_app().
+# Run with e.g. `flask --app flask_app search rebuild`.
+
+search_cli = AppGroup("search", help="Full-text search index maintenance.")
+
+
+@search_cli.command("rebuild")
+def rebuild_search():
+    """Create missing search indexes and backfill them from existing rows."""
+    from app.util.search import rebuild_search_indexes
+
+    rebuild_search_indexes()
+    click.echo("Search indexes rebuilt.")
+
+
+analytics_cli = AppGroup("analytics", help="Analytics rollup maintenance.")
+
+
+@analytics_cli.command("rebuild")
+def rebuild_analytics():
+    """Recompute all ticket rollups from completed tickets."""
+    from app.blueprints.analytics.rollups import rebuild_rollups
+
+    rows = rebuild_rollups()
+    click.echo(f"Rebuilt {rows} rollup rows.")
+
+
+export_cli = AppGroup("export", help="Columnar (Parquet/Arrow) bulk export.")
+
+
+@export_cli.command("run")
+@click.option("--out-dir", default="exports", show_default=True, help="Directory to write the files to.")
+@click.option("--format", "format_", type=click.Choice(["parquet", "arrow"]), default="parquet", show_default=True)
+@click.option("--dataset", "datasets", multiple=True,
+              help="Dataset to export (repeatable). Defaults to all of them.")
+@click.option("--chunk-size", default=10000, show_default=True, help="Rows fetched and converted per batch.")
+def run_export(out_dir, format_, datasets, chunk_size):
+    """Export tickets, parts, customers and association tables."""
+    from app.util.export import export_all, DATASETS
+
+    unknown = set(datasets) - set(DATASETS)
+    if unknown:
+        raise click.BadParameter(f"unknown dataset(s): {', '.join(sorted(unknown))}", param_hint="--dataset")
+
+    counts = export_all(out_dir, format_, datasets or DATASETS, chunk_size)
+    for name, rows in counts.items():
+        click.echo(f"{name}: {rows} rows")
+
+
+import_cli = AppGroup("import", help="Bulk import of legacy shop data.")
+
+
+@import_cli.command("run")
+@click.option("--customers", type=click.Path(exists=True, dir_okay=False), help="Customers CSV/NDJSON file.")
+@click.option("--part-descriptions", type=click.Path(exists=True, dir_okay=False),
+              help="Inventory part descriptions CSV/NDJSON file.")
+@click.option("--tickets", type=click.Path(exists=True, dir_okay=False), help="Service tickets CSV/NDJSON file.")
+@click.option("--parts", type=click.Path(exists=True, dir_okay=False), help="Physical parts CSV/NDJSON file.")
+@click.option("--batch-size", default=1000, show_default=True, help="Records validated and inserted per transaction.")
+@click.option("--workers", type=int, default=None, help="Password hashing processes (default: CPU count).")
+@click.option("--checkpoint", type=click.Path(dir_okay=False), default=None,
+              help="Checkpoint file; an existing one resumes the import where it stopped.")
+@click.option("--rejects", type=click.Path(dir_okay=False), default=None,
+              help="Append rejected records and their errors to this NDJSON file.")
+@click.option("--passwords-hashed", is_flag=True, help="Customer passwords in the source are already hashed.")
+def run_import(customers, part_descriptions, tickets, parts, batch_size, workers, checkpoint, rejects,
+               passwords_hashed):
+    """Stream records in, validate them in batches and bulk-insert them."""
+    from app.util.importer import BulkImporter
+
+    sources = {name: path for name, path in [("customers", customers), ("part_descriptions", part_descriptions),
+                                             ("tickets", tickets), ("parts", parts)] if path}
+    if not sources:
+        raise click.UsageError("Nothing to import; pass at least one input file.")
+
+    importer = BulkImporter(batch_size=batch_size, workers=workers, checkpoint_path=checkpoint,
+                            rejects_path=rejects, passwords_hashed=passwords_hashed, echo=click.echo)
+    for name, counts in importer.run(sources).items():
+        click.echo(f"{name}: {counts['imported']} imported, {counts['rejected']} rejected")
+
+
+outbox_cli = AppGroup("outbox", help="Transactional outbox worker.")
+
+
+@outbox_cli.command("run")
+@click.option("--batch-size", default=100, show_default=True, help="Events claimed per transaction.")
+@click.option("--poll-interval", default=1.0, show_default=True, help="Seconds to sleep when the outbox is empty.")
+@click.option("--once", is_flag=True, help="Exit once the outbox is drained instead of polling forever.")
+def run_outbox(batch_size, poll_interval, once):
+    """Deliver pending events to their handlers (safe to run several at once)."""
+    from app.util.outbox import run_worker
+
+    delivered = run_worker(batch_size=batch_size, poll_interval=poll_interval, once=once)
+    click.echo(f"Processed {delivered} events.")
+
+
+@outbox_cli.command("prune")
+@click.option("--days", default=7, show_default=True, help="Delete events processed more than this many days ago.")
+def prune_outbox(days):
+    """Delete old processed events."""
+    from datetime import timedelta
+    from app.util.outbox import prune
+
+    click.echo(f"Deleted {prune(timedelta(days=days))} events.")
+
+
+reservations_cli = AppGroup("reservations", help="Part reservation maintenance.")
+
+
+@reservations_cli.command("sweep")
+@click.option("--batch-size", default=500, show_default=True, help="Reservations expired per transaction.")
+def sweep_reservations(batch_size):
+    """Mark lapsed holds expired and return their parts to stock (run from cron)."""
+    from app.util.reservations import sweep_expired
+
+    click.echo(f"Expired {sweep_expired(batch_size)} reservations.")
+
+
+reorder_cli = AppGroup("reorder", help="Low-stock reorder suggestions.")
+
+
+@reorder_cli.command("compute")
+def compute_reorder():
+    """Recompute reorder suggestions from recent consumption (run from cron)."""
+    from app.blueprints.parts.reorder import compute_suggestions, ReorderUnavailable
+
+    try:
+        count = compute_suggestions()
+    except ReorderUnavailable as e:
+        raise click.ClickException(str(e))
+    click.echo(f"{count} part types need reordering.")
+
+
+archive_cli = AppGroup("archive", help="Archival of old closed tickets.")
+
+
+@archive_cli.command("run")
+@click.option("--older-than-days", type=int, default=None,
+              help="Archive tickets serviced more than this many days ago (default: ARCHIVE_AFTER_DAYS).")
+@click.option("--batch-size", type=int, default=None,
+              help="Tickets moved per transaction (default: ARCHIVE_BATCH_SIZE).")
+def run_archive(older_than_days, batch_size):
+    """Move old Complete/Cancelled tickets to the archive table (run from cron)."""
+    from app.util.archive import archive_tickets
+
+    click.echo(f"Archived {archive_tickets(older_than_days, batch_size)} tickets.")
+
+
+partitions_cli = AppGroup("partitions", help="Monthly table partitions (Postgres).")
+
+
+@partitions_cli.command("create")
+@click.option("--months-ahead", type=int, default=None,
+              help="Create partitions through this many months from now (default: PARTITION_MONTHS_AHEAD).")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m"]), default=None,
+              help="First month to create (YYYY-MM); defaults to the current month.")
+def create_partitions_command(months_ahead, start):
+    """Create upcoming monthly partitions of service_tickets (run from cron)."""
+    from flask import current_app
+    from app.util.partitions import create_partitions
+
+    if months_ahead is None:
+        months_ahead = current_app.config["PARTITION_MONTHS_AHEAD"]
+    created = create_partitions(months_ahead, start.date() if start else None)
+    click.echo(f"Created {len(created)} partitions." + (f" ({', '.join(created)})" if created else ""))
+
+
+@partitions_cli.command("check")
+def check_partitions_command():
+    """Report rows referencing missing tickets and duplicated ticket ids (run from cron)."""
+    from app.util.partitions import check_references
+
+    problems = check_references()
+    if problems:
+        raise click.ClickException("; ".join(f"{name}: {count}" for name, count in problems.items()))
+    click.echo("No orphaned references or duplicate ids.")
+
+
+associations_cli = AppGroup("associations", help="Ticket association table maintenance.")
+
+
+@associations_cli.command("migrate")
+def migrate_associations_command():
+    """Fold ticket_parts into parts.ticket_id and dedupe service_mechanics under its primary key."""
+    from app.util.associations import migrate_associations
+
+    stats = migrate_associations()
+    click.echo(f"Linked {stats['parts_linked']} parts from ticket_parts; "
+               f"removed {stats['assignments_removed']} duplicate or orphaned mechanic assignments.")
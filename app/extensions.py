@@ -1,9 +1,12 @@
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app.util.ratelimit import rate_limit_key, policy_limit
 
 ma = Marshmallow()
+# Storage backend and strategy come from RATELIMIT_* settings in config.py so
+# every worker shares the same counters (see Config.RATELIMIT_STORAGE_URI).
+# Limits themselves are resolved per endpoint and role from RATELIMIT_POLICY.
 limiter = Limiter(
-    get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
+    rate_limit_key,
+    default_limits=[policy_limit]
 )
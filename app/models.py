@@ -1,7 +1,10 @@
-from datetime import date, datetime
+import re
+from datetime import date, datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Date, String, ForeignKey, Float, Table, Column, Integer
+from sqlalchemy.orm import DeclarativeBase, Mapped, WriteOnlyMapped, mapped_column, relationship, validates
+from sqlalchemy import (Date, DateTime, String, ForeignKey, Float, Table, Column, Integer, Index, UniqueConstraint,
+                        JSON, Text, CheckConstraint, PrimaryKeyConstraint, DDL, event)
+from sqlalchemy.ext.compiler import compiles
 
 
 class Base(DeclarativeBase):
@@ -11,22 +14,65 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class = Base)
 
+TICKET_STATUSES = ["Pending", "Assigned", "In Progress", "Awaiting Parts", "Complete", "Cancelled"]
+# Statuses that make up a mechanic's work queue
+ACTIVE_TICKET_STATUSES = ["Assigned", "In Progress", "Awaiting Parts"]
 
+_VIN_JUNK = re.compile(r"[^A-Z0-9]")
 
+def normalize_vin(vin):
+    """Uppercase and strip spaces/dashes so '1hg-cm8 2633' and '1HGCM82633' are the same vehicle."""
+    if vin is None:
+        return None
+    return _VIN_JUNK.sub("", vin.upper())
 
+def normalize_code(code):
+    """Trim and uppercase a scanned SKU/UPC/serial so 'ab-12 ' and 'AB-12' are the same code."""
+    if code is None:
+        return None
+    return code.strip().upper() or None
 
+
+def soft_delete(row):
+    """
+    Mark a customer or mechanic deleted. The row (and every
+    foreign key pointing at it) stays put; its unique login fields are
+    rewritten so the email, phone and username can be registered again.
+    """
+    # Naive UTC like the other DateTime columns (SQLite has no aware DateTime)
+    row.deleted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    row.email = f"deleted-{row.id}@deleted.invalid"
+    for column in ("phone", "username"):
+        if hasattr(row, column):
+            setattr(row, column, f"deleted-{row.id}")
+
+
+def _not_postgresql(ddl, target, bind, **kw):
+    # Inline constraints are checked while compiling CREATE TABLE, with no bind
+    dialect = kw.get("dialect") or bind.dialect
+    return dialect.name != "postgresql"
+
+# Scanned-code columns are unique and looked up by equality only. On Postgres
+# uniqueness comes from EXCLUDE USING hash constraints (see below), so the
+# lookups run on hash indexes; elsewhere a plain unique index does both jobs.
+def _unique_code_index(name, column):
+    return Index(name, column, unique=True).ddl_if(callable_=_not_postgresql)
+
+
+
+
+
+# Which mechanics work which tickets. The primary key (ticket, mechanic)
+# makes an assignment unique and serves lookups from the ticket side; the
+# index serves the reverse direction. Installed parts need no association
+# table: Part.ticket_id is the link.
 service_mechanics = Table(
     "service_mechanics",
     Base.metadata,
-    Column("service_tickets_id",Integer, ForeignKey("service_tickets.id")),
-    Column("mechanics_id",Integer, ForeignKey("mechanics.id"))
-)
-
-ticket_parts = Table(
-    "ticket_parts",
-    Base.metadata,
-    Column("service_ticket_id", Integer, ForeignKey("service_tickets.id")),
-    Column("part_id", Integer, ForeignKey("parts.id"))
+    Column("service_tickets_id", Integer, ForeignKey("service_tickets.id"), primary_key=True),
+    Column("mechanics_id", Integer, ForeignKey("mechanics.id"), primary_key=True),
+    # Work-queue lookups start from the mechanic side
+    Index("ix_service_mechanics_mechanic_ticket", "mechanics_id", "service_tickets_id")
 )
 
 class Customers(Base):
@@ -40,23 +86,84 @@ class Customers(Base):
     address: Mapped[str] = mapped_column(String(500),nullable=False)
     password: Mapped[str] = mapped_column(String(120),nullable=False)
     username: Mapped[str] = mapped_column(String(120), unique=True, nullable=False)
+    # Soft delete: set instead of deleting the row (see soft_delete())
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     
-    service_ticket: Mapped[list['ServiceTickets']] = relationship('ServiceTickets', back_populates='customer')
+    # Write-only: a customer's history is never loaded whole; read it a page
+    # at a time with app.util.history.ticket_history_page()
+    service_ticket: WriteOnlyMapped['ServiceTickets'] = relationship('ServiceTickets', back_populates='customer')
 
 class ServiceTickets(Base):
     __tablename__ = "service_tickets"
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"))
-    service_date: Mapped[date] = mapped_column(Date, default=datetime.now)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), index=True)
+    service_date: Mapped[date] = mapped_column(Date, default=datetime.now, index=True)
     service_description: Mapped[str] = mapped_column(String(2000),nullable=False)
-    price: Mapped[float] = mapped_column(Float(20), nullable=False)
+    price: Mapped[float] = mapped_column(Float(20), nullable=False, index=True)
     vin: Mapped[str] = mapped_column(String(50),nullable=False)
+    # active_history: flush hooks (workload, rollups) need the status a ticket is leaving
+    status: Mapped[str] = mapped_column(String(50), default="Pending", server_default="Pending", nullable=False,
+                                        active_history=True)
+    # Higher numbers are worked first
+    priority: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Optimistic concurrency: bumped and checked on every UPDATE (see app/util/concurrency.py)
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    # Indexed columns that list endpoints may filter/sort on (see app/util/query_params.py)
+    __queryable__ = ("id", "customer_id", "service_date", "price", "status", "priority", "vin")
+
+    __table_args__ = (
+        # Covers the work-queue filter (status) and its ordering (priority, age, id)
+        Index("ix_service_tickets_status_priority_date", "status", "priority", "service_date", "id"),
+        # Vehicle history and VIN prefix lookups are range scans on this index
+        Index("ix_service_tickets_vin_date", "vin", "service_date", "id"),
+        # Ids must never be reused once a ticket moves to the archive. On
+        # Postgres the table is partitioned by month (see PARTITIONED_TABLES).
+        {"sqlite_autoincrement": True, "postgresql_partition_by": "RANGE (service_date)"},
+    )
+    __mapper_args__ = {"version_id_col": version_id}
 
-    
     customer: Mapped["Customers"] = relationship("Customers", back_populates="service_ticket")
     mechanic: Mapped[list["Mechanics"]] = relationship("Mechanics", secondary=service_mechanics, back_populates="service_ticket")
-    parts: Mapped[list["Part"]] = relationship(secondary=ticket_parts, back_populates="service_ticket")
+    parts: Mapped[list["Part"]] = relationship("Part", back_populates="ticket")
+    appointments: Mapped[list["Appointment"]] = relationship("Appointment", back_populates="ticket",
+                                                             cascade="all, delete-orphan")
+    reservations: Mapped[list["PartReservation"]] = relationship("PartReservation", back_populates="ticket")
+
+    @validates("vin")
+    def validate_vin(self, key, vin):
+        return normalize_vin(vin)
+
+class ArchivedServiceTicket(Base):
+    """
+    A closed ticket moved out of service_tickets by the archiver
+    (``flask archive run``, see app/util/archive.py). Keeps the ticket's own
+    columns under the same id plus a snapshot of its mechanics and installed
+    parts, so the live table only holds recent and open work.
+    """
+    __tablename__ = "service_tickets_archive"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"), index=True)
+    service_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    service_description: Mapped[str] = mapped_column(String(2000), nullable=False)
+    price: Mapped[float] = mapped_column(Float(20), nullable=False)
+    vin: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(50), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    parts_cost: Mapped[float] = mapped_column(Float(20), nullable=False, default=0.0)
+    # [mechanic_id, ...]
+    mechanic_ids: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    # [{"id", "desc_id", "name", "price", "serial", "consumed_at"}, ...]
+    parts: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Vehicle history and VIN autocomplete read the archive too
+        Index("ix_service_tickets_archive_vin_date", "vin", "service_date", "id"),
+    )
+
 
 class Mechanics(Base):
     __tablename__ = "mechanics"
@@ -68,9 +175,15 @@ class Mechanics(Base):
     salary: Mapped[float] = mapped_column(Float(20), nullable=True)
     address: Mapped[str] = mapped_column(String(500),nullable=True)
     password: Mapped[str] = mapped_column(String(120),nullable=False)
-    role: Mapped[str] = mapped_column(String(50), default='mechanic')
+    role: Mapped[str] = mapped_column(String(50), default='mechanic', index=True)
+    # Soft delete: set instead of deleting the row (see soft_delete())
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    __queryable__ = ("id", "email", "role")
 
-    service_ticket: Mapped[list["ServiceTickets"]] = relationship("ServiceTickets",secondary=service_mechanics, back_populates="mechanic")
+    # Write-only, like Customers.service_ticket; membership checks go through
+    # app.util.history.is_assigned()
+    service_ticket: WriteOnlyMapped["ServiceTickets"] = relationship("ServiceTickets",secondary=service_mechanics, back_populates="mechanic")
 
 class InventoryPartDescription(Base):
     __tablename__ = "inventory_part_descriptions"
@@ -78,15 +191,280 @@ class InventoryPartDescription(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(160), nullable=False)
     price: Mapped[float] = mapped_column(Float(20), nullable=False)
-    
+    # Reorder policy (see app/blueprints/parts/reorder.py). Left empty, the
+    # reorder point is computed from consumption and lead time.
+    reorder_point: Mapped[int] = mapped_column(Integer, nullable=True)
+    reorder_quantity: Mapped[int] = mapped_column(Integer, nullable=True)
+    lead_time_days: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Stock-keeping unit and UPC/EAN barcode, for counter lookups
+    sku: Mapped[str] = mapped_column(String(64), nullable=True)
+    upc: Mapped[str] = mapped_column(String(14), nullable=True)
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    __queryable__ = ("id",)
+    __table_args__ = (
+        _unique_code_index("uq_inventory_part_descriptions_sku", "sku"),
+        _unique_code_index("uq_inventory_part_descriptions_upc", "upc"),
+    )
+    __mapper_args__ = {"version_id_col": version_id}
+
     part: Mapped[list["Part"]] = relationship("Part", back_populates="inventory_description")
 
+    @validates("sku", "upc")
+    def validate_code(self, key, code):
+        return normalize_code(code)
+
 class Part(Base):
     __tablename__ = "parts"
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    desc_id: Mapped[int] = mapped_column(ForeignKey("inventory_part_descriptions.id", ondelete="CASCADE"))
-    ticket_id: Mapped[int] = mapped_column(ForeignKey("service_tickets.id"), nullable=True)
+    desc_id: Mapped[int] = mapped_column(ForeignKey("inventory_part_descriptions.id", ondelete="CASCADE"), index=True)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("service_tickets.id"), nullable=True, index=True)
+    # Held for a ticket but not installed yet; the hold lapses at the reservation's expires_at
+    reservation_id: Mapped[int] = mapped_column(ForeignKey("part_reservations.id"), nullable=True, index=True)
+    # When it was installed on its ticket; consumption velocity is measured from this
+    consumed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, index=True)
+    # Manufacturer serial number / barcode of this unit
+    serial: Mapped[str] = mapped_column(String(100), nullable=True)
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    __queryable__ = ("id", "desc_id", "ticket_id")
+    __table_args__ = (
+        # Picking free units of one kind: desc_id = ? AND ticket_id IS NULL
+        Index("ix_parts_desc_ticket", "desc_id", "ticket_id"),
+        _unique_code_index("uq_parts_serial", "serial"),
+    )
+    __mapper_args__ = {"version_id_col": version_id}
 
     inventory_description: Mapped["InventoryPartDescription"] = relationship("InventoryPartDescription", back_populates="part")
-    service_ticket: Mapped[list["ServiceTickets"]] = relationship(secondary=ticket_parts, back_populates="parts")
+    ticket: Mapped["ServiceTickets"] = relationship("ServiceTickets", back_populates="parts")
+    reservation: Mapped["PartReservation"] = relationship("PartReservation", back_populates="parts")
+
+    @validates("serial")
+    def validate_serial(self, key, serial):
+        return normalize_code(serial)
+
+
+for _table, _column in (("inventory_part_descriptions", "sku"), ("inventory_part_descriptions", "upc"),
+                        ("parts", "serial")):
+    event.listen(Base.metadata.tables[_table], "after_create", DDL(
+        f"ALTER TABLE {_table} ADD CONSTRAINT ex_{_table}_{_column} EXCLUDE USING hash ({_column} WITH =)"
+    ).execute_if(dialect="postgresql"))
+
+
+RESERVATION_STATUSES = ["held", "fulfilled", "released", "expired"]
+
+class PartReservation(Base):
+    """
+    A ticket's time-limited hold on ``quantity`` units of a part description.
+    The held units point back here through Part.reservation_id. Once
+    expires_at passes the units count as free again, whether or not the
+    sweeper has marked the hold expired yet. See app/util/reservations.py.
+    """
+    __tablename__ = "part_reservations"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("service_tickets.id"), nullable=False, index=True)
+    desc_id: Mapped[int] = mapped_column(ForeignKey("inventory_part_descriptions.id"), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="held", server_default="held")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # The expiry sweep: held reservations, soonest expiry first
+        Index("ix_part_reservations_status_expires", "status", "expires_at"),
+    )
+
+    ticket: Mapped["ServiceTickets"] = relationship("ServiceTickets", back_populates="reservations")
+    parts: Mapped[list["Part"]] = relationship("Part", back_populates="reservation")
+
+
+class TicketRollup(Base):
+    """
+    Pre-aggregated daily totals of completed tickets.
+
+    One row per (day, dimension, dimension_id) where dimension is "all"
+    (dimension_id 0), "customer" or "mechanic". Rows are updated
+    incrementally as tickets complete; week/month views sum the daily rows.
+    """
+    __tablename__ = "ticket_rollups"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    dimension: Mapped[str] = mapped_column(String(20), nullable=False)
+    dimension_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float(20), nullable=False, default=0.0)
+    parts_cost: Mapped[float] = mapped_column(Float(20), nullable=False, default=0.0)
+    labor_total: Mapped[float] = mapped_column(Float(20), nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "dimension", "dimension_id", name="uq_ticket_rollups_day_dimension"),
+        Index("ix_ticket_rollups_dimension_day", "dimension", "dimension_id", "day"),
+    )
+
+
+class RolledUpTicket(Base):
+    """
+    What one completed ticket currently contributes to ticket_rollups, so the
+    contribution can be taken out again exactly when the ticket is completed
+    a second time or leaves Complete (see app/blueprints/analytics/rollups.py).
+    """
+    __tablename__ = "rolled_up_tickets"
+
+    ticket_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    customer_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    mechanic_ids: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    revenue: Mapped[float] = mapped_column(Float(20), nullable=False)
+    parts_cost: Mapped[float] = mapped_column(Float(20), nullable=False)
+    labor_total: Mapped[float] = mapped_column(Float(20), nullable=False)
+
+
+class ReorderSuggestion(Base):
+    """
+    Output of the reorder job (``flask reorder compute``): one row per part
+    description whose free stock is at or below its reorder point, ranked
+    most urgent first. Replaced wholesale on every run.
+    """
+    __tablename__ = "reorder_suggestions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    rank: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    desc_id: Mapped[int] = mapped_column(ForeignKey("inventory_part_descriptions.id", ondelete="CASCADE"),
+                                         nullable=False, unique=True)
+    on_hand: Mapped[int] = mapped_column(Integer, nullable=False)
+    available: Mapped[int] = mapped_column(Integer, nullable=False)
+    daily_velocity: Mapped[float] = mapped_column(Float, nullable=False)
+    peak_daily_velocity: Mapped[float] = mapped_column(Float, nullable=False)
+    reorder_point: Mapped[int] = mapped_column(Integer, nullable=False)
+    suggested_quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # None when nothing was consumed in the velocity window
+    days_of_cover: Mapped[float] = mapped_column(Float, nullable=True)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    inventory_description: Mapped["InventoryPartDescription"] = relationship("InventoryPartDescription")
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox. Request handlers add a row in the same transaction
+    as the change it describes; the outbox worker (``flask outbox run``)
+    delivers it to the registered handlers afterwards. See app/util/outbox.py.
+    """
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    topic: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Pushed forward on failure so a broken event backs off instead of spinning
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    processed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # Set once OUTBOX_MAX_ATTEMPTS deliveries have failed; the event is kept for inspection
+    dead_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    # The ticket the event is about; events for one ticket are delivered in order.
+    # No foreign key: events outlive archived tickets.
+    ticket_id: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (
+        # The worker's poll: unprocessed events that are due, oldest first
+        Index("ix_outbox_events_pending", "processed_at", "available_at", "id"),
+        # Is an earlier event for the same ticket still undelivered?
+        Index("ix_outbox_events_ticket", "ticket_id", "id"),
+    )
+
+
+class ReferenceVersion(Base):
+    """
+    Change counter per reference catalog ("parts", "mechanics"), bumped in
+    the same transaction as any change to the catalog's rows. Workers
+    compare it with the version of their in-process snapshot to know when
+    to reload. See app/util/reference.py.
+    """
+    __tablename__ = "reference_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+
+class Appointment(Base):
+    """
+    A booked time slot for a ticket: one mechanic, optionally one service bay,
+    from starts_at (inclusive) to ends_at (exclusive), in shop-local time.
+    A mechanic or bay is never booked twice at once; see app/util/schedule.py.
+    """
+    __tablename__ = "appointments"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("service_tickets.id"), nullable=False, index=True)
+    mechanic_id: Mapped[int] = mapped_column(ForeignKey("mechanics.id"), nullable=False)
+    bay: Mapped[int] = mapped_column(Integer, nullable=True)
+    starts_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    ends_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("ends_at > starts_at", name="ck_appointments_positive_duration"),
+        # Overlap checks are range scans per resource
+        Index("ix_appointments_mechanic_start", "mechanic_id", "starts_at"),
+        Index("ix_appointments_bay_start", "bay", "starts_at"),
+    )
+
+    ticket: Mapped["ServiceTickets"] = relationship("ServiceTickets", back_populates="appointments")
+    mechanic: Mapped["Mechanics"] = relationship("Mechanics")
+
+
+# On Postgres the database itself refuses overlapping bookings: GiST exclusion
+# constraints over tsrange(starts_at, ends_at) per mechanic and per bay.
+for _statement in (
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE appointments ADD CONSTRAINT ex_appointments_mechanic_overlap "
+    "EXCLUDE USING gist (mechanic_id WITH =, tsrange(starts_at, ends_at) WITH &&)",
+    "ALTER TABLE appointments ADD CONSTRAINT ex_appointments_bay_overlap "
+    "EXCLUDE USING gist (bay WITH =, tsrange(starts_at, ends_at) WITH &&) WHERE (bay IS NOT NULL)",
+):
+    event.listen(Appointment.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+
+# --- Range partitioning (Postgres) ---
+#
+# Tables listed here are created PARTITION BY RANGE on the given date column
+# on Postgres, one partition per calendar month plus a DEFAULT partition for
+# anything outside them. Monthly partitions are created ahead of time by
+# `flask partitions create` (app/util/partitions.py). Queries that bound the
+# date column only touch the matching months. Other backends (SQLite in
+# tests and local dev) get a single plain table from the same models.
+#
+# Postgres requires the partition key in every unique constraint, so the
+# primary key becomes (id, service_date) there. ids still come from one
+# sequence, but nothing in the database enforces that any more. Foreign keys
+# can't reference id alone either, so references to a partitioned table are
+# left out of the Postgres DDL (keeping them would mean carrying
+# service_date in every referencing table). The ORM relationships don't
+# depend on them, the archiver (which is what deletes tickets) removes the
+# referencing rows itself, and `flask partitions check` reports orphans and
+# duplicate ids in their place.
+PARTITIONED_TABLES = {"service_tickets": "service_date"}
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    partition_key = PARTITIONED_TABLES.get(constraint.table.name)
+    if partition_key is None or partition_key in constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = [column.name for column in constraint.columns] + [partition_key]
+    return "PRIMARY KEY (%s)" % ", ".join(compiler.preparer.quote(column) for column in columns)
+
+
+for _name in PARTITIONED_TABLES:
+    event.listen(Base.metadata.tables[_name], "after_create", DDL(
+        f"CREATE TABLE {_name}_default PARTITION OF {_name} DEFAULT"
+    ).execute_if(dialect="postgresql"))
+
+for _table in Base.metadata.tables.values():
+    for _foreign_key in _table.foreign_key_constraints:
+        if _foreign_key.referred_table.name in PARTITIONED_TABLES:
+            _foreign_key.ddl_if(callable_=_not_postgresql)
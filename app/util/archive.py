@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, insert, update, delete
+from app.models import (db, ServiceTickets, ArchivedServiceTicket, Part, InventoryPartDescription, PartReservation,
+                        Appointment, RolledUpTicket, service_mechanics)
+from app.util.part_lookup import get_code_cache
+
+# Ticket archival.
+#
+# Closed (Complete/Cancelled) tickets whose service_date is older than
+# ARCHIVE_AFTER_DAYS are moved, ARCHIVE_BATCH_SIZE at a time, from
+# service_tickets into service_tickets_archive under the same id. Each
+# archived row carries a snapshot of the ticket's mechanics and installed
+# parts (with the price they were charged at), and everything that hung off
+# the live ticket -- association rows, installed parts, appointments and
+# reservations -- is deleted with it. Lists, searches and aggregates over
+# service_tickets therefore only ever see recent and open work; daily
+# totals live on in ticket_rollups, and GET /service-tickets/<id> falls
+# back to the archive so old tickets stay readable by id.
+#
+# Batches are claimed with FOR UPDATE SKIP LOCKED, so the job can run next to
+# live traffic (and next to another copy of itself).
+
+ARCHIVABLE_STATUSES = ("Complete", "Cancelled")
+
+
+def _utcnow():
+    # Naive UTC; SQLite has no timezone-aware DateTime.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _snapshot_parts(ticket_ids):
+    """{ticket_id: [part snapshot, ...]} for the parts installed on ``ticket_ids``."""
+    parts = defaultdict(list)
+    for row in db.session.execute(
+        select(Part.id, Part.ticket_id, Part.desc_id, Part.serial, Part.consumed_at, InventoryPartDescription.name,
+               InventoryPartDescription.price)
+        .join(InventoryPartDescription, InventoryPartDescription.id == Part.desc_id)
+        .where(Part.ticket_id.in_(ticket_ids))
+        .order_by(Part.ticket_id, Part.id)
+    ):
+        parts[row.ticket_id].append({
+            "id": row.id, "desc_id": row.desc_id, "name": row.name, "price": row.price,
+            "serial": row.serial, "consumed_at": row.consumed_at.isoformat() if row.consumed_at else None,
+        })
+    return parts
+
+
+def _archive_batch(ticket_ids, now):
+    """Copy ``ticket_ids`` to the archive and delete them and their dependents. Returns the archived part ids."""
+    mechanics = defaultdict(set)
+    for ticket_id, mechanic_id in db.session.execute(
+        select(service_mechanics.c.service_tickets_id, service_mechanics.c.mechanics_id)
+        .where(service_mechanics.c.service_tickets_id.in_(ticket_ids))
+    ):
+        mechanics[ticket_id].add(mechanic_id)
+    parts = _snapshot_parts(ticket_ids)
+
+    tickets = db.session.execute(
+        select(ServiceTickets.id, ServiceTickets.customer_id, ServiceTickets.service_date,
+               ServiceTickets.service_description, ServiceTickets.price, ServiceTickets.vin,
+               ServiceTickets.status, ServiceTickets.priority)
+        .where(ServiceTickets.id.in_(ticket_ids))
+    ).all()
+    db.session.execute(insert(ArchivedServiceTicket), [
+        {**ticket._asdict(), "parts_cost": sum(part["price"] for part in parts[ticket.id]),
+         "mechanic_ids": sorted(mechanics[ticket.id]), "parts": parts[ticket.id], "archived_at": now}
+        for ticket in tickets
+    ])
+
+    reservations = select(PartReservation.id).where(PartReservation.ticket_id.in_(ticket_ids))
+    # Bump version_id by hand: a bulk UPDATE skips the ORM's version counter
+    db.session.execute(update(Part).where(Part.reservation_id.in_(reservations))
+                       .values(reservation_id=None, version_id=Part.version_id + 1))
+    db.session.execute(delete(PartReservation).where(PartReservation.ticket_id.in_(ticket_ids)))
+    db.session.execute(delete(Appointment).where(Appointment.ticket_id.in_(ticket_ids)))
+    db.session.execute(delete(service_mechanics).where(service_mechanics.c.service_tickets_id.in_(ticket_ids)))
+    part_ids = [part["id"] for snapshot in parts.values() for part in snapshot]
+    db.session.execute(delete(Part).where(Part.ticket_id.in_(ticket_ids)))
+    db.session.execute(delete(ServiceTickets).where(ServiceTickets.id.in_(ticket_ids)))
+    # Archived tickets can't be reopened; their rollup contributions are final
+    db.session.execute(delete(RolledUpTicket).where(RolledUpTicket.ticket_id.in_(ticket_ids)))
+    return part_ids
+
+
+def archive_tickets(older_than_days=None, batch_size=None, today=None):
+    """
+    Move closed tickets serviced more than ``older_than_days`` days before
+    ``today`` to the archive, one batch per transaction. Returns the number
+    of tickets archived.
+    """
+    config = current_app.config
+    older_than_days = config["ARCHIVE_AFTER_DAYS"] if older_than_days is None else older_than_days
+    batch_size = batch_size or config["ARCHIVE_BATCH_SIZE"]
+    cutoff = (today or _utcnow().date()) - timedelta(days=older_than_days)
+
+    total = 0
+    while True:
+        ids = db.session.scalars(
+            select(ServiceTickets.id)
+            .where(ServiceTickets.status.in_(ARCHIVABLE_STATUSES), ServiceTickets.service_date < cutoff)
+            .order_by(ServiceTickets.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return total
+        part_ids = _archive_batch(ids, _utcnow())
+        db.session.commit()
+        # Scans of the archived parts' serials must stop resolving here and now
+        get_code_cache().invalidate(dependencies=[("part", part_id) for part_id in part_ids])
+        total += len(ids)
+
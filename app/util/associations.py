@@ -0,0 +1,45 @@
+from sqlalchemy import inspect, text
+from app.models import db, service_mechanics
+
+# One-off upgrade of a database created before the association redesign
+# (``flask associations migrate``; safe to re-run).
+#
+#   ticket_parts       Installed parts were linked twice, by Part.ticket_id
+#                      and by a ticket_parts row. Parts that only had the
+#                      row get ticket_id from it, then the table is dropped.
+#   service_mechanics  Had no primary key, nullable columns and duplicate
+#                      assignments. It is rebuilt with the (ticket, mechanic)
+#                      primary key from the distinct, complete rows whose
+#                      ticket and mechanic still exist.
+
+
+def migrate_associations():
+    """Run the upgrade in one transaction. Returns counts of what changed."""
+    stats = {"parts_linked": 0, "assignments_removed": 0}
+    with db.session.get_bind().begin() as conn:
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+
+        if "ticket_parts" in tables:
+            stats["parts_linked"] = conn.execute(text(
+                "UPDATE parts SET ticket_id = ("
+                "  SELECT min(tp.service_ticket_id) FROM ticket_parts tp WHERE tp.part_id = parts.id) "
+                "WHERE ticket_id IS NULL AND EXISTS (SELECT 1 FROM ticket_parts tp WHERE tp.part_id = parts.id)"
+            )).rowcount
+            conn.execute(text("DROP TABLE ticket_parts"))
+
+        if "service_mechanics" in tables and not inspector.get_pk_constraint("service_mechanics")["constrained_columns"]:
+            before = conn.scalar(text("SELECT count(*) FROM service_mechanics"))
+            conn.execute(text("ALTER TABLE service_mechanics RENAME TO service_mechanics_legacy"))
+            # Index names are schema-wide; the rebuilt table recreates it
+            conn.execute(text("DROP INDEX IF EXISTS ix_service_mechanics_mechanic_ticket"))
+            service_mechanics.create(conn)
+            conn.execute(text(
+                "INSERT INTO service_mechanics (service_tickets_id, mechanics_id) "
+                "SELECT DISTINCT service_tickets_id, mechanics_id FROM service_mechanics_legacy "
+                "WHERE service_tickets_id IN (SELECT id FROM service_tickets) "
+                "AND mechanics_id IN (SELECT id FROM mechanics)"
+            ))
+            stats["assignments_removed"] = before - conn.scalar(text("SELECT count(*) FROM service_mechanics"))
+            conn.execute(text("DROP TABLE service_mechanics_legacy"))
+    return stats
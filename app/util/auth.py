@@ -2,7 +2,7 @@ from jose import jwt
 import jose
 from datetime import datetime,timedelta,timezone
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 
 
 
@@ -19,6 +19,24 @@ def encode_token(user_id, role="user"):
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     return token
 
+def get_token_claims():
+    # Best-effort decode of the bearer token for code that runs before the view
+    # (rate limiting, metrics). Never raises; token_required still does the real check.
+    if "token_claims" in g:
+        return g.token_claims
+
+    claims = None
+    header = request.headers.get("Authorization", "")
+    parts = header.split(" ")
+    if len(parts) == 2 and parts[1]:
+        try:
+            claims = jwt.decode(parts[1], SECRET_KEY, algorithms=["HS256"])
+        except jose.exceptions.JWTError:
+            claims = None
+
+    g.token_claims = claims
+    return claims
+
 def token_required(f):
     @wraps(f)
     def decoration(*args, **kwargs):
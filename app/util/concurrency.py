@@ -0,0 +1,40 @@
+from flask import request, jsonify
+from sqlalchemy.orm.exc import StaleDataError
+from app.models import db
+
+# Optimistic concurrency helpers.
+#
+# ServiceTickets, Part and InventoryPartDescription carry a version_id column
+# that SQLAlchemy bumps on every UPDATE and checks in the WHERE clause
+# (UPDATE ... WHERE id = ? AND version_id = ?). A write based on a stale read
+# matches no row and raises StaleDataError at flush; routes turn that into a
+# 409 with the row's current state so the client can re-apply its change.
+# The version is also exposed as the resource's ETag, so clients can send
+# If-Match and have a stale write rejected before any work is done.
+
+__all__ = ["StaleDataError", "set_etag", "if_match_failed", "conflict_response"]
+
+
+def set_etag(response, obj):
+    """Tag ``response`` with ``obj``'s current version and return it."""
+    response.set_etag(str(obj.version_id))
+    return response
+
+
+def if_match_failed(obj):
+    """True when the request carries an If-Match header that isn't ``obj``'s current version."""
+    return bool(request.if_match) and not request.if_match.contains(str(obj.version_id))
+
+
+def conflict_response(model, pk, schema, message="The resource was modified by another request."):
+    """
+    Roll back the failed unit of work and return a 409 carrying the row's
+    current state (and ETag), or a 404 if it has since been deleted.
+    """
+    db.session.rollback()
+    current = db.session.get(model, pk, populate_existing=True)
+    if current is None:
+        return jsonify({"message": "Resource no longer exists."}), 404
+    response = jsonify({"message": message, "current": schema.dump(current)})
+    response.status_code = 409
+    return set_etag(response, current)
@@ -0,0 +1,122 @@
+import os
+from sqlalchemy import select
+from app.models import (db, ServiceTickets, ArchivedServiceTicket, Part, InventoryPartDescription, Customers,
+                        service_mechanics)
+
+# Columnar bulk export (Parquet / Arrow IPC) for the data team.
+#
+# Rows are streamed from the database with yield_per, so only one chunk is
+# in memory at a time, and each chunk is converted column-by-column into an
+# Arrow RecordBatch instead of building per-row dicts. pyarrow is only
+# needed when an export actually runs.
+
+FORMATS = {
+    "parquet": {"extension": "parquet", "mimetype": "application/vnd.apache.parquet"},
+    "arrow": {"extension": "arrow", "mimetype": "application/vnd.apache.arrow.file"},
+}
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class ExportUnavailable(RuntimeError):
+    pass
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ExportUnavailable("Columnar export requires pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+def _datasets(pa):
+    # name -> (select statement, arrow schema). Column order must match.
+    return {
+        "service_tickets": (
+            select(ServiceTickets.id, ServiceTickets.customer_id, ServiceTickets.service_date,
+                   ServiceTickets.service_description, ServiceTickets.price, ServiceTickets.vin,
+                   ServiceTickets.status, ServiceTickets.priority).order_by(ServiceTickets.id),
+            pa.schema([("id", pa.int64()), ("customer_id", pa.int64()), ("service_date", pa.date32()),
+                       ("service_description", pa.string()), ("price", pa.float64()), ("vin", pa.string()),
+                       ("status", pa.string()), ("priority", pa.int32())]),
+        ),
+        "service_tickets_archive": (
+            select(ArchivedServiceTicket.id, ArchivedServiceTicket.customer_id, ArchivedServiceTicket.service_date,
+                   ArchivedServiceTicket.service_description, ArchivedServiceTicket.price, ArchivedServiceTicket.vin,
+                   ArchivedServiceTicket.status, ArchivedServiceTicket.priority, ArchivedServiceTicket.parts_cost,
+                   ArchivedServiceTicket.archived_at).order_by(ArchivedServiceTicket.id),
+            pa.schema([("id", pa.int64()), ("customer_id", pa.int64()), ("service_date", pa.date32()),
+                       ("service_description", pa.string()), ("price", pa.float64()), ("vin", pa.string()),
+                       ("status", pa.string()), ("priority", pa.int32()), ("parts_cost", pa.float64()),
+                       ("archived_at", pa.timestamp("us"))]),
+        ),
+        "parts": (
+            select(Part.id, Part.desc_id, Part.ticket_id, InventoryPartDescription.name,
+                   InventoryPartDescription.price)
+            .join(InventoryPartDescription, InventoryPartDescription.id == Part.desc_id).order_by(Part.id),
+            pa.schema([("id", pa.int64()), ("desc_id", pa.int64()), ("ticket_id", pa.int64()),
+                       ("name", pa.string()), ("price", pa.float64())]),
+        ),
+        # Never export password hashes. Deleted customers stay in (their
+        # tickets still point at them) and are told apart by deleted_at.
+        "customers": (
+            select(Customers.id, Customers.first_name, Customers.last_name, Customers.email, Customers.phone,
+                   Customers.address, Customers.username, Customers.deleted_at).order_by(Customers.id),
+            pa.schema([("id", pa.int64()), ("first_name", pa.string()), ("last_name", pa.string()),
+                       ("email", pa.string()), ("phone", pa.string()), ("address", pa.string()),
+                       ("username", pa.string()), ("deleted_at", pa.timestamp("us"))]),
+        ),
+        "service_mechanics": (
+            select(service_mechanics.c.service_tickets_id, service_mechanics.c.mechanics_id),
+            pa.schema([("service_tickets_id", pa.int64()), ("mechanics_id", pa.int64())]),
+        ),
+    }
+
+
+DATASETS = ("service_tickets", "service_tickets_archive", "parts", "customers", "service_mechanics")
+
+
+def export_dataset(name, sink, format="parquet", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write dataset ``name`` to ``sink`` (a path or writable binary file object).
+    Returns the number of rows written.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}'. Allowed: {', '.join(FORMATS)}.")
+    pa = _pyarrow()
+    datasets = _datasets(pa)
+    if name not in datasets:
+        raise ValueError(f"Unknown dataset '{name}'. Allowed: {', '.join(DATASETS)}.")
+    statement, schema = datasets[name]
+
+    if format == "parquet":
+        writer = pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    rows_written = 0
+    try:
+        result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            # Transpose the chunk once, then let Arrow convert whole columns.
+            columns = list(zip(*chunk))
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+            )
+            writer.write_batch(batch)
+            rows_written += len(chunk)
+    finally:
+        writer.close()
+    return rows_written
+
+
+def export_all(out_dir, format="parquet", datasets=DATASETS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Export each dataset to ``out_dir/<name>.<ext>``. Returns {name: rows}."""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for name in datasets:
+        path = os.path.join(out_dir, f"{name}.{FORMATS[format]['extension']}")
+        counts[name] = export_dataset(name, path, format, chunk_size)
+    return counts
@@ -0,0 +1,65 @@
+from datetime import date
+from sqlalchemy import select, exists, and_, or_
+from app.models import db, ServiceTickets, service_mechanics
+from app.util.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# Ticket history of a customer or mechanic.
+#
+# Customers.service_ticket and Mechanics.service_ticket are write-only
+# collections: appending/removing only queues rows for the flush and
+# nothing ever loads the whole history. Reads go through here instead, so a
+# mechanic with 20k tickets costs the same as a new one:
+#
+#   ticket_history()       the whole history, newest service date first
+#   ticket_history_page()  one keyset page of it
+#   is_assigned()          EXISTS on the service_mechanics primary key
+
+
+_NEWEST_FIRST = (ServiceTickets.service_date.desc(), ServiceTickets.id.desc())
+
+
+def ticket_history(collection):
+    """Every ticket of a write-only ticket collection, in ticket_history_page() order."""
+    return db.session.scalars(collection.select().order_by(*_NEWEST_FIRST)).all()
+
+
+def ticket_history_page(collection, limit, cursor=None):
+    """
+    One page of a write-only ticket collection (``customer.service_ticket``
+    or ``mechanic.service_ticket``), ordered by service date then ID, newest
+    first. ``cursor`` is the ``next_cursor`` of the previous page. Returns
+    ``(tickets, next_cursor)``; raises InvalidCursor for a malformed cursor.
+    """
+    query = collection.select()
+    if cursor:
+        try:
+            service_date, ticket_id = decode_cursor(cursor)
+            service_date, ticket_id = date.fromisoformat(service_date), int(ticket_id)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor("Invalid cursor.") from e
+        query = query.where(or_(
+            ServiceTickets.service_date < service_date,
+            and_(ServiceTickets.service_date == service_date, ServiceTickets.id < ticket_id)
+        ))
+
+    tickets = db.session.scalars(
+        query.order_by(*_NEWEST_FIRST).limit(limit + 1)
+    ).all()
+    next_cursor = None
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        last = tickets[-1]
+        next_cursor = encode_cursor([last.service_date.isoformat(), last.id])
+    return tickets, next_cursor
+
+
+def is_assigned(ticket_id, mechanic_id):
+    """
+    Whether the mechanic works the ticket, without loading either side's
+    collection. A Core query, so it does not autoflush: flush first if the
+    assignment may still be pending in the session.
+    """
+    return db.session.scalar(select(exists().where(
+        service_mechanics.c.service_tickets_id == ticket_id,
+        service_mechanics.c.mechanics_id == mechanic_id
+    )))
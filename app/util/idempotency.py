@@ -0,0 +1,215 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlparse
+from flask import request, jsonify, current_app, make_response
+
+# Idempotency-Key support for POST/PUT endpoints.
+#
+# The first request with a given key reserves it, runs the handler and
+# stores the response. Retries with the same key get the stored response
+# back without running the handler (or touching the database). Keys are
+# scoped to the authenticated user and expire after IDEMPOTENCY_TTL seconds.
+
+IN_PROGRESS = "in_progress"
+DONE = "done"
+
+
+class MemoryIdempotencyStore:
+    """Per-process LRU with TTL. Fine for a single worker or for tests."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, record = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return record
+
+    def reserve(self, key, fingerprint, ttl):
+        now = time.time()
+        with self._lock:
+            existing = self._live(key, now)
+            if existing is not None:
+                return existing
+            self._entries[key] = (now + ttl, {"state": IN_PROGRESS, "fingerprint": fingerprint})
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return None
+
+    def complete(self, key, record, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, record)
+
+    def release(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteIdempotencyStore:
+    """Shared by every worker on one host through a SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires_at ON idempotency_keys (expires_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def reserve(self, key, fingerprint, ttl):
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Sweep a few expired rows on the way; expires_at is indexed.
+            conn.execute("DELETE FROM idempotency_keys WHERE rowid IN "
+                         "(SELECT rowid FROM idempotency_keys WHERE expires_at <= ? LIMIT 100)", (now,))
+            row = conn.execute("SELECT record FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                return json.loads(row[0])
+            conn.execute("INSERT INTO idempotency_keys (key, record, expires_at) VALUES (?, ?, ?)",
+                         (key, json.dumps({"state": IN_PROGRESS, "fingerprint": fingerprint}), now + ttl))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def complete(self, key, record, ttl):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO idempotency_keys (key, record, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(record), time.time() + ttl))
+
+    def release(self, key):
+        self._connection().execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+
+class RedisIdempotencyStore:
+    """Shared across a cluster. Reservation is a single SET NX EX round trip."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def reserve(self, key, fingerprint, ttl):
+        name = f"idempotency:{key}"
+        record = json.dumps({"state": IN_PROGRESS, "fingerprint": fingerprint})
+        if self.client.set(name, record, nx=True, ex=int(ttl)):
+            return None
+        existing = self.client.get(name)
+        # Expired between the two calls: treat as reserved by us next time round
+        return json.loads(existing) if existing is not None else self.reserve(key, fingerprint, ttl)
+
+    def complete(self, key, record, ttl):
+        self.client.set(f"idempotency:{key}", json.dumps(record), ex=int(ttl))
+
+    def release(self, key):
+        self.client.delete(f"idempotency:{key}")
+
+
+def store_from_uri(uri, max_entries=10000):
+    scheme = urlparse(uri).scheme
+    if scheme == "memory":
+        return MemoryIdempotencyStore(max_entries)
+    if scheme == "sqlite":
+        path = urlparse(uri).path
+        return SQLiteIdempotencyStore(path[1:] if path.startswith("/") else path)
+    if scheme in ("redis", "rediss"):
+        return RedisIdempotencyStore(uri)
+    raise ValueError(f"Unsupported idempotency store: {uri}")
+
+
+def get_idempotency_store():
+    store = current_app.extensions.get("idempotency_store")
+    if store is None:
+        store = store_from_uri(current_app.config.get("IDEMPOTENCY_STORE_URI", "memory://"),
+                               current_app.config.get("IDEMPOTENCY_MAX_ENTRIES", 10000))
+        current_app.extensions["idempotency_store"] = store
+    return store
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def idempotent(f):
+    """
+    Honour an ``Idempotency-Key`` header on the decorated route.
+    Apply it after ``token_required`` so the key can be scoped to the user.
+    """
+    @wraps(f)
+    def decoration(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"message": "Idempotency-Key must be at most 255 characters."}), 400
+
+        store = get_idempotency_store()
+        ttl = current_app.config.get("IDEMPOTENCY_TTL", 86400)
+        scoped_key = f"{getattr(request, 'user_id', None) or 'anonymous'}:{key}"
+        fingerprint = _fingerprint()
+
+        existing = store.reserve(scoped_key, fingerprint, ttl)
+        if existing is not None:
+            if existing["fingerprint"] != fingerprint:
+                return jsonify({"message": "Idempotency-Key was already used for a different request."}), 422
+            if existing["state"] == IN_PROGRESS:
+                return jsonify({"message": "A request with this Idempotency-Key is still being processed."}), 409
+            response = make_response(base64.b64decode(existing["body"]), existing["status"])
+            response.content_type = existing["content_type"]
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            store.release(scoped_key)
+            raise
+
+        if response.status_code >= 500:
+            # Let the client retry failures for real
+            store.release(scoped_key)
+        else:
+            store.complete(scoped_key, {
+                "state": DONE,
+                "fingerprint": fingerprint,
+                "status": response.status_code,
+                "content_type": response.content_type,
+                "body": base64.b64encode(response.get_data()).decode(),
+            }, ttl)
+        return response
+
+    return decoration
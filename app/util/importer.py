@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app.models import db, Customers, InventoryPartDescription, ServiceTickets, Part, normalize_vin, normalize_code
+from app.blueprints.customers.schemas import UserSchema
+from app.blueprints.parts.schemas import InventoryPartDescriptionSchema, PartSchema
+from app.blueprints.tickets.schemas import ServiceTicketSchema
+from app.util.reference import bump_reference_versions, catalog_names
+
+# Streaming bulk import of legacy shop data.
+#
+# Each source file is CSV or NDJSON (by extension). Records carry their
+# legacy primary key in "legacy_id" (or "id") and refer to other records by
+# legacy id; those references are translated through in-memory id maps
+# filled as parents are inserted. Entities are imported in dependency order.
+#
+# Per batch: validate with the API's marshmallow schemas, hash passwords in
+# a process pool, insert with one executemany (RETURNING the new ids), commit,
+# then write the checkpoint. A run pointed at an existing checkpoint skips
+# finished records and reuses its id maps. A crash between a commit and the
+# checkpoint write replays at most that one batch on resume.
+
+# "normalize" applies the same canonical forms as the models' @validates
+# hooks, which bulk inserts bypass.
+ENTITIES = {
+    "customers": {"model": Customers, "schema": UserSchema, "foreign_keys": {}, "normalize": {}},
+    "part_descriptions": {"model": InventoryPartDescription, "schema": InventoryPartDescriptionSchema,
+                          "foreign_keys": {}, "normalize": {"sku": normalize_code, "upc": normalize_code}},
+    "tickets": {"model": ServiceTickets, "schema": ServiceTicketSchema,
+                "foreign_keys": {"customer_id": "customers"}, "normalize": {"vin": normalize_vin}},
+    "parts": {"model": Part, "schema": PartSchema,
+              "foreign_keys": {"desc_id": "part_descriptions", "ticket_id": "tickets"},
+              "normalize": {"serial": normalize_code}},
+}
+
+
+def read_records(path):
+    """Yield one dict per record from a CSV or NDJSON file without loading the whole file."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(source):
+                # Empty CSV cells mean "not provided", not empty strings
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+
+
+class BulkImporter:
+    def __init__(self, batch_size=1000, workers=None, checkpoint_path=None, rejects_path=None,
+                 passwords_hashed=False, echo=print):
+        self.batch_size = batch_size
+        self.workers = os.cpu_count() if workers is None else workers
+        self.checkpoint_path = checkpoint_path
+        self.rejects_path = rejects_path
+        self.passwords_hashed = passwords_hashed
+        self.echo = echo
+        self.state = {"done": {}, "id_maps": {name: {} for name in ENTITIES}}
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+        self._pool = None
+
+    # --- checkpointing ---
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _reject(self, entity, legacy_id, errors):
+        if self.rejects_path:
+            with open(self.rejects_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"entity": entity, "legacy_id": legacy_id, "errors": errors}) + "\n")
+
+    # --- passwords ---
+
+    def _hash_passwords(self, passwords):
+        if self.workers and self.workers > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return list(self._pool.map(generate_password_hash, passwords, chunksize=64))
+        return [generate_password_hash(password) for password in passwords]
+
+    # --- import ---
+
+    def run(self, sources):
+        """
+        Import ``sources`` ({entity: path}) in dependency order.
+        Returns {entity: {"imported": n, "rejected": n}}.
+        """
+        unknown = set(sources) - set(ENTITIES)
+        if unknown:
+            raise ValueError(f"Unknown entities: {', '.join(sorted(unknown))}.")
+        stats = {}
+        try:
+            for name in ENTITIES:
+                if name in sources:
+                    stats[name] = self._import_file(name, sources[name])
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+        return stats
+
+    def _import_file(self, name, path):
+        done = self.state["done"].get(name, 0)
+        records = islice(read_records(path), done, None)
+        stats = {"imported": 0, "rejected": 0}
+        if done:
+            self.echo(f"{name}: resuming after {done} records")
+
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            imported, rejected = self._import_batch(name, batch)
+            stats["imported"] += imported
+            stats["rejected"] += rejected
+            self.state["done"][name] = self.state["done"].get(name, 0) + len(batch)
+            self._save_checkpoint()
+            self.echo(f"{name}: {self.state['done'][name]} records processed")
+        return stats
+
+    def _import_batch(self, name, batch):
+        entity = ENTITIES[name]
+        model = entity["model"]
+        schema = entity["schema"](many=True)
+        id_maps = self.state["id_maps"]
+
+        # Translate legacy foreign keys first; the schemas expect real integer ids.
+        candidates, rejected = [], 0
+        for record in batch:
+            legacy_id = record.pop("legacy_id", None)
+            record_id = record.pop("id", None)
+            if legacy_id is None:
+                legacy_id = record_id
+            legacy_id = str(legacy_id) if legacy_id is not None else None
+
+            missing = {}
+            for field, target in entity["foreign_keys"].items():
+                value = record.get(field)
+                if value is None:
+                    continue
+                mapped = id_maps[target].get(str(value))
+                if mapped is None:
+                    missing[field] = [f"Unknown {target} legacy id {value}."]
+                else:
+                    record[field] = mapped
+            if missing:
+                self._reject(name, legacy_id, missing)
+                rejected += 1
+            else:
+                candidates.append((legacy_id, record))
+
+        errors = schema.validate([record for _, record in candidates])
+        for i, messages in errors.items():
+            self._reject(name, candidates[i][0], messages)
+        rejected += len(errors)
+        valid = [candidate for i, candidate in enumerate(candidates) if i not in errors]
+
+        rows, row_legacy_ids = [], []
+        for (legacy_id, _), loaded in zip(valid, schema.load([record for _, record in valid])):
+            loaded.pop("mechanics", None)
+            for column, normalize in entity["normalize"].items():
+                if column in loaded:
+                    loaded[column] = normalize(loaded[column])
+            rows.append(loaded)
+            row_legacy_ids.append(legacy_id)
+
+        if not rows:
+            return 0, rejected
+
+        if model is Customers and not self.passwords_hashed:
+            for row, hashed in zip(rows, self._hash_passwords([row["password"] for row in rows])):
+                row["password"] = hashed
+
+        # One executemany per batch; RETURNING gives the new ids in input order.
+        new_ids = db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        ).all()
+        # Bulk inserts skip the flush hook that versions the reference catalogs
+        bump_reference_versions(db.session, catalog_names(model))
+        db.session.commit()
+
+        for legacy_id, new_id in zip(row_legacy_ids, new_ids):
+            if legacy_id is not None:
+                id_maps[name][legacy_id] = new_id
+        return len(rows), rejected
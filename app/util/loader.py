@@ -0,0 +1,86 @@
+from flask import g
+from sqlalchemy import select
+from app.models import db, Customers, Mechanics, Part, InventoryPartDescription, ServiceTickets
+
+# Request-scoped batching primary-key loader (the "DataLoader" pattern).
+#
+# Code that needs several rows of one model by id asks the model's loader for
+# them; all ids that aren't cached yet are fetched with one
+# SELECT ... WHERE id IN (...) and remembered for the rest of the request.
+# Loaded objects live in the session's identity map, so many-to-one lazy
+# loads (part.inventory_description, ticket.customer) that point at them are
+# served without SQL, which is what prefetch() relies on.
+#
+# Loaders are kept on flask.g and dropped at the end of each request (and by
+# the outbox worker after each batch), so they never outlive the session
+# state they were built from.
+
+LOADABLE_MODELS = (Customers, Mechanics, Part, InventoryPartDescription, ServiceTickets)
+
+# Stay well under SQLite's bound-parameter limit
+MAX_IN_PARAMS = 500
+
+
+class BatchLoader:
+    def __init__(self, model):
+        self.model = model
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, *objects):
+        """Seed the cache with already-loaded objects."""
+        for obj in objects:
+            if obj is not None:
+                self._cache[obj.id] = obj
+
+    def want(self, *ids):
+        """Queue ids to be fetched with the next load."""
+        self._pending.update(id_ for id_ in ids if id_ is not None and id_ not in self._cache)
+
+    def _dispatch(self):
+        pending = sorted(self._pending)
+        self._pending.clear()
+        for start in range(0, len(pending), MAX_IN_PARAMS):
+            chunk = pending[start:start + MAX_IN_PARAMS]
+            found = {obj.id: obj for obj in db.session.scalars(select(self.model).where(self.model.id.in_(chunk)))}
+            for id_ in chunk:
+                # Remember misses too, so a missing id is not queried again
+                self._cache[id_] = found.get(id_)
+
+    def load(self, id_):
+        """The object with primary key ``id_`` or None (fetched together with anything queued)."""
+        self.want(id_)
+        if self._pending:
+            self._dispatch()
+        return self._cache.get(id_)
+
+    def load_many(self, ids):
+        """Objects for ``ids`` in the same order (None where missing), in at most one query per chunk."""
+        ids = list(ids)
+        self.want(*ids)
+        if self._pending:
+            self._dispatch()
+        return [self._cache.get(id_) for id_ in ids]
+
+
+def get_loader(model):
+    """The current request's BatchLoader for ``model``."""
+    if model not in LOADABLE_MODELS:
+        raise ValueError(f"No batch loader for {model.__name__}.")
+    loaders = g.setdefault("batch_loaders", {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = BatchLoader(model)
+    return loader
+
+
+def prefetch(objects, foreign_key, model):
+    """
+    Load the ``model`` rows referenced by ``foreign_key`` on ``objects`` in one
+    query, so serializing their many-to-one relationship doesn't query per row.
+    """
+    get_loader(model).load_many({getattr(obj, foreign_key) for obj in objects} - {None})
+
+
+def reset_loaders(exc=None):
+    g.pop("batch_loaders", None)
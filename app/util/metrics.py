@@ -0,0 +1,40 @@
+import threading
+from collections import Counter
+
+
+class Metrics:
+    """
+    Tiny in-process counter registry.
+
+    Counters are identified by a name plus a set of labels, e.g.
+    ``metrics.incr("ratelimit_decisions", endpoint="parts_bp.read_all_parts", decision="allowed")``.
+    Values are per process; scrape every worker (or sum them) for totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    def get(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def snapshot(self, name=None):
+        with self._lock:
+            items = list(self._counters.items())
+        return [
+            {"name": metric_name, "labels": dict(labels), "value": value}
+            for (metric_name, labels), value in sorted(items)
+            if name is None or metric_name == name
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,145 @@
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, delete, exists
+from sqlalchemy.orm import aliased
+from app.models import db, OutboxEvent
+from app.util.metrics import metrics
+from app.util.loader import reset_loaders
+from app.util.reference import reset_reference_versions
+
+# Transactional outbox.
+#
+# Route handlers call ``emit(topic, payload)`` before they commit, so the
+# event is stored atomically with the change it describes. The worker
+# (``flask outbox run``) claims due events in batches with
+# SELECT ... FOR UPDATE SKIP LOCKED, so several workers can drain the table
+# side by side, and hands each one to the handlers registered for its topic.
+#
+# Delivery is at-least-once: an event is marked processed in the same
+# transaction as its handlers' database writes, so those are applied exactly
+# once, but handlers with outside side effects may see an event again after
+# a crash and must tolerate that.
+#
+# Events about the same ticket are delivered in the order they were emitted:
+# an event is only claimed once every earlier event for its ticket has been
+# processed, so a failing ticket.completed holds back the ticket.reopened
+# behind it until it succeeds. After OUTBOX_MAX_ATTEMPTS failures an event
+# is marked dead (dead_at) and stops blocking its ticket.
+
+TOPICS = ("ticket.completed", "ticket.reopened", "part.consumed", "mechanic.assigned")
+
+_handlers = defaultdict(list)
+
+
+def _utcnow():
+    # Naive UTC; SQLite has no timezone-aware DateTime.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def handler(topic):
+    """Register the decorated function(payload) to run for every ``topic`` event."""
+    if topic not in TOPICS:
+        raise ValueError(f"Unknown outbox topic '{topic}'.")
+
+    def register(f):
+        _handlers[topic].append(f)
+        return f
+
+    return register
+
+
+def emit(topic, payload):
+    """Add an event to the current session; it is stored when the caller commits."""
+    if topic not in TOPICS:
+        raise ValueError(f"Unknown outbox topic '{topic}'.")
+    now = _utcnow()
+    event = OutboxEvent(topic=topic, payload=payload, created_at=now, available_at=now, attempts=0,
+                        ticket_id=payload.get("ticket_id"))
+    db.session.add(event)
+    return event
+
+
+def _retry_delay(attempts):
+    # 2s, 4s, 8s ... capped at 10 minutes
+    return timedelta(seconds=min(2 ** attempts, 600))
+
+
+def drain(batch_size=100):
+    """
+    Deliver one batch of due events and commit. Returns the number of events
+    claimed (0 when the outbox is empty).
+    """
+    max_attempts = current_app.config.get("OUTBOX_MAX_ATTEMPTS", 10)
+    now = _utcnow()
+    earlier = aliased(OutboxEvent)
+    events = db.session.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.processed_at.is_(None), OutboxEvent.dead_at.is_(None), OutboxEvent.available_at <= now,
+               # Head of its ticket's queue only (also across workers: the
+               # earlier event's row is visible even while another worker holds it)
+               ~exists().where(earlier.ticket_id == OutboxEvent.ticket_id, earlier.id < OutboxEvent.id,
+                               earlier.processed_at.is_(None), earlier.dead_at.is_(None)))
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    for event in events:
+        try:
+            # A savepoint per event: one failing handler must not undo the rest of the batch
+            with db.session.begin_nested():
+                for f in _handlers.get(event.topic, ()):
+                    f(event.payload)
+        except Exception:
+            event.attempts += 1
+            event.last_error = traceback.format_exc(limit=5)
+            if event.attempts >= max_attempts:
+                event.dead_at = _utcnow()
+                metrics.incr("outbox_events", topic=event.topic, outcome="dead")
+                current_app.logger.exception("Outbox event %s (%s) is dead after %s attempts",
+                                             event.id, event.topic, event.attempts)
+            else:
+                event.available_at = _utcnow() + _retry_delay(event.attempts)
+                metrics.incr("outbox_events", topic=event.topic, outcome="failed")
+                current_app.logger.exception("Outbox event %s (%s) failed", event.id, event.topic)
+        else:
+            event.processed_at = _utcnow()
+            metrics.incr("outbox_events", topic=event.topic, outcome="delivered")
+
+    db.session.commit()
+    # Handlers may have used batch loaders; don't carry them into the next
+    # batch, and re-check the reference catalog versions there
+    reset_loaders()
+    reset_reference_versions()
+    return len(events)
+
+
+def run_worker(batch_size=100, poll_interval=1.0, once=False):
+    """
+    Drain the outbox until it is empty (``once``) or forever, sleeping
+    ``poll_interval`` seconds whenever there is nothing to do. Returns the
+    number of events claimed.
+    """
+    total = 0
+    while True:
+        claimed = drain(batch_size)
+        total += claimed
+        # Not "< batch_size": a batch holds one event per ticket, so later
+        # events for the same tickets may be due right after it
+        if claimed == 0:
+            if once:
+                return total
+            time.sleep(poll_interval)
+
+
+def prune(older_than=timedelta(days=7)):
+    """Delete events processed before ``older_than`` ago. Returns the number deleted."""
+    result = db.session.execute(
+        delete(OutboxEvent).where(OutboxEvent.processed_at.is_not(None),
+                                  OutboxEvent.processed_at < _utcnow() - older_than)
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, select, literal, union_all, inspect
+from sqlalchemy.orm import Session
+from app.models import db, Part, InventoryPartDescription, normalize_code
+
+# Barcode / serial lookup for the counter terminals.
+#
+# A scanned code is a part's serial, or a part description's SKU or UPC.
+# Each of those columns is unique and equality-indexed (hash indexes on
+# Postgres), and a batch of codes is resolved with one UNION ALL query that
+# probes all three indexes. In front of that sits a per-process LRU of
+# recently scanned codes, since counters scan the same boxes over and over.
+#
+# Cached results are dropped as soon as this process commits a change to
+# the part or description they describe (or to a code they might shadow);
+# changes made by other workers show up after CODE_CACHE_TTL seconds.
+
+CODE_KINDS = ("serial", "sku", "upc")
+
+
+class CodeCache:
+    """LRU of code -> lookup result (None for unknown codes), with expiry."""
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # code -> (expires_at, result, dependencies)
+        self._dependents = {}  # ("part" | "description", id) -> {codes}
+        self._lock = threading.Lock()
+
+    def get_many(self, codes):
+        """{code: result} for the cached codes among ``codes``."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in codes:
+                entry = self._entries.get(code)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    self._drop(code)
+                    continue
+                self._entries.move_to_end(code)
+                found[code] = entry[1]
+        return found
+
+    def put(self, code, result, dependencies=()):
+        with self._lock:
+            if code in self._entries:
+                self._drop(code)
+            self._entries[code] = (time.monotonic() + self.ttl, result, tuple(dependencies))
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, set()).add(code)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, codes=(), dependencies=()):
+        with self._lock:
+            for dependency in dependencies:
+                for code in self._dependents.pop(dependency, ()):
+                    self._drop(code)
+            for code in codes:
+                self._drop(code)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, code):
+        entry = self._entries.pop(code, None)
+        if entry is None:
+            return
+        for dependency in entry[2]:
+            codes = self._dependents.get(dependency)
+            if codes is not None:
+                codes.discard(code)
+                if not codes:
+                    del self._dependents[dependency]
+
+
+def get_code_cache():
+    cache = current_app.extensions.get("part_code_cache")
+    if cache is None:
+        cache = CodeCache(max_entries=current_app.config.get("CODE_CACHE_SIZE", 10000),
+                          ttl=current_app.config.get("CODE_CACHE_TTL", 60))
+        current_app.extensions["part_code_cache"] = cache
+    return cache
+
+
+def _find(codes):
+    """{code: (kind, id)} for ``codes``, in one query over the three code indexes."""
+    query = union_all(
+        select(literal("serial").label("kind"), Part.id, Part.serial.label("code")).where(Part.serial.in_(codes)),
+        select(literal("sku"), InventoryPartDescription.id, InventoryPartDescription.sku)
+        .where(InventoryPartDescription.sku.in_(codes)),
+        select(literal("upc"), InventoryPartDescription.id, InventoryPartDescription.upc)
+        .where(InventoryPartDescription.upc.in_(codes)),
+    )
+    matches = {}
+    for kind, id_, code in db.session.execute(query):
+        # A serial wins over a SKU/UPC that happens to be spelled the same
+        if code not in matches or kind == "serial":
+            matches[code] = (kind, id_)
+    return matches
+
+
+def lookup_codes(codes, dump_part, dump_description):
+    """
+    Resolve scanned ``codes``: {normalized code: result or None}. A result is
+    {"code", "kind", "part": ..., "description": ...}; "part" is only present
+    for serials. ``dump_part`` / ``dump_description`` serialize the rows.
+    """
+    codes = list(dict.fromkeys(filter(None, map(normalize_code, codes))))
+    cache = get_code_cache()
+    results = cache.get_many(codes)
+    missing = [code for code in codes if code not in results]
+    if not missing:
+        return results
+
+    matches = _find(missing)
+    part_ids = [id_ for kind, id_ in matches.values() if kind == "serial"]
+    parts = {part.id: part for part in db.session.scalars(select(Part).where(Part.id.in_(part_ids)))} \
+        if part_ids else {}
+    desc_ids = {id_ for kind, id_ in matches.values() if kind != "serial"} | {p.desc_id for p in parts.values()}
+    descriptions = {description.id: description for description in db.session.scalars(
+        select(InventoryPartDescription).where(InventoryPartDescription.id.in_(desc_ids)))} if desc_ids else {}
+
+    for code in missing:
+        match = matches.get(code)
+        if match is None:
+            cache.put(code, None)
+            results[code] = None
+            continue
+        kind, id_ = match
+        if kind == "serial":
+            part = parts[id_]
+            result = {"code": code, "kind": kind, "part": dump_part(part),
+                      "description": dump_description(descriptions[part.desc_id])}
+            dependencies = [("part", part.id), ("description", part.desc_id)]
+        else:
+            result = {"code": code, "kind": kind, "description": dump_description(descriptions[id_])}
+            dependencies = [("description", id_)]
+        cache.put(code, result, dependencies)
+        results[code] = result
+    return results
+
+
+# --- Invalidation ---
+
+def _codes_touched(obj, columns):
+    """Old and new values of ``obj``'s code columns."""
+    state = inspect(obj)
+    codes = set()
+    for column in columns:
+        history = state.attrs[column].history
+        codes.update(history.added or ())
+        codes.update(history.deleted or ())
+        codes.add(getattr(obj, column))
+    codes.discard(None)
+    return codes
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_code_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Part):
+            dependency, columns = ("part", obj.id), ("serial",)
+        elif isinstance(obj, InventoryPartDescription):
+            dependency, columns = ("description", obj.id), ("sku", "upc")
+        else:
+            continue
+        changes = session.info.setdefault("code_changes", (set(), set()))
+        changes[0].update(_codes_touched(obj, columns))
+        changes[1].add(dependency)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed_codes(session):
+    changes = session.info.pop("code_changes", None)
+    if not changes:
+        return
+    try:
+        cache = current_app.extensions.get("part_code_cache")
+    except RuntimeError:
+        # Committed outside an app context (scripts); nothing to update.
+        return
+    if cache is not None:
+        cache.invalidate(codes=changes[0], dependencies=changes[1])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_code_changes(session):
+    session.info.pop("code_changes", None)
@@ -0,0 +1,124 @@
+from datetime import date
+from sqlalchemy import text, select, func, exists
+from app.models import db, Base, PARTITIONED_TABLES
+
+# Monthly partitions for the range-partitioned tables (Postgres only; see
+# PARTITIONED_TABLES in app/models.py).
+#
+# `flask partitions create` (run from cron) makes sure a partition exists
+# for every month from --start (default: this month) through
+# PARTITION_MONTHS_AHEAD months from now, so new tickets never land in the
+# DEFAULT partition. Rows already sitting in DEFAULT for a month being
+# created (backdated imports, or a month the job missed) are moved into the
+# new partition in the same transaction: DEFAULT is detached while that
+# happens because Postgres refuses to create a partition whose range
+# overlaps rows in the default one.
+#
+# The price of partitioning is referential integrity on Postgres: the
+# foreign keys into a partitioned table are not created, and its id is only
+# unique together with the partition key. `flask partitions check` (run
+# from cron) stands in for them and reports rows pointing at tickets that
+# don't exist, and ids that occur more than once.
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table_name, month):
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def existing_partitions(table_name):
+    return set(db.session.scalars(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table_name}))
+
+
+def _create_partition(table_name, column, month):
+    name = partition_name(table_name, month)
+    default = f"{table_name}_default"
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    in_range = f"{column} >= :lower AND {column} < :upper"
+    create = (f"CREATE TABLE {name} PARTITION OF {table_name} "
+              f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')")
+
+    stranded = db.session.scalar(text(f"SELECT count(*) FROM {default} WHERE {in_range}"), bounds)
+    if not stranded:
+        db.session.execute(text(create))
+        return
+    db.session.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {default}"))
+    db.session.execute(text(create))
+    db.session.execute(text(f"INSERT INTO {table_name} SELECT * FROM {default} WHERE {in_range}"), bounds)
+    db.session.execute(text(f"DELETE FROM {default} WHERE {in_range}"), bounds)
+    db.session.execute(text(f"ALTER TABLE {table_name} ATTACH PARTITION {default} DEFAULT"))
+
+
+def create_partitions(months_ahead, start=None, today=None):
+    """
+    Create the missing monthly partitions from ``start``'s month (default:
+    ``today``'s) through ``months_ahead`` months after ``today``. Returns the
+    names of the partitions created; always empty off Postgres.
+    """
+    if db.session.get_bind().dialect.name != "postgresql":
+        return []
+    today = today or date.today()
+    first = month_start(start or today)
+    last = add_months(month_start(today), months_ahead)
+
+    created = []
+    for table_name, column in PARTITIONED_TABLES.items():
+        existing = existing_partitions(table_name)
+        month = first
+        while month <= last:
+            if partition_name(table_name, month) not in existing:
+                _create_partition(table_name, column, month)
+                created.append(partition_name(table_name, month))
+            month = add_months(month, 1)
+    db.session.commit()
+    return created
+
+
+def partitioned_references():
+    """
+    ``(table, column, referenced column)`` for every foreign key into a
+    partitioned table, i.e. the ones left out of the Postgres DDL.
+    """
+    references = []
+    for table in Base.metadata.sorted_tables:
+        for foreign_key in table.foreign_keys:
+            if foreign_key.column.table.name in PARTITIONED_TABLES:
+                references.append((table, foreign_key.parent, foreign_key.column))
+    return references
+
+
+def check_references():
+    """
+    Integrity problems the missing constraints would have caught, as
+    ``{"parts.ticket_id": orphaned rows, ..., "service_tickets.id": duplicated
+    ids}``. Only non-zero counts are returned; works on any backend.
+    """
+    problems = {}
+    for table, column, referred in partitioned_references():
+        orphans = db.session.scalar(
+            select(func.count()).select_from(table)
+            .where(column.is_not(None), ~exists().where(referred == column))
+        )
+        if orphans:
+            problems[f"{table.name}.{column.name}"] = orphans
+    for name in PARTITIONED_TABLES:
+        table = Base.metadata.tables[name]
+        duplicated = db.session.scalar(select(func.count()).select_from(
+            select(table.c.id).group_by(table.c.id).having(func.count() > 1).subquery()
+        ))
+        if duplicated:
+            problems[f"{name}.id"] = duplicated
+    return problems
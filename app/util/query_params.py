@@ -0,0 +1,138 @@
+import re
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import load_only
+
+# ?filter[customer_id]=5   ?filter[service_date][gte]=2026-01-01   ?filter[status][in]=Assigned,In Progress
+FILTER_PARAM = re.compile(r"^filter\[(\w+)\](?:\[(\w+)\])?$")
+
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, value: column.in_(value),
+}
+
+# Never selectable through ?fields=
+HIDDEN_FIELDS = {"password"}
+
+
+class QueryParamError(ValueError):
+    pass
+
+
+def _coerce(column, raw):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    try:
+        if python_type is date:
+            return date.fromisoformat(raw)
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type in (int, float):
+            return python_type(raw)
+    except ValueError:
+        raise QueryParamError(f"Invalid value '{raw}' for {column.key}.")
+    return raw
+
+
+def _queryable_column(model, name, purpose):
+    # Only columns listed in the model's __queryable__ (all indexed) can be filtered or sorted on,
+    # so clients can't push full-table scans onto the database.
+    if name not in getattr(model, "__queryable__", ()):
+        allowed = ", ".join(getattr(model, "__queryable__", ())) or "none"
+        raise QueryParamError(f"Cannot {purpose} on '{name}'. Allowed fields: {allowed}.")
+    return getattr(model, name)
+
+
+def _filters(model, args):
+    clauses = []
+    for key in args:
+        match = FILTER_PARAM.match(key)
+        if not match:
+            continue
+        name, op = match.group(1), match.group(2) or "eq"
+        if op not in OPERATORS:
+            raise QueryParamError(f"Unknown filter operator '{op}'. Allowed: {', '.join(OPERATORS)}.")
+        column = _queryable_column(model, name, "filter")
+        for raw in args.getlist(key):
+            if op == "in":
+                value = [_coerce(column, item) for item in raw.split(",") if item != ""]
+            else:
+                value = _coerce(column, raw)
+            clauses.append(OPERATORS[op](column, value))
+    return clauses
+
+
+def _ordering(model, sort):
+    ordering = []
+    for item in sort.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith("-")
+        column = _queryable_column(model, item.lstrip("-+"), "sort")
+        ordering.append(column.desc() if descending else column.asc())
+    return ordering
+
+
+def _fields(model, schema, raw):
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in schema.fields or name in HIDDEN_FIELDS]
+    if unknown:
+        raise QueryParamError(f"Unknown fields: {', '.join(unknown)}.")
+    columns = {attr.key for attr in inspect(model).column_attrs}
+    return fields, [getattr(model, name) for name in fields if name in columns]
+
+
+def apply_list_params(model, args, schema, query=None):
+    """
+    Compile ``filter[...]``, ``sort`` and ``fields`` query parameters into a
+    select for ``model``.
+
+    Returns ``(statement, schema)``. When ``fields`` is given, the statement
+    only loads those columns and the returned schema only dumps them;
+    otherwise ``schema`` is returned unchanged. Raises QueryParamError on any
+    unknown field, operator or malformed value.
+    """
+    query = query if query is not None else select(model)
+
+    clauses = _filters(model, args)
+    if clauses:
+        query = query.where(*clauses)
+
+    sort = args.get("sort")
+    if sort:
+        query = query.order_by(*_ordering(model, sort))
+
+    raw_fields = args.get("fields")
+    if raw_fields:
+        fields, columns = _fields(model, schema, raw_fields)
+        if columns:
+            query = query.options(load_only(*columns))
+        schema = type(schema)(many=schema.many, only=fields)
+
+    return query, schema
+
+
+# Reports over service_tickets always get a bounded date range, so on
+# Postgres they only scan the matching monthly partitions.
+def date_window(args, default_days, today=None):
+    """
+    ``(start, end)`` dates from the ``start``/``end`` query parameters
+    (YYYY-MM-DD, both inclusive). ``end`` defaults to today and ``start`` to
+    ``default_days`` before ``end``.
+    """
+    try:
+        end = date.fromisoformat(args["end"]) if args.get("end") else (today or date.today())
+        start = date.fromisoformat(args["start"]) if args.get("start") else end - timedelta(days=default_days)
+    except ValueError:
+        raise QueryParamError("start and end must be dates (YYYY-MM-DD).")
+    if start > end:
+        raise QueryParamError("start must not be after end.")
+    return start, end
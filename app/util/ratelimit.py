@@ -0,0 +1,303 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from urllib.parse import urlparse
+
+from flask import current_app, request
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage
+from limits.storage.base import MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+from app.util.auth import get_token_claims
+from app.util.metrics import metrics
+
+# Used when the app config has no RATELIMIT_POLICY at all.
+FALLBACK_RATE_LIMIT = "200 per day;50 per hour"
+
+
+def rate_limit_key():
+    """
+    Key function for the limiter.
+
+    Authenticated requests are counted against the JWT subject so a user
+    can't dodge limits by hopping between IPs (and a shop full of users
+    behind one NAT doesn't share a single bucket). Anonymous traffic falls
+    back to the remote address.
+    """
+    claims = get_token_claims()
+    if claims and claims.get("sub"):
+        return f"user:{claims.get('role', 'user')}:{claims['sub']}"
+    return f"ip:{get_remote_address()}"
+
+
+def request_role():
+    """Role claimed by the bearer token, or "anonymous". No DB access, no body parsing."""
+    claims = get_token_claims()
+    if not claims:
+        return "anonymous"
+    return claims.get("role") or "anonymous"
+
+
+def resolve_policy_limit(policy, endpoint, role):
+    """
+    Pick the limit string for ``endpoint`` and ``role`` from a policy mapping.
+
+    Lookup goes endpoint ("parts_bp.read_all_parts"), then blueprint
+    ("parts_bp"), then "default"; inside each entry the role wins over "*".
+    """
+    candidates = []
+    if endpoint:
+        candidates.append(endpoint)
+        if "." in endpoint:
+            candidates.append(endpoint.rsplit(".", 1)[0])
+    candidates.append("default")
+
+    for name in candidates:
+        entry = policy.get(name)
+        if not entry:
+            continue
+        if role in entry:
+            return entry[role]
+        if "*" in entry:
+            return entry["*"]
+    return FALLBACK_RATE_LIMIT
+
+
+def policy_limit():
+    """Dynamic limit provider: evaluated by the limiter in before_request for every request."""
+    policy = current_app.config.get("RATELIMIT_POLICY")
+    if not policy:
+        return FALLBACK_RATE_LIMIT
+    return resolve_policy_limit(policy, request.endpoint, request_role())
+
+
+def record_rate_limit_decision(response):
+    """after_request hook that counts allowed/rejected limiter decisions per endpoint and role."""
+    from app.extensions import limiter
+
+    if response.status_code == 429:
+        decision = "rejected"
+    elif limiter.current_limit is not None:
+        decision = "allowed"
+    else:
+        # Exempt or unlimited route, nothing was checked
+        return response
+
+    metrics.incr("ratelimit_decisions", endpoint=request.endpoint or "unknown",
+                 role=request_role(), decision=decision)
+    return response
+
+
+class SQLiteStorage(Storage, MovingWindowSupport, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Rate limit storage backed by a SQLite file.
+
+    Every gunicorn worker on the same host opens the same file, so counters
+    are shared between workers and survive restarts without running Redis.
+    Each check-and-increment runs inside a single ``BEGIN IMMEDIATE``
+    transaction, which is what keeps concurrent workers from overshooting a
+    limit.
+
+    Expired rows are only removed per key on the hot path, and sliding-window
+    keys change every period, so each worker also sweeps both tables globally
+    at most once every ``sweep_interval`` seconds, inside a write it was
+    doing anyway.
+
+    Usage: ``RATELIMIT_STORAGE_URI = "sqlite:////var/run/app/ratelimit.db"``
+    (``RATELIMIT_STORAGE_OPTIONS = {"sweep_interval": 60}`` to tune the sweep)
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, timeout=5.0, sweep_interval=60.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri or "sqlite:///ratelimit.db")
+        # sqlite:///relative.db -> "relative.db", sqlite:////abs/path.db -> "/abs/path.db"
+        self.path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+        self.timeout = float(timeout)
+        self.sweep_interval = float(sweep_interval)
+        self._next_sweep = 0.0
+        self._local = threading.local()
+        self._initialize()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    # --- connection handling ---
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        # Connections must not be shared across a fork (gunicorn preload)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _initialize(self):
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_counters ("
+            "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_log ("
+            "key TEXT NOT NULL, ts REAL NOT NULL, expires_at REAL NOT NULL DEFAULT 0)"
+        )
+        # Files created before the sweep existed: their log rows get expires_at 0
+        # and go at the first sweep, shortening any window in flight once
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(rate_limit_log)")]
+        if "expires_at" not in columns:
+            conn.execute("ALTER TABLE rate_limit_log ADD COLUMN expires_at REAL NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_log_key_ts ON rate_limit_log (key, ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_log_expires ON rate_limit_log (expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_counters_expires ON rate_limit_counters (expires_at)")
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection())
+
+    def _sweep(self, conn, now):
+        deleted = conn.execute("DELETE FROM rate_limit_counters WHERE expires_at <= ?", (now,)).rowcount
+        deleted += conn.execute("DELETE FROM rate_limit_log WHERE expires_at <= ?", (now,)).rowcount
+        self._next_sweep = now + self.sweep_interval
+        return deleted
+
+    def _maybe_sweep(self, conn, now):
+        if now >= self._next_sweep:
+            self._sweep(conn, now)
+
+    def sweep(self):
+        """Delete every expired counter and log row now. Returns the number of rows deleted."""
+        now = time.time()
+        with self._transaction() as conn:
+            return self._sweep(conn, now)
+
+    # --- fixed window ---
+
+    def _incr(self, conn, key, expiry, amount, now):
+        self._maybe_sweep(conn, now)
+        conn.execute("DELETE FROM rate_limit_counters WHERE key = ? AND expires_at <= ?", (key, now))
+        row = conn.execute(
+            "INSERT INTO rate_limit_counters (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value "
+            "RETURNING value",
+            (key, amount, now + expiry),
+        ).fetchone()
+        return row[0]
+
+    def _get(self, conn, key, now):
+        row = conn.execute(
+            "SELECT value FROM rate_limit_counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key, expiry, amount=1):
+        with self._transaction() as conn:
+            return self._incr(conn, key, expiry, amount, time.time())
+
+    def get(self, key):
+        return self._get(self._connection(), key, time.time())
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limit_counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            count = conn.execute("DELETE FROM rate_limit_counters").rowcount
+            count += conn.execute("DELETE FROM rate_limit_log").rowcount
+        return count
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_limit_counters WHERE key = ?", (key,))
+            conn.execute("DELETE FROM rate_limit_log WHERE key = ?", (key,))
+
+    # --- moving window (sliding window log) ---
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            self._maybe_sweep(conn, now)
+            conn.execute("DELETE FROM rate_limit_log WHERE key = ? AND ts <= ?", (key, now - expiry))
+            (count,) = conn.execute("SELECT COUNT(*) FROM rate_limit_log WHERE key = ?", (key,)).fetchone()
+            if count + amount > limit:
+                return False
+            conn.executemany("INSERT INTO rate_limit_log (key, ts, expires_at) VALUES (?, ?, ?)",
+                             [(key, now, now + expiry)] * amount)
+            return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._connection().execute(
+            "SELECT MIN(ts), COUNT(*) FROM rate_limit_log WHERE key = ? AND ts > ?", (key, now - expiry)
+        ).fetchone()
+        return (oldest if count else now), count
+
+    # --- sliding window counter ---
+
+    def _sliding_window_info(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        if previous_count == 0:
+            previous_ttl = float(0)
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            previous_count, previous_ttl, current_count, _ = self._sliding_window_info(conn, key, expiry, now)
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted_count) + amount > limit:
+                return False
+            # The read and the increment share one write transaction, so no
+            # other worker can slip a hit in between.
+            _, current_key = self.sliding_window_keys(key, expiry, now)
+            self._incr(conn, current_key, 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._sliding_window_info(self._connection(), key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_limit_counters WHERE key IN (?, ?)", (previous_key, current_key))
+
+
+class _ImmediateTransaction:
+    """Takes the SQLite write lock up front so check-and-increment is atomic across processes."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,185 @@
+import threading
+from typing import NamedTuple
+from flask import current_app, g
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from app.models import db, ReferenceVersion, InventoryPartDescription, Mechanics
+
+# In-process snapshots of the reference catalogs: the parts catalog
+# (inventory part descriptions) and the mechanics roster.
+#
+# Each catalog is held as {id: record} of small immutable NamedTuples,
+# tagged with the catalog's version from reference_versions. Any flush that
+# inserts, changes or deletes a catalog row bumps that version in the same
+# transaction, as do bulk statements through bump_reference_versions(), so
+# a snapshot is current exactly when its version matches the database's.
+#
+# The versions are read with one query the first time a request asks for a
+# catalog and kept on flask.g until the request ends (and by the outbox
+# worker until the end of each batch), so a request sees one consistent
+# catalog and pays at most one small read for it. A stale catalog is
+# reloaded whole, which is cheap next to how rarely it changes.
+
+
+class PartDescriptionRecord(NamedTuple):
+    id: int
+    name: str
+    price: float
+    sku: str
+    upc: str
+
+
+class MechanicRecord(NamedTuple):
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    role: str
+    active: bool
+
+
+def _load_parts():
+    query = select(InventoryPartDescription.id, InventoryPartDescription.name, InventoryPartDescription.price,
+                   InventoryPartDescription.sku, InventoryPartDescription.upc)
+    return {row.id: PartDescriptionRecord(*row) for row in db.session.execute(query)}
+
+
+def _load_mechanics():
+    query = select(Mechanics.id, Mechanics.first_name, Mechanics.last_name, Mechanics.email, Mechanics.role,
+                   Mechanics.deleted_at)
+    return {row.id: MechanicRecord(*row[:-1], active=row.deleted_at is None) for row in db.session.execute(query)}
+
+
+# catalog name -> (model whose rows make up the catalog, loader)
+CATALOGS = {
+    "parts": (InventoryPartDescription, _load_parts),
+    "mechanics": (Mechanics, _load_mechanics),
+}
+
+
+class ReferenceCache:
+    """Latest snapshot of each catalog: name -> (version, {id: record})."""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, version):
+        """The snapshot of ``name`` at ``version``, or None if the one held is for another version."""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or snapshot[0] != version:
+            return None
+        return snapshot[1]
+
+    def put(self, name, version, records):
+        with self._lock:
+            current = self._snapshots.get(name)
+            # A request that read an older version must not replace a newer snapshot
+            if current is None or current[0] <= version:
+                self._snapshots[name] = (version, records)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+def get_reference_cache():
+    cache = current_app.extensions.get("reference_cache")
+    if cache is None:
+        cache = current_app.extensions["reference_cache"] = ReferenceCache()
+    return cache
+
+
+def reference_versions():
+    """{catalog name: version}, read from the database at most once per request."""
+    versions = g.get("reference_versions")
+    if versions is None:
+        versions = dict(db.session.execute(select(ReferenceVersion.name, ReferenceVersion.version)).all())
+        g.reference_versions = versions
+    return versions
+
+
+def reset_reference_versions(exc=None):
+    g.pop("reference_versions", None)
+
+
+def snapshot(name):
+    """{id: record} for catalog ``name``, reloaded only if its version moved."""
+    version = reference_versions().get(name, 0)
+    cache = get_reference_cache()
+    records = cache.get(name, version)
+    if records is None:
+        records = CATALOGS[name][1]()
+        cache.put(name, version, records)
+    return records
+
+
+def part_catalog():
+    """{description id: PartDescriptionRecord}"""
+    return snapshot("parts")
+
+
+def mechanic_roster():
+    """{mechanic id: MechanicRecord}, including soft-deleted mechanics (active=False)."""
+    return snapshot("mechanics")
+
+
+# --- Versioning ---
+
+def catalog_names(model):
+    """Names of the catalogs made of ``model``'s rows."""
+    return {name for name, (catalog_model, _) in CATALOGS.items() if catalog_model is model}
+
+
+def bump_reference_versions(session, names):
+    """
+    Move the versions of catalogs ``names`` in ``session``'s transaction.
+    Flushes do this on their own; bulk INSERT/UPDATE statements, which skip
+    the flush, have to call it.
+    """
+    # One bump per catalog per transaction is enough
+    bumped = session.info.setdefault("reference_bumped", set())
+    names = set(names) - bumped
+    if not names:
+        return
+    connection = session.connection()
+    for name in sorted(names):
+        updated = connection.execute(
+            update(ReferenceVersion).where(ReferenceVersion.name == name)
+            .values(version=ReferenceVersion.version + 1)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(ReferenceVersion).values(name=name, version=1))
+        bumped.add(name)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_changed_catalogs(session, flush_context):
+    changed = set()
+    for name, (model, _) in CATALOGS.items():
+        if any(isinstance(obj, model) for obj in list(session.new) + list(session.deleted)):
+            changed.add(name)
+        # Relationship-only changes (a part added to a description, a ticket
+        # to a mechanic) don't touch the catalog's columns
+        elif any(isinstance(obj, model) and session.is_modified(obj, include_collections=False)
+                 for obj in session.dirty):
+            changed.add(name)
+    if changed:
+        bump_reference_versions(session, changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_reference_versions(session):
+    if not session.info.pop("reference_bumped", None):
+        return
+    try:
+        # Later reads in this request must see the new versions
+        reset_reference_versions()
+    except RuntimeError:
+        # Committed outside an app context (scripts); nothing to reset.
+        return
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_reference_changes(session):
+    session.info.pop("reference_bumped", None)
@@ -0,0 +1,175 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, update, or_, func
+from app.models import db, Part, PartReservation, InventoryPartDescription
+from app.util.outbox import emit
+
+# Time-limited holds on stock.
+#
+# A ticket reserves N units of a part description; N free Part rows are
+# claimed with SELECT ... FOR UPDATE OF parts SKIP LOCKED and pointed at the
+# reservation, so concurrent reservations for the same part each lock
+# different rows instead of queueing behind one another, and two tickets can
+# never hold or install the same unit. A unit is free when it is not
+# installed and not under a live hold: a hold whose expires_at has passed
+# frees its units at once, so correctness doesn't wait for the sweeper.
+#
+# The sweeper (``flask reservations sweep``) walks the
+# (status, expires_at) index, marks lapsed holds expired and clears their
+# units' reservation_id.
+
+class ReservationError(Exception):
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _utcnow():
+    # Naive UTC; SQLite has no timezone-aware DateTime.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def is_active(reservation, now=None):
+    return reservation.status == "held" and reservation.expires_at > (now or _utcnow())
+
+
+def _state(reservation):
+    return "expired" if reservation.status == "held" else reservation.status
+
+
+def _free_units(desc_id, now):
+    """Parts of ``desc_id`` that are neither installed nor under a live hold."""
+    return (
+        select(Part)
+        .outerjoin(PartReservation, PartReservation.id == Part.reservation_id)
+        .where(Part.desc_id == desc_id, Part.ticket_id.is_(None),
+               or_(Part.reservation_id.is_(None), PartReservation.status != "held",
+                   PartReservation.expires_at <= now))
+    )
+
+
+def available_units(desc_id):
+    """How many units of ``desc_id`` could be reserved right now."""
+    return db.session.scalar(select(func.count()).select_from(_free_units(desc_id, _utcnow()).subquery()))
+
+
+def reserve(ticket, desc_id, quantity, ttl):
+    """
+    Hold ``quantity`` free units of ``desc_id`` for ``ticket`` until now + ``ttl`` (a timedelta).
+    Raises ReservationError (404 unknown part, 409 not enough free stock).
+    The caller commits.
+    """
+    if db.session.get(InventoryPartDescription, desc_id) is None:
+        raise ReservationError(f"Part description ID {desc_id} not found.", 404)
+    now = _utcnow()
+    units = db.session.scalars(
+        _free_units(desc_id, now)
+        .order_by(Part.id)
+        .limit(quantity)
+        # Rows another transaction is reserving are skipped, not waited on
+        .with_for_update(of=Part, skip_locked=True)
+    ).all()
+    if len(units) < quantity:
+        raise ReservationError(f"Only {len(units)} unit(s) of part description ID {desc_id} are free.")
+
+    reservation = PartReservation(ticket_id=ticket.id, desc_id=desc_id, quantity=quantity, status="held",
+                                  created_at=now, expires_at=now + ttl)
+    db.session.add(reservation)
+    for unit in units:
+        # Versioned update: if the row was claimed after all (no SKIP LOCKED
+        # on this database), the commit fails instead of double-booking it
+        unit.reservation = reservation
+    return reservation
+
+
+def install_part(part, ticket):
+    """Install an in-stock unit on ``ticket`` and queue part.consumed. The caller commits."""
+    now = _utcnow()
+    part.ticket = ticket
+    # Set the column too so checks before the flush see the unit as installed
+    part.ticket_id = ticket.id
+    part.consumed_at = now
+    part.reservation = None
+    emit("part.consumed", {"ticket_id": ticket.id, "part_id": part.id, "desc_id": part.desc_id,
+                           "consumed_at": now.isoformat()})
+
+
+def release(reservation, status="released"):
+    """End a hold and put its uninstalled units back in stock. The caller commits."""
+    # Copy: unlinking a unit removes it from reservation.parts
+    for unit in list(reservation.parts):
+        if unit.ticket_id is None:
+            unit.reservation = None
+    reservation.status = status
+
+
+def fulfill(reservation, ticket):
+    """
+    Install the held units on ``ticket`` and return them. Raises
+    ReservationError if the hold is no longer live. The caller commits.
+    """
+    if not is_active(reservation):
+        raise ReservationError(f"Reservation ID {reservation.id} is {_state(reservation)}.")
+    installed = []
+    for unit in list(reservation.parts):
+        if unit.ticket_id is None:
+            install_part(unit, ticket)
+            installed.append(unit)
+        unit.reservation = None
+    reservation.status = "fulfilled"
+    return installed
+
+
+def fulfill_ticket_reservations(ticket):
+    """Install every live hold of a ticket that is being completed; lapsed ones are released."""
+    now = _utcnow()
+    for reservation in ticket.reservations:
+        if reservation.status != "held":
+            continue
+        if is_active(reservation, now):
+            fulfill(reservation, ticket)
+        else:
+            release(reservation, "expired")
+
+
+def release_ticket_reservations(ticket):
+    """Release every hold of a ticket that is being cancelled."""
+    for reservation in ticket.reservations:
+        if reservation.status == "held":
+            release(reservation)
+
+
+def blocking_hold(part, ticket):
+    """The live reservation of another ticket holding ``part``, if any."""
+    reservation = part.reservation
+    if reservation is not None and reservation.ticket_id != ticket.id and is_active(reservation):
+        return reservation
+    return None
+
+
+def sweep_expired(batch_size=500):
+    """
+    Mark lapsed holds expired and return their units to stock, one batch per
+    transaction. Returns the number of reservations expired.
+    """
+    total = 0
+    while True:
+        now = _utcnow()
+        ids = db.session.scalars(
+            select(PartReservation.id)
+            .where(PartReservation.status == "held", PartReservation.expires_at <= now)
+            .order_by(PartReservation.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return total
+        # Bump version_id by hand: a bulk UPDATE skips the ORM's version counter
+        db.session.execute(
+            update(Part)
+            .where(Part.reservation_id.in_(ids))
+            .values(reservation_id=None, version_id=Part.version_id + 1)
+        )
+        db.session.execute(update(PartReservation).where(PartReservation.id.in_(ids)).values(status="expired"))
+        db.session.commit()
+        total += len(ids)
@@ -0,0 +1,252 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, select, or_, inspect
+from sqlalchemy.orm import Session
+from app.models import db, Appointment
+
+# Scheduling for mechanics and service bays.
+#
+# Writes are checked against the database (an indexed range query per
+# resource, and on Postgres a GiST exclusion constraint as the final word).
+# Free-slot searches run against an in-memory interval index instead:
+# one sorted list of bookings per mechanic and per bay. Bookings for one
+# resource never overlap, so their starts and ends are both sorted and a
+# sorted array with bisect gives what an interval tree would (locating the
+# bookings around a time in O(log n)) with far less bookkeeping.
+
+
+class ResourceCalendar:
+    """Non-overlapping bookings of one mechanic or bay, sorted by start."""
+
+    def __init__(self):
+        self._starts = []
+        self._entries = []  # (starts_at, ends_at, appointment_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, starts_at, ends_at, appointment_id):
+        entry = (starts_at, ends_at, appointment_id)
+        position = bisect_left(self._entries, entry)
+        self._entries.insert(position, entry)
+        self._starts.insert(position, starts_at)
+
+    def remove(self, appointment_id):
+        for position, entry in enumerate(self._entries):
+            if entry[2] == appointment_id:
+                del self._entries[position]
+                del self._starts[position]
+                return
+
+    def next_free(self, t, duration, hours):
+        """Earliest start >= t of a ``duration`` gap inside working ``hours``."""
+        while True:
+            t = hours.align(t, duration)
+            position = bisect_right(self._starts, t)
+            if position and self._entries[position - 1][1] > t:
+                # Inside the previous booking: jump to its end
+                t = self._entries[position - 1][1]
+                continue
+            if position < len(self._entries) and self._starts[position] < t + duration:
+                # The next booking starts before we'd be done
+                t = self._entries[position][1]
+                continue
+            return t
+
+
+class WorkingHours:
+    def __init__(self, day_start, day_end):
+        self.day_start = datetime.strptime(day_start, "%H:%M").time()
+        self.day_end = datetime.strptime(day_end, "%H:%M").time()
+
+    def align(self, t, duration):
+        """Move ``t`` forward to the first moment a ``duration`` job fits in a working day."""
+        opens = datetime.combine(t.date(), self.day_start)
+        closes = datetime.combine(t.date(), self.day_end)
+        if t < opens:
+            t = opens
+        if t + duration > closes:
+            t = datetime.combine(t.date() + timedelta(days=1), self.day_start)
+        return t
+
+    def fits_duration(self, duration):
+        today = datetime.now().date()
+        return timedelta(0) < duration <= datetime.combine(today, self.day_end) - datetime.combine(today, self.day_start)
+
+    def fits(self, starts_at, ends_at):
+        """True if [starts_at, ends_at) lies within one working day."""
+        return (starts_at.date() == ends_at.date() and starts_at.time() >= self.day_start
+                and ends_at.time() <= self.day_end)
+
+
+class ScheduleIndex:
+    """
+    In-memory calendars for every mechanic and bay with bookings ending after
+    (now - 1 day). Loaded with one query on first use, kept current from
+    commits in this process and reloaded after ``ttl`` seconds to pick up
+    other workers' bookings.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._calendars = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        horizon = datetime.now() - timedelta(days=1)
+        rows = db.session.execute(
+            select(Appointment.id, Appointment.mechanic_id, Appointment.bay, Appointment.starts_at,
+                   Appointment.ends_at).where(Appointment.ends_at >= horizon).order_by(Appointment.starts_at)
+        ).all()
+        self.seed(rows)
+
+    def seed(self, rows):
+        """Replace all calendars with ``rows`` of (id, mechanic_id, bay, starts_at, ends_at)."""
+        calendars = {}
+        for appointment_id, mechanic_id, bay, starts_at, ends_at in rows:
+            for key in _resource_keys(mechanic_id, bay):
+                calendars.setdefault(key, ResourceCalendar()).add(starts_at, ends_at, appointment_id)
+        with self._lock:
+            self._calendars = calendars
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self._load()
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def calendar(self, key):
+        self._ensure_loaded()
+        return self._calendars.get(key) or ResourceCalendar()
+
+    def free_slots(self, mechanic_ids, duration, after, hours, bays=None, limit=5, horizon=None):
+        """See find_free_slots(); ``horizon`` is the datetime to stop looking at."""
+        horizon = horizon or after + timedelta(days=31)
+        bay_calendars = [(bay, self.calendar(("bay", bay))) for bay in (bays or [])]
+        slots = []
+        for mechanic_id in mechanic_ids:
+            calendar = self.calendar(("mechanic", mechanic_id))
+            t = after
+            while t < horizon:
+                t = calendar.next_free(t, duration, hours)
+                if not bay_calendars:
+                    slots.append((t, mechanic_id, None))
+                    break
+                # Earliest time at or after t that some bay is free; if that moves t, re-check the mechanic
+                bay_start, bay = min((bay_calendar.next_free(t, duration, hours), bay)
+                                     for bay, bay_calendar in bay_calendars)
+                if bay_start == t:
+                    slots.append((t, mechanic_id, bay))
+                    break
+                t = bay_start
+        slots = sorted(slot for slot in slots if slot[0] < horizon)
+        return slots[:limit]
+
+    def apply(self, changes):
+        """Replay committed ("remove", id, keys) / ("add", id, mechanic_id, bay, start, end) changes in order."""
+        with self._lock:
+            for change in changes:
+                if change[0] == "remove":
+                    _, appointment_id, keys = change
+                    for key in keys:
+                        if key in self._calendars:
+                            self._calendars[key].remove(appointment_id)
+                else:
+                    _, appointment_id, mechanic_id, bay, starts_at, ends_at = change
+                    for key in _resource_keys(mechanic_id, bay):
+                        self._calendars.setdefault(key, ResourceCalendar()).add(starts_at, ends_at, appointment_id)
+
+
+def _resource_keys(mechanic_id, bay):
+    keys = [("mechanic", mechanic_id)]
+    if bay is not None:
+        keys.append(("bay", bay))
+    return keys
+
+
+def get_schedule_index():
+    index = current_app.extensions.get("schedule_index")
+    if index is None:
+        index = ScheduleIndex(ttl=current_app.config.get("SCHEDULE_INDEX_TTL", 60))
+        current_app.extensions["schedule_index"] = index
+    return index
+
+
+def working_hours():
+    return WorkingHours(current_app.config.get("SCHEDULE_DAY_START", "08:00"),
+                        current_app.config.get("SCHEDULE_DAY_END", "18:00"))
+
+
+def find_conflicts(mechanic_id, bay, starts_at, ends_at, ignore_id=None):
+    """
+    Appointments that overlap the proposed booking for the same mechanic or
+    bay, from the database (authoritative; uses the per-resource indexes).
+    """
+    same_resource = Appointment.mechanic_id == mechanic_id
+    if bay is not None:
+        same_resource = or_(same_resource, Appointment.bay == bay)
+    query = select(Appointment).where(same_resource, Appointment.starts_at < ends_at,
+                                      Appointment.ends_at > starts_at)
+    if ignore_id is not None:
+        query = query.where(Appointment.id != ignore_id)
+    return db.session.scalars(query.order_by(Appointment.starts_at)).all()
+
+
+def find_free_slots(mechanic_ids, duration, after, bays=None, limit=5, horizon_days=31):
+    """
+    Earliest free slot of ``duration`` starting at or after ``after`` (or now)
+    for each mechanic in ``mechanic_ids`` (together with a free bay from
+    ``bays`` if given), soonest first. Returns [(starts_at, mechanic_id, bay)].
+    """
+    hours = working_hours()
+    if not hours.fits_duration(duration):
+        raise ValueError("The duration is longer than a working day.")
+    # The index only holds current bookings, and past slots are no use anyway
+    after = max(after, datetime.now())
+    return get_schedule_index().free_slots(mechanic_ids, duration, after, hours, bays, limit,
+                                           after + timedelta(days=horizon_days))
+
+
+# --- Keep the in-memory index in step with committed writes ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_schedule_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Appointment):
+            continue
+        changes = session.info.setdefault("schedule_changes", [])
+        if obj not in session.new:
+            # Remove it under every resource it may have been filed under before this flush
+            state = inspect(obj)
+            old_mechanic = state.attrs.mechanic_id.history.deleted or [obj.mechanic_id]
+            old_bay = state.attrs.bay.history.deleted or [obj.bay]
+            keys = set(_resource_keys(old_mechanic[0], old_bay[0]) + _resource_keys(obj.mechanic_id, obj.bay))
+            changes.append(("remove", obj.id, keys))
+        if obj not in session.deleted:
+            changes.append(("add", obj.id, obj.mechanic_id, obj.bay, obj.starts_at, obj.ends_at))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_schedule_changes(session):
+    changes = session.info.pop("schedule_changes", None)
+    if not changes:
+        return
+    try:
+        index = get_schedule_index()
+    except RuntimeError:
+        # Committed outside an app context (scripts); nothing to update.
+        return
+    if index.loaded:
+        index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_schedule_changes(session):
+    session.info.pop("schedule_changes", None)
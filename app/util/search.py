@@ -0,0 +1,141 @@
+import re
+from sqlalchemy import event, text, DDL
+from app.models import db, ServiceTickets, InventoryPartDescription
+
+# Full-text search over ticket descriptions/VINs and part names.
+#
+# SQLite (local/tests): FTS5 external-content tables kept in sync by triggers.
+# Postgres (production): GIN expression indexes over to_tsvector(...); Postgres
+# maintains them itself, so there is nothing to sync.
+#
+# Both are created by db.create_all() through the DDL hooks below. For a
+# database that already has data, run `flask search rebuild`.
+
+SEARCH_INDEXES = {
+    "service_tickets": {
+        "table": ServiceTickets.__table__,
+        "fts_table": "service_tickets_fts",
+        "columns": ("service_description", "vin"),
+    },
+    "inventory_part_descriptions": {
+        "table": InventoryPartDescription.__table__,
+        "fts_table": "inventory_part_descriptions_fts",
+        "columns": ("name",),
+    },
+}
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tsvector_sql(columns):
+    # Must stay byte-for-byte identical between the index and the queries or
+    # the planner won't use the GIN index.
+    document = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('english', {document})"
+
+
+def _sqlite_ddl(table_name, fts_table, columns):
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{table_name}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def _install_ddl(config):
+    table = config["table"]
+    fts_table = config["fts_table"]
+    columns = config["columns"]
+
+    for statement in _sqlite_ddl(table.name, fts_table, columns):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "before_drop", DDL(f"DROP TABLE IF EXISTS {fts_table}").execute_if(dialect="sqlite"))
+
+    event.listen(table, "after_create", DDL(
+        f"CREATE INDEX IF NOT EXISTS ix_{table.name}_search ON {table.name} "
+        f"USING GIN ({_tsvector_sql(columns)})"
+    ).execute_if(dialect="postgresql"))
+
+
+for _config in SEARCH_INDEXES.values():
+    _install_ddl(_config)
+
+
+def rebuild_search_indexes():
+    """(Re)create the search structures for existing tables and backfill them."""
+    bind = db.session.get_bind()
+    with bind.begin() as conn:
+        for config in SEARCH_INDEXES.values():
+            table = config["table"]
+            if conn.dialect.name == "sqlite":
+                for statement in _sqlite_ddl(table.name, config["fts_table"], config["columns"]):
+                    conn.execute(text(statement))
+                conn.execute(text(f"INSERT INTO {config['fts_table']}({config['fts_table']}) VALUES ('rebuild')"))
+            elif conn.dialect.name == "postgresql":
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table.name}_search ON {table.name} "
+                    f"USING GIN ({_tsvector_sql(config['columns'])})"
+                ))
+
+
+def _terms(query):
+    return [term.lower() for term in TOKEN.findall(query or "")]
+
+
+def search(index_name, query, page=1, per_page=20):
+    """
+    Ranked full-text search. Every term must match; the last term also
+    matches as a prefix so partial input ("civ") still finds "Civic".
+
+    Returns a list of ``(id, rank)`` tuples, best match first. Higher rank
+    is better on both backends.
+    """
+    config = SEARCH_INDEXES[index_name]
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    params = {"limit": per_page, "offset": (page - 1) * per_page}
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        params["query"] = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        vector = _tsvector_sql(config["columns"])
+        statement = text(
+            f"SELECT id, ts_rank_cd({vector}, to_tsquery('english', :query)) AS rank "
+            f"FROM {config['table'].name} "
+            f"WHERE {vector} @@ to_tsquery('english', :query) "
+            f"ORDER BY rank DESC, id LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == "sqlite":
+        # Quote every term so user input can't inject FTS5 query syntax.
+        params["query"] = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+        fts_table = config["fts_table"]
+        # bm25() is "lower is better"; negate it so callers can always sort descending.
+        statement = text(
+            f"SELECT rowid AS id, -bm25({fts_table}) AS rank FROM {fts_table} "
+            f"WHERE {fts_table} MATCH :query "
+            f"ORDER BY bm25({fts_table}), rowid LIMIT :limit OFFSET :offset"
+        )
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}.")
+
+    return [(row.id, float(row.rank)) for row in db.session.execute(statement, params)]
+
+
+def search_models(model, index_name, query, page=1, per_page=20):
+    """search() plus one IN query to load the matching rows, kept in rank order."""
+    hits = search(index_name, query, page, per_page)
+    if not hits:
+        return []
+    rows = {row.id: row for row in db.session.scalars(db.select(model).where(model.id.in_([id for id, _ in hits])))}
+    return [(rows[id], rank) for id, rank in hits if id in rows]
@@ -0,0 +1,101 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import Session
+from app.models import db, ServiceTickets, ArchivedServiceTicket, normalize_vin
+
+
+def vin_prefix_upper_bound(prefix):
+    """
+    Smallest string greater than every string starting with ``prefix``.
+
+    ``vin >= prefix AND vin < upper`` is a plain B-tree range scan, unlike
+    ``LIKE 'prefix%'`` which SQLite won't run through a case-sensitive index.
+    VINs are normalized to [A-Z0-9], so bumping the last character is safe.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class VinPrefixIndex:
+    """
+    Sorted in-memory list of distinct VINs for the autocomplete path.
+
+    Prefix lookups are a bisect plus a short slice. The list is loaded from
+    the VIN index on first use, picks up VINs committed through this process
+    as they happen, and is reloaded after ``ttl`` seconds to catch writes made
+    by other workers.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._vins = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Archived tickets keep their vehicles searchable
+        vins = union(select(ServiceTickets.vin), select(ArchivedServiceTicket.vin)).subquery()
+        vins = db.session.scalars(select(vins.c.vin).order_by(vins.c.vin)).all()
+        with self._lock:
+            self._vins = [vin for vin in vins if vin]
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self._load()
+
+    def add(self, vin):
+        if not vin or self._loaded_at is None:
+            return
+        with self._lock:
+            position = bisect_left(self._vins, vin)
+            if position == len(self._vins) or self._vins[position] != vin:
+                insort(self._vins, vin, lo=position)
+
+    def search(self, prefix, limit=20):
+        self._ensure_loaded()
+        prefix = normalize_vin(prefix)
+        with self._lock:
+            start = bisect_left(self._vins, prefix)
+            end = bisect_left(self._vins, vin_prefix_upper_bound(prefix), lo=start)
+            return self._vins[start:min(end, start + limit)]
+
+
+def get_vin_prefix_index():
+    """The app's VinPrefixIndex, or None when VIN_PREFIX_INDEX_ENABLED is off."""
+    if not current_app.config.get("VIN_PREFIX_INDEX_ENABLED", False):
+        return None
+    index = current_app.extensions.get("vin_prefix_index")
+    if index is None:
+        index = VinPrefixIndex(ttl=current_app.config.get("VIN_PREFIX_INDEX_TTL", 300))
+        current_app.extensions["vin_prefix_index"] = index
+    return index
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_vins(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ServiceTickets) and obj.vin:
+            session.info.setdefault("pending_vins", set()).add(obj.vin)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_vins(session):
+    vins = session.info.pop("pending_vins", None)
+    if not vins:
+        return
+    try:
+        index = get_vin_prefix_index()
+    except RuntimeError:
+        # Committed outside an app context (scripts); nothing to update.
+        return
+    if index is not None:
+        for vin in vins:
+            index.add(vin)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_vins(session):
+    session.info.pop("pending_vins", None)
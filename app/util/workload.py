@@ -0,0 +1,239 @@
+import heapq
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy import event, select, func, inspect
+from sqlalchemy.orm import Session
+from app.models import db, Mechanics, ServiceTickets, service_mechanics, TICKET_STATUSES
+
+# Tickets that still count against a mechanic's workload
+OPEN_TICKET_STATUSES = [status for status in TICKET_STATUSES if status not in ("Complete", "Cancelled")]
+
+
+class WorkloadBalancer:
+    """
+    Open-ticket count per mechanic, kept in a min-heap for auto-assignment.
+
+    Built from one aggregate query on first use, then kept current from the
+    session events below: assignments, removals and tickets opening or
+    closing through this process adjust the counts as they commit. Rebuilt
+    every ``ttl`` seconds to pick up changes made by other workers.
+
+    The heap uses lazy deletion: an entry is (load, mechanic_id) and is stale
+    once the mechanic's load has moved on, so adjusting a count is a push and
+    picking the least-loaded mechanic pops stale entries until a live one
+    turns up -- O(log M) amortized for M mechanics.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._loads = {}
+        self._heap = []
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        open_load = (
+            select(service_mechanics.c.mechanics_id, func.count().label("load"))
+            .join(ServiceTickets, ServiceTickets.id == service_mechanics.c.service_tickets_id)
+            .where(ServiceTickets.status.in_(OPEN_TICKET_STATUSES))
+            .group_by(service_mechanics.c.mechanics_id)
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(Mechanics.id, func.coalesce(open_load.c.load, 0))
+            .outerjoin(open_load, open_load.c.mechanics_id == Mechanics.id)
+            .where(Mechanics.role == "mechanic", Mechanics.deleted_at.is_(None))
+        ).all()
+        self.seed(dict(rows))
+
+    def seed(self, loads):
+        """Replace all counts with ``loads`` ({mechanic_id: open tickets})."""
+        with self._lock:
+            self._loads = dict(loads)
+            self._heap = [(load, mechanic_id) for mechanic_id, load in self._loads.items()]
+            heapq.heapify(self._heap)
+            self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.ttl:
+            self.rebuild()
+
+    @property
+    def built(self):
+        return self._built_at is not None
+
+    def loads(self):
+        self._ensure_built()
+        with self._lock:
+            return dict(self._loads)
+
+    def add_mechanic(self, mechanic_id):
+        with self._lock:
+            if self._built_at is not None and mechanic_id not in self._loads:
+                self._loads[mechanic_id] = 0
+                heapq.heappush(self._heap, (0, mechanic_id))
+
+    def remove_mechanic(self, mechanic_id):
+        with self._lock:
+            # Its heap entries go stale and are dropped when they surface
+            self._loads.pop(mechanic_id, None)
+
+    def adjust(self, mechanic_id, delta):
+        with self._lock:
+            if mechanic_id not in self._loads:
+                return
+            load = max(self._loads[mechanic_id] + delta, 0)
+            self._loads[mechanic_id] = load
+            heapq.heappush(self._heap, (load, mechanic_id))
+            # Stale entries outnumbering live ones: compact so the heap stays O(M)
+            if len(self._heap) > 4 * len(self._loads) + 64:
+                self._heap = [(load, mechanic_id) for mechanic_id, load in self._loads.items()]
+                heapq.heapify(self._heap)
+
+    def pick(self, exclude=()):
+        """
+        Least-loaded mechanic id not in ``exclude`` (ties go to the lowest id),
+        with its load bumped by one, or None if there is no eligible mechanic.
+        The caller must either commit the assignment or call ``adjust(id, -1)``;
+        reserve_assignment() below arranges that automatically.
+        """
+        self._ensure_built()
+        with self._lock:
+            skipped = []
+            chosen = None
+            while self._heap:
+                load, mechanic_id = self._heap[0]
+                if self._loads.get(mechanic_id) != load:
+                    heapq.heappop(self._heap)
+                elif mechanic_id in exclude:
+                    skipped.append(heapq.heappop(self._heap))
+                else:
+                    chosen = mechanic_id
+                    break
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+            if chosen is None:
+                return None
+            self._loads[chosen] += 1
+            heapq.heappush(self._heap, (self._loads[chosen], chosen))
+            return chosen
+
+
+def get_workload_balancer():
+    balancer = current_app.extensions.get("workload_balancer")
+    if balancer is None:
+        balancer = WorkloadBalancer(ttl=current_app.config.get("WORKLOAD_REBUILD_INTERVAL", 300))
+        current_app.extensions["workload_balancer"] = balancer
+    return balancer
+
+
+def reserve_assignment(ticket, exclude=()):
+    """
+    Pick the least-loaded mechanic for ``ticket`` and count the assignment
+    right away, so concurrent picks spread out. The reservation is confirmed
+    when the session commits and released if it rolls back.
+    Returns the Mechanics row or None.
+    """
+    balancer = get_workload_balancer()
+    mechanic_id = balancer.pick(exclude)
+    if mechanic_id is None:
+        return None
+    db.session.info.setdefault("workload_reserved", set()).add((ticket.id, mechanic_id))
+    mechanic = db.session.get(Mechanics, mechanic_id)
+    if mechanic is None or mechanic.deleted_at is not None:
+        # Deleted by another worker since the last rebuild
+        db.session.info["workload_reserved"].discard((ticket.id, mechanic_id))
+        balancer.remove_mechanic(mechanic_id)
+        return reserve_assignment(ticket, exclude)
+    return mechanic
+
+
+# --- Incremental maintenance ---
+
+def _status_change(state, ticket, session):
+    """(was_open, is_open) for a ticket in the flush."""
+    if ticket in session.new:
+        was_open = False
+    else:
+        history = state.attrs.status.history
+        old = history.deleted[0] if history.deleted else ticket.status
+        was_open = old in OPEN_TICKET_STATUSES
+    is_open = ticket not in session.deleted and ticket.status in OPEN_TICKET_STATUSES
+    return was_open, is_open
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_workload_deltas(session, flush_context):
+    deltas = session.info.setdefault("workload_deltas", Counter())
+    reserved = session.info.get("workload_reserved", set())
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Mechanics):
+            if obj in session.deleted or obj.deleted_at is not None:
+                deltas[("remove", obj.id)] = 1
+            elif obj in session.new and obj.role == "mechanic":
+                deltas[("add", obj.id)] = 1
+            continue
+        if not isinstance(obj, ServiceTickets):
+            continue
+
+        state = inspect(obj)
+        was_open, is_open = _status_change(state, obj, session)
+        if not was_open and not is_open:
+            continue
+        if was_open == is_open and not state.attrs.mechanic.history.has_changes():
+            # Nothing that affects anyone's load (e.g. a price update)
+            continue
+
+        # load_history() loads the collection if needed so unchanged assignments are known
+        mechanics = state.attrs.mechanic.load_history()
+        old_ids = {m.id for m in mechanics.unchanged} | {m.id for m in mechanics.deleted}
+        new_ids = {m.id for m in mechanics.unchanged} | {m.id for m in mechanics.added}
+
+        if was_open:
+            for mechanic_id in old_ids:
+                deltas[("load", mechanic_id)] -= 1
+        if is_open:
+            for mechanic_id in new_ids:
+                # Already counted when it was reserved
+                if (obj.id, mechanic_id) in reserved and mechanic_id not in old_ids:
+                    continue
+                deltas[("load", mechanic_id)] += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_workload_deltas(session):
+    deltas = session.info.pop("workload_deltas", None)
+    session.info.pop("workload_reserved", None)
+    if not deltas:
+        return
+    try:
+        balancer = get_workload_balancer()
+    except RuntimeError:
+        # Committed outside an app context (scripts); nothing to update.
+        return
+    if not balancer.built:
+        return
+    for (kind, mechanic_id), delta in deltas.items():
+        if kind == "add":
+            balancer.add_mechanic(mechanic_id)
+        elif kind == "remove":
+            balancer.remove_mechanic(mechanic_id)
+        elif delta:
+            balancer.adjust(mechanic_id, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_workload_deltas(session):
+    session.info.pop("workload_deltas", None)
+    reserved = session.info.pop("workload_reserved", None)
+    if not reserved:
+        return
+    try:
+        balancer = get_workload_balancer()
+    except RuntimeError:
+        return
+    for _, mechanic_id in reserved:
+        balancer.adjust(mechanic_id, -1)
@@ -0,0 +1,122 @@
+"""
+Latency benchmark for the appointment free-slot search.
+
+Books a month of random appointments for every mechanic and bay, then times
+/free-slots style searches (every mechanic, any bay) against the per-resource
+sorted calendars of ScheduleIndex, and against a naive search that checks
+each candidate start against every booking. No database is involved; this
+measures the search structure.
+
+    python benchmarks/schedule_benchmark.py --mechanics 50 --bays 8 --searches 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.util.schedule import ScheduleIndex, WorkingHours
+
+STEP = timedelta(minutes=15)
+
+
+def book_month(mechanics, bays, start, days, hours, seed=42):
+    """Greedy random bookings: roughly 70% utilisation, never overlapping per mechanic or bay."""
+    rng = random.Random(seed)
+    rows = []
+    busy_until = {}
+    for day in range(days):
+        opens = datetime.combine((start + timedelta(days=day)).date(), hours.day_start)
+        closes = datetime.combine(opens.date(), hours.day_end)
+        for mechanic_id in range(1, mechanics + 1):
+            t = opens + STEP * rng.randint(0, 4)
+            while True:
+                duration = STEP * rng.randint(2, 12)
+                bay = rng.randint(1, bays) if rng.random() < 0.8 else None
+                if bay is not None:
+                    t = max(t, busy_until.get(bay, opens))
+                if t + duration > closes:
+                    break
+                rows.append((len(rows) + 1, mechanic_id, bay, t, t + duration))
+                if bay is not None:
+                    busy_until[bay] = t + duration
+                t += duration + STEP * rng.randint(0, 6)
+    return rows
+
+
+def naive_free_slots(rows, mechanic_ids, duration, after, hours, bays, limit, horizon):
+    """Step through candidate starts, scanning every booking for overlaps."""
+    slots = []
+    for mechanic_id in mechanic_ids:
+        t = after
+        while t < horizon:
+            t = hours.align(t, duration)
+            end = t + duration
+
+            def free(resource):
+                return not any(r[3] < end and r[4] > t for r in rows if resource(r))
+
+            if free(lambda r: r[1] == mechanic_id):
+                bay = next((b for b in bays if free(lambda r: r[2] == b)), None)
+                if bay is not None:
+                    slots.append((t, mechanic_id, bay))
+                    break
+            t += STEP
+    return sorted(slots)[:limit]
+
+
+def timed(f, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mechanics", type=int, default=50)
+    parser.add_argument("--bays", type=int, default=8)
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--naive-searches", type=int, default=3)
+    args = parser.parse_args()
+
+    hours = WorkingHours("08:00", "18:00")
+    start = datetime(2026, 3, 2)
+    horizon = start + timedelta(days=args.days)
+    rows = book_month(args.mechanics, args.bays, start, args.days, hours)
+    index = ScheduleIndex(ttl=float("inf"))
+    index.seed(rows)
+
+    mechanic_ids = list(range(1, args.mechanics + 1))
+    bays = list(range(1, args.bays + 1))
+    rng = random.Random(7)
+    queries = [(STEP * rng.randint(2, 16), start + timedelta(hours=rng.randint(0, 24 * 7)))
+               for _ in range(max(args.searches, args.naive_searches))]
+
+    print(f"{len(rows)} appointments: {args.mechanics} mechanics, {args.bays} bays, {args.days} days")
+    index_results, index_samples = [], []
+    for duration, after in queries[:args.searches]:
+        result, samples = timed(lambda: index.free_slots(mechanic_ids, duration, after, hours, bays, 5, horizon), 1)
+        index_results.append(result)
+        index_samples += samples
+    naive_samples = []
+    for i, (duration, after) in enumerate(queries[:args.naive_searches]):
+        result, samples = timed(
+            lambda: naive_free_slots(rows, mechanic_ids, duration, after, hours, bays, 5, horizon), 1)
+        assert result == index_results[i], "naive and indexed searches disagree"
+        naive_samples += samples
+
+    for name, samples in [("sorted calendars", index_samples), ("naive scan", naive_samples)]:
+        print(f"  {name:<18} median {statistics.median(samples) * 1000:9.2f} ms"
+              f"   max {max(samples) * 1000:9.2f} ms   ({len(samples)} searches)")
+
+
+if __name__ == "__main__":
+    main()
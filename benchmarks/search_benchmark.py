@@ -0,0 +1,95 @@
+"""
+Latency benchmark for the full-text ticket search.
+
+Seeds a throwaway SQLite database with synthetic tickets and compares the
+FTS5-backed search against the LIKE scan it replaces.
+
+    python benchmarks/search_benchmark.py --tickets 200000 --runs 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert, select, or_
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets
+from app.util.search import search
+
+MAKES = ["Civic", "Accord", "Camry", "Corolla", "F-150", "Silverado", "Outback", "Model 3", "Jetta", "Mustang"]
+ISSUES = ["brake squeal", "oil leak", "check engine light", "rough idle", "transmission slipping",
+          "battery drain", "AC not cooling", "coolant leak", "steering pull", "rattle over bumps"]
+QUERIES = ["brake squeal 2019 Civic", "oil leak Camry", "transmission", "coolant leak 2015", "rattle"]
+
+
+def seed(count, batch=10000):
+    customer = Customers(first_name="Bench", last_name="Mark", email="bench@example.com", phone="0",
+                         address="-", password="-", username="bench")
+    db.session.add(customer)
+    db.session.commit()
+    rng = random.Random(42)
+    for start in range(0, count, batch):
+        rows = [{
+            "customer_id": customer.id,
+            "service_description": f"{rng.choice(ISSUES)} on a {rng.randint(2005, 2025)} {rng.choice(MAKES)}, "
+                                   f"customer reports {rng.choice(ISSUES)}",
+            "vin": "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ0123456789") for _ in range(17)),
+            "price": 0.0,
+        } for _ in range(min(batch, count - start))]
+        db.session.execute(insert(ServiceTickets), rows)
+        db.session.commit()
+
+
+def like_scan(query, limit=20):
+    clauses = [or_(ServiceTickets.service_description.ilike(f"%{term}%"), ServiceTickets.vin.ilike(f"%{term}%"))
+               for term in query.split()]
+    return db.session.execute(select(ServiceTickets.id).where(*clauses).limit(limit)).all()
+
+
+def measure(fn, runs):
+    timings = []
+    for _ in range(runs):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+
+    class BenchConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    try:
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            seed(args.tickets)
+            print(f"seeded {args.tickets} tickets in {time.perf_counter() - start:.1f}s")
+
+            for name, fn in [("fts5 search", lambda q: search("service_tickets", q)), ("LIKE scan", like_scan)]:
+                p50, p95 = measure(fn, args.runs)
+                print(f"{name:12} p50={p50:8.2f}ms  p95={p95:8.2f}ms")
+            db.session.remove()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,102 @@ class Config:
     CACHE_TYPE = "SimpleCache"  # Use a simple in-memory cache for dev
     CACHE_DEFAULT_TIMEOUT = 300 # Cache for 5 minutes
     
+    # Rate limiting (Flask-Limiter). The storage must be shared between gunicorn
+    # workers or every limit is multiplied by the worker count:
+    #   memory://                       -> per process, only for local dev/tests
+    #   sqlite:////path/ratelimit.db    -> shared by all workers on one host
+    #   redis://host:6379/0             -> shared across a cluster
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or os.environ.get('REDIS_URL') or 'memory://'
+    RATELIMIT_STORAGE_OPTIONS = {}
+    # "sliding-window-counter" costs two counters per key; "moving-window" keeps
+    # an exact per-hit log and is stricter but heavier.
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY') or 'sliding-window-counter'
+    RATELIMIT_HEADERS_ENABLED = True
+    # Tiered limits. Entries are looked up by endpoint ("customers_bp.login"),
+    # then blueprint ("customers_bp"), then "default"; inside an entry the
+    # caller's role (customer, mechanic, manager, anonymous) wins over "*".
+    # The role comes from the JWT alone, so abusive traffic is rejected before
+    # any body parsing or database work.
+    RATELIMIT_POLICY = {
+        "default": {
+            "anonymous": "50 per hour;200 per day",
+            "customer": "100 per hour;1000 per day",
+            "mechanic": "300 per hour",
+            "manager": "600 per hour",
+            "*": "50 per hour;200 per day",
+        },
+        # Credential stuffing / sign-up spam
+        "customers_bp.login": {"*": "10 per minute;50 per hour"},
+        "mechanics_bp.login": {"*": "10 per minute;50 per hour"},
+        "customers_bp.create_customer": {"*": "5 per hour;20 per day"},
+        "customers_bp.delete_customer": {"*": "3 per day"},
+        # Unauthenticated reads that hit aggregate queries or full tables
+        "customers_bp.get_top_customers": {"anonymous": "30 per hour", "manager": "300 per hour"},
+        "parts_bp.read_all_parts": {"anonymous": "60 per hour"},
+    }
+
+    # Idempotency-Key replay store: memory:// (per process), sqlite:///path
+    # (shared on one host) or redis://host:6379/0 (shared across hosts).
+    IDEMPOTENCY_STORE_URI = os.environ.get('IDEMPOTENCY_STORE_URI') or 'memory://'
+    IDEMPOTENCY_TTL = 24 * 60 * 60
+    IDEMPOTENCY_MAX_ENTRIES = 10000
+
+    # Outbox events that keep failing stop being retried after this many attempts
+    # (they stay in outbox_events with last_error set for inspection).
+    OUTBOX_MAX_ATTEMPTS = 10
+
+    # Per-process open-ticket counts used by auto-assign are rebuilt from the
+    # database this often (seconds) to pick up other workers' assignments.
+    WORKLOAD_REBUILD_INTERVAL = 300
+
+    # Part reservations hold stock for this long unless the request asks for
+    # a different ttl_minutes (capped at RESERVATION_MAX_TTL_MINUTES).
+    RESERVATION_TTL_MINUTES = 30
+    RESERVATION_MAX_TTL_MINUTES = 7 * 24 * 60
+
+    # Reorder suggestions (`flask reorder compute`): consumption history read,
+    # window the daily velocity is averaged over, rolling window used for peak
+    # demand (safety stock), lead time for descriptions without one, and days
+    # of demand a suggested order should cover beyond the reorder point.
+    REORDER_HISTORY_DAYS = 90
+    REORDER_VELOCITY_DAYS = 28
+    REORDER_PEAK_WINDOW_DAYS = 7
+    REORDER_DEFAULT_LEAD_TIME_DAYS = 7
+    REORDER_COVER_DAYS = 14
+
+    # Per-process cache of recently scanned part codes (/parts/lookup).
+    # Entries for other workers' changes expire after CODE_CACHE_TTL seconds.
+    CODE_CACHE_SIZE = 10000
+    CODE_CACHE_TTL = 60
+
+    # Ticket archival (`flask archive run`): Complete/Cancelled tickets whose
+    # service_date is older than this many days move to service_tickets_archive,
+    # this many per transaction. Keep it above REORDER_HISTORY_DAYS, since the
+    # archived tickets' installed parts leave the parts table with them.
+    ARCHIVE_AFTER_DAYS = 365
+    ARCHIVE_BATCH_SIZE = 500
+
+    # On Postgres service_tickets is partitioned by month of service_date;
+    # `flask partitions create` keeps this many months of partitions ahead.
+    PARTITION_MONTHS_AHEAD = 3
+    # Ranking reports (big spenders, top mechanics) cover this many days back
+    # unless the request passes start/end.
+    REPORT_WINDOW_DAYS = 365
+
+    # Appointment scheduling: shop hours (local time), number of service bays,
+    # how often the in-memory calendars are reloaded (seconds) to pick up
+    # other workers' bookings, and how far ahead /free-slots searches (days).
+    SCHEDULE_DAY_START = '08:00'
+    SCHEDULE_DAY_END = '18:00'
+    SCHEDULE_BAYS = 4
+    SCHEDULE_INDEX_TTL = 60
+    SCHEDULE_SEARCH_DAYS = 31
+
+    # Keep a sorted in-memory list of VINs for /service-tickets/by-vin?vin_prefix=
+    # autocomplete; reloaded from the DB every VIN_PREFIX_INDEX_TTL seconds.
+    VIN_PREFIX_INDEX_ENABLED = True
+    VIN_PREFIX_INDEX_TTL = 300
+
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'super-secret-jwt-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
@@ -39,6 +135,7 @@ class TestConfig(Config):
     TESTING = True
     # Use an in-memory SQLite database for testing to ensure isolation.
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RATELIMIT_STORAGE_URI = 'memory://'
 
 class ProductionConfig(Config):
     """Configuration for production environment."""
@@ -47,4 +144,12 @@ class ProductionConfig(Config):
     DEBUG = False
     FLASK_ENV = 'production'
     # For production, we explicitly disable the simple cache, favoring null or an external service.
-    CACHE_TYPE = "null" 
\ No newline at end of file
+    CACHE_TYPE = "null"
+    # Without Redis, fall back to a SQLite file so all workers on the host share counters.
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or os.environ.get('REDIS_URL') or \
+                            'sqlite:///' + os.path.join(basedir, 'instance', 'ratelimit.db')
+    # Keep serving requests if the limiter backend is briefly unreachable.
+    RATELIMIT_SWALLOW_ERRORS = True
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True
+    IDEMPOTENCY_STORE_URI = os.environ.get('IDEMPOTENCY_STORE_URI') or os.environ.get('REDIS_URL') or \
+                            'sqlite:///' + os.path.join(basedir, 'instance', 'idempotency.db') 
\ No newline at end of file
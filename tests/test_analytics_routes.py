@@ -0,0 +1,111 @@
+import unittest
+from datetime import date
+from werkzeug.security import generate_password_hash
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, InventoryPartDescription, Part
+from app.blueprints.analytics.rollups import rebuild_rollups
+from app.util.auth import encode_token
+from app.util.outbox import drain
+
+
+class TestAnalyticsRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password=generate_password_hash("password"), username="jane")
+        self.mechanic = Mechanics(email="mech@example.com", password=generate_password_hash("password"), role="mechanic")
+        self.filter = InventoryPartDescription(name="Oil Filter", price=15.0)
+        db.session.add_all([self.customer, self.mechanic, self.filter])
+        db.session.commit()
+
+        self.manager_headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def complete_ticket(self, service_date, with_part=False):
+        ticket = ServiceTickets(customer_id=self.customer.id, service_description="work", price=0.0,
+                                vin="VIN", service_date=service_date, status="In Progress")
+        db.session.add(ticket)
+        ticket.mechanic.append(self.mechanic)
+        if with_part:
+            part = Part(desc_id=self.filter.id)
+            db.session.add(part)
+            ticket.parts.append(part)
+        db.session.commit()
+        response = self.client.put(f"/service-tickets/{ticket.id}/status", json={"status": "Complete"},
+                                   headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        drain()
+        return ticket
+
+    def test_completed_tickets_are_rolled_up(self):
+        self.complete_ticket(date(2026, 1, 5), with_part=True)
+        self.complete_ticket(date(2026, 1, 7))
+        self.complete_ticket(date(2026, 2, 2))
+
+        response = self.client.get("/analytics/tickets?granularity=month", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        january, february = response.get_json()
+        self.assertEqual(january["period"], "2026-01-01")
+        self.assertEqual(january["ticket_count"], 2)
+        self.assertEqual(january["revenue"], 315.0)
+        self.assertEqual(january["average_parts_cost"], 7.5)
+        self.assertEqual(january["labor_total"], 300.0)
+        self.assertEqual(february["ticket_count"], 1)
+
+        response = self.client.get(f"/analytics/tickets?dimension=mechanic&dimension_id={self.mechanic.id}"
+                                   "&granularity=week&start=2026-01-01&end=2026-01-31", headers=self.manager_headers)
+        rows = response.get_json()
+        self.assertEqual([(r["period"], r["ticket_count"]) for r in rows], [("2026-01-05", 2)])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.complete_ticket(date(2026, 1, 5), with_part=True)
+        self.complete_ticket(date(2026, 1, 5))
+        before = self.client.get("/analytics/tickets?dimension=customer", headers=self.manager_headers).get_json()
+
+        rebuild_rollups()
+        after = self.client.get("/analytics/tickets?dimension=customer", headers=self.manager_headers).get_json()
+        self.assertEqual(before, after)
+
+    def set_status(self, ticket, status):
+        response = self.client.put(f"/service-tickets/{ticket.id}/status", json={"status": status},
+                                   headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        drain()
+
+    def test_recompleting_a_ticket_counts_it_once(self):
+        ticket = self.complete_ticket(date(2026, 1, 5), with_part=True)
+        self.set_status(ticket, "In Progress")
+        self.assertEqual(self.client.get("/analytics/tickets", headers=self.manager_headers).get_json(), [])
+        self.set_status(ticket, "Complete")
+        self.set_status(ticket, "Complete")
+
+        rows = self.client.get("/analytics/tickets", headers=self.manager_headers).get_json()
+        self.assertEqual([(r["ticket_count"], r["revenue"]) for r in rows], [(1, 165.0)])
+        rebuild_rollups()
+        self.assertEqual(self.client.get("/analytics/tickets", headers=self.manager_headers).get_json(), rows)
+
+        # Cancelling a completed ticket (after a rebuild) takes it out again
+        self.set_status(ticket, "Cancelled")
+        for dimension in ("all", "customer", "mechanic"):
+            response = self.client.get(f"/analytics/tickets?dimension={dimension}", headers=self.manager_headers)
+            self.assertEqual(response.get_json(), [])
+
+    def test_analytics_requires_manager(self):
+        headers = {"Authorization": f"Bearer {encode_token(self.mechanic.id, 'mechanic')}"}
+        self.assertEqual(self.client.get("/analytics/tickets", headers=headers).status_code, 403)
+        self.assertEqual(self.client.get("/analytics/tickets?granularity=year",
+                                         headers=self.manager_headers).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
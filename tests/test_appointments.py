@@ -0,0 +1,181 @@
+import unittest
+from datetime import date, datetime, timedelta
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, Appointment
+from app.util.auth import encode_token
+from app.util.schedule import ResourceCalendar, WorkingHours, get_schedule_index
+
+# Next week's Monday: the schedule index only holds current and future bookings
+_today = datetime.combine(date.today(), datetime.min.time())
+MONDAY = _today + timedelta(days=7 - _today.weekday())
+
+
+def at(hour, minute=0, day=0):
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+class TestResourceCalendar(unittest.TestCase):
+    def setUp(self):
+        self.hours = WorkingHours("08:00", "18:00")
+        self.calendar = ResourceCalendar()
+        self.calendar.add(at(9), at(10), 1)
+        self.calendar.add(at(10, 30), at(12), 2)
+        self.calendar.add(at(13), at(17, 30), 3)
+
+    def test_next_free_skips_bookings_and_closed_hours(self):
+        self.assertEqual(self.calendar.next_free(at(7), timedelta(minutes=30), self.hours), at(8))
+        self.assertEqual(self.calendar.next_free(at(8), timedelta(hours=1), self.hours), at(8))
+        self.assertEqual(self.calendar.next_free(at(9, 15), timedelta(minutes=30), self.hours), at(10))
+        self.assertEqual(self.calendar.next_free(at(9, 15), timedelta(hours=1), self.hours), at(12))
+        # Nothing 2h long is left today: first thing tomorrow
+        self.assertEqual(self.calendar.next_free(at(12), timedelta(hours=2), self.hours), at(8, day=1))
+
+    def test_remove(self):
+        self.calendar.remove(2)
+        self.assertEqual(len(self.calendar), 2)
+        self.assertEqual(self.calendar.next_free(at(10), timedelta(hours=3), self.hours), at(10))
+
+
+class TestAppointmentRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="x", username="jane")
+        self.mechanics = [Mechanics(email=f"mech{i}@example.com", password="x", role="mechanic") for i in range(2)]
+        manager = Mechanics(email="boss@example.com", password="x", role="manager")
+        db.session.add_all([customer, manager] + self.mechanics)
+        db.session.commit()
+        self.ticket = ServiceTickets(customer_id=customer.id, service_description="brakes", price=0.0, vin="VIN",
+                                     service_date=MONDAY.date(), status="Pending")
+        db.session.add(self.ticket)
+        db.session.commit()
+        self.ticket_id = self.ticket.id
+        self.mechanic_ids = [mechanic.id for mechanic in self.mechanics]
+        self.headers = {"Authorization": f"Bearer {encode_token(manager.id, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def book(self, mechanic, starts_at, minutes=60, bay=None):
+        payload = {"ticket_id": self.ticket_id, "mechanic_id": self.mechanic_ids[mechanic],
+                   "starts_at": starts_at.isoformat(), "duration_minutes": minutes}
+        if bay is not None:
+            payload["bay"] = bay
+        return self.client.post("/appointments/", json=payload, headers=self.headers)
+
+    def free_slots(self, **params):
+        params.setdefault("after", at(8).isoformat())
+        return self.client.get("/appointments/free-slots", query_string=params, headers=self.headers)
+
+    def test_book_and_conflicts(self):
+        response = self.book(0, at(9), bay=1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["ends_at"], at(10).isoformat())
+
+        # Same mechanic, overlapping
+        response = self.book(0, at(9, 30), bay=2)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.get_json()["conflicts"]), 1)
+        # Other mechanic, same bay
+        self.assertEqual(self.book(1, at(9, 30), bay=1).status_code, 409)
+        # Back to back is fine
+        self.assertEqual(self.book(0, at(10), bay=1).status_code, 201)
+        # Other mechanic, other bay
+        self.assertEqual(self.book(1, at(9, 30), bay=2).status_code, 201)
+        self.assertEqual(db.session.query(Appointment).count(), 3)
+
+    def test_rejects_invalid_bookings(self):
+        self.assertEqual(self.book(0, at(17, 30)).status_code, 400)  # runs past closing
+        self.assertEqual(self.book(0, at(9), bay=9).status_code, 400)
+        response = self.client.post("/appointments/", headers=self.headers, json={
+            "ticket_id": self.ticket_id, "mechanic_id": self.mechanic_ids[0], "starts_at": at(9).isoformat(),
+            "ends_at": at(10).isoformat(), "duration_minutes": 60})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/appointments/", headers=self.headers, json={
+            "ticket_id": 999, "mechanic_id": self.mechanic_ids[0], "starts_at": at(9).isoformat(),
+            "duration_minutes": 60})
+        self.assertEqual(response.status_code, 404)
+
+    def test_move_keeps_duration_and_ignores_itself(self):
+        appointment_id = self.book(0, at(9), minutes=90).get_json()["id"]
+        self.book(0, at(13))
+
+        response = self.client.put(f"/appointments/{appointment_id}", headers=self.headers,
+                                   json={"starts_at": at(9, 30).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["ends_at"], at(11).isoformat())
+
+        response = self.client.put(f"/appointments/{appointment_id}", headers=self.headers,
+                                   json={"starts_at": at(12).isoformat()})
+        self.assertEqual(response.status_code, 409)
+
+    def test_list_window(self):
+        self.book(0, at(9))
+        self.book(1, at(9), bay=1)
+        self.book(0, at(9, day=1))
+        response = self.client.get("/appointments/", headers=self.headers,
+                                   query_string={"start": at(0).isoformat(), "end": at(0, day=1).isoformat()})
+        self.assertEqual(len(response.get_json()), 2)
+        response = self.client.get("/appointments/", headers=self.headers, query_string={
+            "start": at(0).isoformat(), "end": at(0, day=1).isoformat(), "bay": 1})
+        self.assertEqual([a["mechanic_id"] for a in response.get_json()], [self.mechanic_ids[1]])
+        self.assertEqual(self.client.get("/appointments/", headers=self.headers).status_code, 400)
+        # Times are shop-local; an offset is rejected rather than compared against naive values
+        response = self.client.get("/appointments/", headers=self.headers, query_string={
+            "start": at(0).isoformat() + "+02:00", "end": at(0, day=1).isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+    def test_free_slots_follow_commits(self):
+        response = self.free_slots(duration_minutes=60, bay="none")
+        self.assertEqual([(s["starts_at"], s["mechanic_id"]) for s in response.get_json()],
+                         [(at(8).isoformat(), self.mechanic_ids[0]), (at(8).isoformat(), self.mechanic_ids[1])])
+        self.assertTrue(get_schedule_index().loaded)
+
+        # Bookings made after the index loaded are applied on commit
+        self.book(0, at(8), minutes=120)
+        self.book(1, at(8), minutes=60)
+        response = self.free_slots(duration_minutes=60, bay="none")
+        self.assertEqual([(s["starts_at"], s["mechanic_id"]) for s in response.get_json()],
+                         [(at(9).isoformat(), self.mechanic_ids[1]), (at(10).isoformat(), self.mechanic_ids[0])])
+
+        # Cancelling frees the slot again
+        appointments = db.session.query(Appointment).filter_by(mechanic_id=self.mechanic_ids[0]).all()
+        self.client.delete(f"/appointments/{appointments[0].id}", headers=self.headers)
+        response = self.free_slots(duration_minutes=60, bay="none", mechanic_id=self.mechanic_ids[0])
+        self.assertEqual(response.get_json()[0]["starts_at"], at(8).isoformat())
+
+    def test_free_slots_need_a_free_bay(self):
+        # Both bays busy 8-10 with other work; mechanic 1 is free but has to wait for a bay
+        self.app.config["SCHEDULE_BAYS"] = 2
+        self.book(0, at(8), minutes=120, bay=1)
+        self.book(0, at(10), minutes=60, bay=2)
+        other = Mechanics(email="mech9@example.com", password="x", role="mechanic")
+        db.session.add(other)
+        db.session.commit()
+        db.session.add(Appointment(ticket_id=self.ticket_id, mechanic_id=other.id, bay=2,
+                                   starts_at=at(8), ends_at=at(10)))
+        db.session.commit()
+
+        response = self.free_slots(duration_minutes=60, mechanic_id=self.mechanic_ids[1])
+        self.assertEqual(response.get_json(), [{"starts_at": at(10).isoformat(), "ends_at": at(11).isoformat(),
+                                                "mechanic_id": self.mechanic_ids[1], "bay": 1}])
+        response = self.free_slots(duration_minutes=60, mechanic_id=self.mechanic_ids[1], bay=2)
+        self.assertEqual(response.get_json()[0]["starts_at"], at(11).isoformat())
+
+    def test_free_slots_rejects_bad_duration(self):
+        self.assertEqual(self.free_slots(duration_minutes=11 * 60).status_code, 400)
+        self.assertEqual(self.free_slots().status_code, 400)
+        response = self.free_slots(duration_minutes=60, after="2030-01-01T09:00:00+02:00")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+from datetime import date
+from werkzeug.security import generate_password_hash
+from config import TestConfig
+from app import create_app
+from app.models import (db, Customers, Mechanics, ServiceTickets, ArchivedServiceTicket, InventoryPartDescription,
+                        Part, TicketRollup)
+from app.util.auth import encode_token
+from app.util.archive import archive_tickets
+from app.util.workload import get_workload_balancer
+from app.blueprints.analytics.rollups import rebuild_rollups
+
+TODAY = date(2026, 6, 1)
+
+
+class TestTicketArchive(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config.update(ARCHIVE_AFTER_DAYS=365, ARCHIVE_BATCH_SIZE=2)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password=generate_password_hash("pw"), username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", salary=1.0,
+                                  address="2 Side St", password=generate_password_hash("pw"), role="mechanic")
+        self.filter = InventoryPartDescription(name="Oil Filter", price=12.5)
+        db.session.add_all([self.customer, self.mechanic, self.filter])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def ticket(self, service_date, status="Complete", parts=0):
+        ticket = ServiceTickets(customer_id=self.customer.id, service_description="oil change", price=162.5,
+                                vin="VIN1", service_date=service_date, status=status)
+        ticket.mechanic.append(self.mechanic)
+        db.session.add(ticket)
+        db.session.flush()
+        for i in range(parts):
+            ticket.parts.append(Part(desc_id=self.filter.id, ticket_id=ticket.id, serial=f"SN-{ticket.id}-{i}"))
+        db.session.commit()
+        return ticket.id
+
+    def test_old_closed_tickets_move_in_batches(self):
+        old = [self.ticket(date(2024, 3, d), parts=1) for d in (1, 2, 3)]
+        cancelled = self.ticket(date(2024, 3, 4), status="Cancelled")
+        still_open = self.ticket(date(2024, 3, 5), status="In Progress")
+        recent = self.ticket(date(2026, 5, 1))
+
+        self.assertEqual(archive_tickets(today=TODAY), 4)
+        db.session.expire_all()
+        self.assertEqual(db.session.query(ServiceTickets.id).order_by(ServiceTickets.id).all(),
+                         [(still_open,), (recent,)])
+        # The installed parts leave with their tickets; nothing is left pointing at them
+        self.assertEqual(db.session.query(Part).count(), 0)
+        archived = db.session.get(ArchivedServiceTicket, old[0])
+        self.assertEqual((archived.mechanic_ids, archived.parts_cost), ([self.mechanic.id], 12.5))
+        self.assertEqual(archived.parts[0]["name"], "Oil Filter")
+        self.assertEqual(db.session.get(ArchivedServiceTicket, cancelled).status, "Cancelled")
+        self.assertEqual(archive_tickets(today=TODAY), 0)
+
+        # New tickets never reuse an archived id
+        self.assertGreater(self.ticket(date(2026, 5, 2)), recent)
+
+    def test_archived_tickets_are_readable_by_id(self):
+        ticket_id = self.ticket(date(2024, 3, 1), parts=2)
+        archive_tickets(today=TODAY)
+
+        response = self.client.get(f"/service-tickets/{ticket_id}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertTrue(body["archived"])
+        self.assertEqual((body["vin"], body["mechanic_ids"], len(body["parts"])), ("VIN1", [self.mechanic.id], 2))
+        response = self.client.get(f"/service-tickets/{ticket_id}/parts", headers=self.headers)
+        self.assertEqual([part["description"] for part in response.get_json()], ["Oil Filter", "Oil Filter"])
+
+        # ... but gone from the hot list
+        response = self.client.get("/service-tickets/", headers=self.headers)
+        self.assertNotIn(ticket_id, [ticket["id"] for ticket in response.get_json()])
+        self.assertEqual(self.client.get("/service-tickets/999", headers=self.headers).status_code, 404)
+
+    def test_archived_tickets_stay_in_vehicle_history(self):
+        old = self.ticket(date(2024, 3, 1))
+        recent = self.ticket(date(2026, 5, 1))
+        archive_tickets(today=TODAY)
+
+        response = self.client.get("/service-tickets/by-vin/vin-1", headers=self.headers)
+        history = response.get_json()
+        self.assertEqual([ticket["id"] for ticket in history], [old, recent])
+        self.assertEqual([ticket.get("archived", False) for ticket in history], [True, False])
+
+        # Autocomplete, from a freshly loaded prefix index and from SQL
+        self.app.extensions.pop("vin_prefix_index", None)
+        db.session.query(ServiceTickets).delete()
+        db.session.commit()
+        for enabled in (True, False):
+            self.app.config["VIN_PREFIX_INDEX_ENABLED"] = enabled
+            response = self.client.get("/service-tickets/by-vin?vin_prefix=VI", headers=self.headers)
+            self.assertEqual(response.get_json()["vins"], ["VIN1"])
+
+    def test_rollup_rebuild_keeps_archived_totals(self):
+        self.ticket(date(2024, 3, 1), parts=1)
+        self.ticket(date(2026, 5, 1))
+        archive_tickets(today=TODAY)
+        rebuild_rollups()
+        shop = db.session.query(TicketRollup).filter_by(dimension="all").order_by(TicketRollup.day).all()
+        self.assertEqual([(row.day, row.parts_cost) for row in shop],
+                         [(date(2024, 3, 1), 12.5), (date(2026, 5, 1), 0.0)])
+        self.assertEqual(db.session.query(TicketRollup).filter_by(dimension="mechanic").count(), 2)
+
+
+class TestSoftDeletes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password=generate_password_hash("pw"), username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", salary=1.0,
+                                  address="2 Side St", password=generate_password_hash("pw"), role="mechanic")
+        db.session.add_all([self.customer, self.mechanic])
+        db.session.commit()
+        self.ticket = ServiceTickets(customer_id=self.customer.id, service_description="brakes", price=0.0,
+                                     vin="VIN1", service_date=date(2026, 1, 5), status="Complete")
+        self.ticket.mechanic.append(self.mechanic)
+        db.session.add(self.ticket)
+        db.session.commit()
+        self.manager = {"Authorization": f"Bearer {encode_token(99, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_deleted_customer_keeps_its_tickets(self):
+        headers = {"Authorization": f"Bearer {encode_token(self.customer.id, 'customer')}"}
+        response = self.client.delete(f"/customers/{self.customer.id}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(db.session.get(ServiceTickets, self.ticket.id).customer_id, self.customer.id)
+        self.assertEqual(self.client.get(f"/customers/{self.customer.id}").status_code, 404)
+        self.assertEqual(self.client.get("/customers/").get_json(), [])
+        self.assertEqual(self.client.delete(f"/customers/{self.customer.id}", headers=headers).status_code, 404)
+
+        # The email, phone and username are free again
+        response = self.client.post("/customers/", json={
+            "first_name": "Jane", "last_name": "Doe", "email": "jane@example.com", "phone": "555-0101",
+            "address": "1 Main St", "password": "pw2", "username": "jane"})
+        self.assertEqual(response.status_code, 201)
+
+    def test_deleted_mechanic_leaves_the_roster(self):
+        balancer = get_workload_balancer()
+        self.assertIn(self.mechanic.id, balancer.loads())
+
+        response = self.client.delete(f"/mechanics/{self.mechanic.id}", headers=self.manager)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.mechanic.id, balancer.loads())
+        self.assertEqual(db.session.get(ServiceTickets, self.ticket.id).mechanic, [self.mechanic])
+
+        self.assertEqual(self.client.get("/mechanics/").get_json(), [])
+        self.assertEqual(self.client.get(f"/mechanics/{self.mechanic.id}", headers=self.manager).status_code, 404)
+        self.assertEqual(self.client.post("/mechanics/login", json={"email": "bob@example.com", "password": "pw"})
+                         .status_code, 403)
+        response = self.client.put(f"/service-tickets/{self.ticket.id}/assign-mechanic/{self.mechanic.id}",
+                                   headers=self.manager)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from datetime import date
+from sqlalchemy import inspect, insert, text
+from sqlalchemy.exc import IntegrityError
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, InventoryPartDescription, Part, service_mechanics
+from app.util.associations import migrate_associations
+from app.util.auth import encode_token
+
+
+class TestTicketAssociations(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="x", username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", password="x")
+        self.filter = InventoryPartDescription(name="Oil Filter", price=12.5)
+        db.session.add_all([customer, self.mechanic, self.filter])
+        db.session.commit()
+        self.tickets = [ServiceTickets(customer_id=customer.id, service_description="oil", price=0.0, vin="VIN",
+                                       service_date=date(2026, 1, 5)) for _ in range(2)]
+        self.parts = [Part(desc_id=self.filter.id) for _ in range(3)]
+        db.session.add_all(self.tickets + self.parts)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_an_assignment_is_stored_once(self):
+        self.tickets[0].mechanic.append(self.mechanic)
+        db.session.commit()
+        with self.assertRaises(IntegrityError):
+            db.session.execute(insert(service_mechanics).values(service_tickets_id=self.tickets[0].id,
+                                                                mechanics_id=self.mechanic.id))
+        db.session.rollback()
+
+    def test_parts_hang_off_ticket_id(self):
+        self.assertNotIn("ticket_parts", inspect(db.engine).get_table_names())
+        response = self.client.put(f"/service-tickets/{self.tickets[0].id}/add-part/{self.parts[0].id}",
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        db.session.expire_all()
+        self.assertEqual(self.parts[0].ticket, self.tickets[0])
+        self.assertEqual(self.tickets[0].parts, [self.parts[0]])
+        response = self.client.get(f"/service-tickets/{self.tickets[0].id}/parts", headers=self.headers)
+        self.assertEqual(response.get_json(), [{"part_id": self.parts[0].id, "description": "Oil Filter"}])
+
+    def test_migration_from_the_legacy_tables(self):
+        ticket, other = (t.id for t in self.tickets)
+        part, linked, _ = (p.id for p in self.parts)
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE service_mechanics"))
+            conn.execute(text("CREATE TABLE service_mechanics (service_tickets_id INTEGER, mechanics_id INTEGER)"))
+            conn.execute(text("CREATE INDEX ix_service_mechanics_mechanic_ticket "
+                              "ON service_mechanics (mechanics_id, service_tickets_id)"))
+            conn.execute(text("INSERT INTO service_mechanics VALUES (:t, :m), (:t, :m), (:o, :m), (:t, NULL), "
+                              "(:t, 999)"), {"t": ticket, "o": other, "m": self.mechanic.id})
+            conn.execute(text("CREATE TABLE ticket_parts (service_ticket_id INTEGER, part_id INTEGER)"))
+            conn.execute(text("UPDATE parts SET ticket_id = :t WHERE id = :p"), {"t": other, "p": linked})
+            conn.execute(text("INSERT INTO ticket_parts VALUES (:t, :p), (:o, :l)"),
+                         {"t": ticket, "p": part, "o": other, "l": linked})
+
+        self.assertEqual(migrate_associations(), {"parts_linked": 1, "assignments_removed": 3})
+        inspector = inspect(db.engine)
+        self.assertNotIn("ticket_parts", inspector.get_table_names())
+        self.assertEqual(inspector.get_pk_constraint("service_mechanics")["constrained_columns"],
+                         ["service_tickets_id", "mechanics_id"])
+        db.session.expire_all()
+        self.assertEqual(db.session.get(Part, part).ticket_id, ticket)
+        self.assertEqual([t.mechanic for t in self.tickets], [[self.mechanic], [self.mechanic]])
+
+        # Nothing left to do the second time
+        self.assertEqual(migrate_associations(), {"parts_linked": 0, "assignments_removed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
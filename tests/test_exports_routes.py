@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets, InventoryPartDescription, Part, soft_delete
+from app.util.auth import encode_token
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipUnless(pyarrow, "pyarrow is not installed")
+class TestExportsRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="hashed-secret", username="jane")
+        description = InventoryPartDescription(name="Oil Filter", price=15.0)
+        db.session.add_all([customer, description])
+        db.session.commit()
+        db.session.add_all([
+            ServiceTickets(customer_id=customer.id, service_description=f"ticket {i}", price=float(i),
+                           vin="1HGCM82633A004352", service_date=date(2026, 1, 1 + i))
+            for i in range(25)
+        ] + [Part(desc_id=description.id) for _ in range(3)])
+        db.session.commit()
+
+        self.manager_headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_export_tickets_as_parquet(self):
+        response = self.client.get("/exports/service_tickets", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        table = pyarrow.parquet.read_table(io.BytesIO(response.data))
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table.column("service_date")[0].as_py(), date(2026, 1, 1))
+
+    def test_export_customers_as_arrow_without_passwords(self):
+        response = self.client.get("/exports/customers?format=arrow", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        table = pyarrow.ipc.open_file(pyarrow.BufferReader(response.data)).read_all()
+        self.assertEqual(table.num_rows, 1)
+        self.assertNotIn("password", table.column_names)
+
+    def test_export_marks_deleted_customers(self):
+        deleted = Customers(first_name="John", last_name="Roe", email="john@example.com", phone="555-0102",
+                            address="2 Main St", password="x", username="john")
+        db.session.add(deleted)
+        db.session.commit()
+        soft_delete(deleted)
+        db.session.commit()
+
+        response = self.client.get("/exports/customers", headers=self.manager_headers)
+        rows = pyarrow.parquet.read_table(io.BytesIO(response.data)).to_pylist()
+        self.assertEqual([row["deleted_at"] is None for row in rows], [True, False])
+        self.assertEqual(rows[1]["email"], f"deleted-{deleted.id}@deleted.invalid")
+
+    def test_export_requires_manager_and_known_dataset(self):
+        headers = {"Authorization": f"Bearer {encode_token(1, 'mechanic')}"}
+        self.assertEqual(self.client.get("/exports/parts", headers=headers).status_code, 403)
+        self.assertEqual(self.client.get("/exports/mechanics", headers=self.manager_headers).status_code, 404)
+
+    def test_cli_export_in_small_chunks(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            result = self.app.test_cli_runner().invoke(
+                args=["export", "run", "--out-dir", out_dir, "--chunk-size", "4"]
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("service_tickets: 25 rows", result.output)
+            parts = pyarrow.parquet.read_table(os.path.join(out_dir, "parts.parquet"))
+            self.assertEqual(parts.column("name").to_pylist(), ["Oil Filter"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from datetime import date, timedelta
+from sqlalchemy import event
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets
+from app.util.auth import encode_token
+from app.util.history import ticket_history_page, is_assigned
+from app.util.pagination import encode_cursor
+
+
+class TestTicketHistory(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password="x", username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", password="x")
+        self.other = Mechanics(first_name="Al", last_name="Spanner", email="al@example.com", password="x")
+        db.session.add_all([self.customer, self.mechanic, self.other])
+        db.session.commit()
+        # Five tickets on consecutive days, two on the newest day
+        days = [date(2026, 1, 1) + timedelta(days=n) for n in (0, 1, 2, 3, 3)]
+        self.tickets = [ServiceTickets(customer_id=self.customer.id, service_description="work", price=10.0,
+                                       vin="VIN1", service_date=day) for day in days]
+        for ticket in self.tickets:
+            ticket.mechanic.append(self.mechanic)
+        db.session.add_all(self.tickets)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_pages_run_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            page, cursor = ticket_history_page(self.mechanic.service_ticket, 2, cursor)
+            seen.extend(ticket.id for ticket in page)
+            if cursor is None:
+                break
+        expected = [t.id for t in sorted(self.tickets, key=lambda t: (t.service_date, t.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+        page, cursor = ticket_history_page(self.customer.service_ticket, 10)
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(cursor)
+
+    def test_history_is_never_loaded(self):
+        statements = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            db.session.expire_all()
+            page, _ = ticket_history_page(self.mechanic.service_ticket, 1)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(len(page), 1)
+        # Refresh the mechanic, then one bounded query for the page
+        self.assertEqual(len(statements), 2)
+        self.assertIn("LIMIT", statements[-1])
+
+    def test_membership_is_an_exists_query(self):
+        self.assertTrue(is_assigned(self.tickets[0].id, self.mechanic.id))
+        self.assertFalse(is_assigned(self.tickets[0].id, self.other.id))
+
+        # Writes through the write-only side reach the association table
+        self.other.service_ticket.add(self.tickets[0])
+        db.session.commit()
+        self.assertTrue(is_assigned(self.tickets[0].id, self.other.id))
+        self.assertEqual({m.id for m in self.tickets[0].mechanic}, {self.mechanic.id, self.other.id})
+
+    def test_assign_and_remove_routes(self):
+        ticket_id = self.tickets[0].id
+        url = f"/service-tickets/{ticket_id}/assign-mechanic/{self.mechanic.id}"
+        # Assigning twice is a no-op rather than a duplicate key
+        self.assertEqual(self.client.put(url, headers=self.headers).status_code, 200)
+
+        url = f"/service-tickets/{ticket_id}/remove-mechanic/{self.mechanic.id}"
+        self.assertEqual(self.client.put(url, headers=self.headers).status_code, 200)
+        self.assertFalse(is_assigned(ticket_id, self.mechanic.id))
+        self.assertEqual(self.client.put(url, headers=self.headers).status_code, 404)
+
+    def test_my_tickets_is_a_list_unless_paginated(self):
+        headers = {"Authorization": f"Bearer {encode_token(self.mechanic.id, 'mechanic')}"}
+        tickets = self.client.get("/mechanics/my-tickets", headers=headers).get_json()
+        expected = [t.id for t in sorted(self.tickets, key=lambda t: (t.service_date, t.id), reverse=True)]
+        self.assertEqual([ticket["id"] for ticket in tickets], expected)
+
+        page = self.client.get("/mechanics/my-tickets?limit=3", headers=headers).get_json()
+        self.assertEqual(len(page["tickets"]), 3)
+        response = self.client.get(f"/mechanics/my-tickets?limit=3&cursor={page['next_cursor']}", headers=headers)
+        page = response.get_json()
+        self.assertEqual(len(page["tickets"]), 2)
+        self.assertIsNone(page["next_cursor"])
+
+        for cursor in ("garbage", encode_cursor(["2026-01-01", {"a": 1}])):
+            response = self.client.get(f"/mechanics/my-tickets?cursor={cursor}", headers=headers)
+            self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
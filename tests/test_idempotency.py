@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets, InventoryPartDescription, Part
+from app.util.auth import encode_token
+from app.util.idempotency import SQLiteIdempotencyStore, MemoryIdempotencyStore, IN_PROGRESS
+
+
+class TestIdempotencyKeys(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password="x", username="jane")
+        self.description = InventoryPartDescription(name="Oil Filter", price=15.0)
+        db.session.add_all([self.customer, self.description])
+        db.session.commit()
+        self.payload = {"customer_id": self.customer.id, "service_description": "Oil change",
+                        "price": 0.0, "vin": "1HGCM82633A004352"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def headers(self, key, user_id=1):
+        return {"Authorization": f"Bearer {encode_token(user_id, 'manager')}", "Idempotency-Key": key}
+
+    def test_retry_replays_response_without_creating_duplicates(self):
+        first = self.client.post("/service-tickets/", json=self.payload, headers=self.headers("abc"))
+        retry = self.client.post("/service-tickets/", json=self.payload, headers=self.headers("abc"))
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.get_json(), first.get_json())
+        self.assertEqual(retry.headers.get("Idempotent-Replayed"), "true")
+        self.assertEqual(db.session.query(ServiceTickets).count(), 1)
+
+    def test_keys_are_scoped_per_user_and_bound_to_the_request(self):
+        self.client.post("/service-tickets/", json=self.payload, headers=self.headers("abc"))
+        other_user = self.client.post("/service-tickets/", json=self.payload, headers=self.headers("abc", user_id=2))
+        self.assertEqual(other_user.status_code, 201)
+        self.assertEqual(db.session.query(ServiceTickets).count(), 2)
+
+        changed = dict(self.payload, service_description="Different job")
+        response = self.client.post("/service-tickets/", json=changed, headers=self.headers("abc"))
+        self.assertEqual(response.status_code, 422)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+        self.client.post("/parts/add-physical-part", json={"desc_id": self.description.id}, headers=headers)
+        self.client.post("/parts/add-physical-part", json={"desc_id": self.description.id}, headers=headers)
+        self.assertEqual(db.session.query(Part).count(), 2)
+
+        self.client.post("/parts/add-physical-part", json={"desc_id": self.description.id}, headers=self.headers("k"))
+        self.client.post("/parts/add-physical-part", json={"desc_id": self.description.id}, headers=self.headers("k"))
+        self.assertEqual(db.session.query(Part).count(), 3)
+
+    def test_in_flight_key_is_rejected(self):
+        store = MemoryIdempotencyStore()
+        self.app.extensions["idempotency_store"] = store
+        body = json.dumps(self.payload)
+        fingerprint = hashlib.sha256(b"POST" + b"/service-tickets/" + body.encode()).hexdigest()
+        store.reserve("1:busy", fingerprint, 60)
+        response = self.client.post("/service-tickets/", data=body, content_type="application/json",
+                                    headers=self.headers("busy"))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(db.session.query(ServiceTickets).count(), 0)
+
+
+class TestSQLiteIdempotencyStore(unittest.TestCase):
+    def test_reserve_complete_and_expire(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            worker_a, worker_b = SQLiteIdempotencyStore(path), SQLiteIdempotencyStore(path)
+            self.assertIsNone(worker_a.reserve("k", "fp", 60))
+            self.assertEqual(worker_b.reserve("k", "fp", 60)["state"], IN_PROGRESS)
+
+            worker_a.complete("k", {"state": "done", "fingerprint": "fp"}, 60)
+            self.assertEqual(worker_b.reserve("k", "fp", 60)["state"], "done")
+
+            worker_a.complete("old", {"state": "done", "fingerprint": "fp"}, -1)
+            self.assertIsNone(worker_b.reserve("old", "fp", 60))
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    unittest.main()
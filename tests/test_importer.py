@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from werkzeug.security import check_password_hash
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets, Part, InventoryPartDescription, ReferenceVersion
+from app.util.auth import encode_token
+from app.util.importer import BulkImporter
+
+
+class TestBulkImporter(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.tmp = tempfile.TemporaryDirectory()
+
+        self.customers = self.write("customers.csv", "\n".join([
+            "legacy_id,first_name,last_name,email,phone,address,password,username",
+            "c1,Jane,Doe,jane@example.com,555-0101,1 Main St,secret1,jane",
+            "c2,John,Roe,john@example.com,555-0102,2 Main St,secret2,john",
+            "c3,Bad,Row,,555-0103,3 Main St,secret3,bad",
+        ]))
+        self.descriptions = self.write("descriptions.ndjson", "\n".join(json.dumps(r) for r in [
+            {"legacy_id": 10, "name": "Oil Filter", "price": 15.0},
+            {"legacy_id": 11, "name": "Spark Plug", "price": 5.0},
+        ]))
+        self.tickets = self.write("tickets.ndjson", "\n".join(json.dumps(r) for r in [
+            {"legacy_id": 100, "customer_id": "c1", "service_date": "2019-05-01", "service_description": "Oil change",
+             "price": 165.0, "vin": "1hgcm-82633a004352", "status": "Complete"},
+            {"legacy_id": 101, "customer_id": "c2", "service_date": "2019-06-01", "service_description": "Plugs",
+             "price": 170.0, "vin": "JH4KA7561PC008269", "status": "Complete"},
+            {"legacy_id": 102, "customer_id": "c9", "service_date": "2019-06-01", "service_description": "Orphan",
+             "price": 1.0, "vin": "X", "status": "Complete"},
+        ]))
+        self.parts = self.write("parts.csv", "\n".join([
+            "legacy_id,desc_id,ticket_id",
+            "p1,10,100",
+            "p2,11,101",
+            "p3,11,",
+        ]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content + "\n")
+        return path
+
+    def test_import_resolves_foreign_keys_and_rejects_bad_rows(self):
+        rejects = os.path.join(self.tmp.name, "rejects.ndjson")
+        importer = BulkImporter(batch_size=2, workers=2, rejects_path=rejects, echo=lambda *a: None)
+        stats = importer.run({"parts": self.parts, "tickets": self.tickets,
+                              "customers": self.customers, "part_descriptions": self.descriptions})
+
+        self.assertEqual(stats["customers"], {"imported": 2, "rejected": 1})
+        self.assertEqual(stats["tickets"], {"imported": 2, "rejected": 1})
+        self.assertEqual(stats["parts"], {"imported": 3, "rejected": 0})
+
+        jane = db.session.query(Customers).filter_by(email="jane@example.com").one()
+        self.assertTrue(check_password_hash(jane.password, "secret1"))
+        ticket = db.session.query(ServiceTickets).filter_by(customer_id=jane.id).one()
+        self.assertEqual(ticket.vin, "1HGCM82633A004352")
+        part = db.session.query(Part).filter_by(ticket_id=ticket.id).one()
+        self.assertEqual(db.session.get(InventoryPartDescription, part.desc_id).name, "Oil Filter")
+        # Bulk inserts still move the parts catalog's version (one batch of two rows)
+        self.assertEqual(db.session.get(ReferenceVersion, "parts").version, 1)
+
+        with open(rejects, encoding="utf-8") as f:
+            self.assertEqual(sorted(json.loads(line)["legacy_id"] for line in f), ["102", "c3"])
+
+    def test_codes_are_normalized(self):
+        descriptions = self.write("scanned.ndjson", json.dumps(
+            {"legacy_id": 20, "name": "Spark Plug", "price": 5.0, "sku": " sp-100 ", "upc": " 036000291452"}))
+        parts = self.write("serials.csv", "legacy_id,desc_id,serial\np1,20, sn-42 ")
+        BulkImporter(batch_size=2, workers=0, echo=lambda *a: None).run(
+            {"part_descriptions": descriptions, "parts": parts})
+
+        description = db.session.query(InventoryPartDescription).one()
+        self.assertEqual((description.sku, description.upc), ("SP-100", "036000291452"))
+        self.assertEqual(db.session.query(Part).one().serial, "SN-42")
+        headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+        response = self.app.test_client().get("/parts/lookup?code=sp-100", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = os.path.join(self.tmp.name, "import.json")
+        BulkImporter(batch_size=2, workers=0, checkpoint_path=checkpoint, echo=lambda *a: None).run(
+            {"customers": self.customers, "part_descriptions": self.descriptions})
+
+        # A second run with the same checkpoint skips what is done and reuses the id maps
+        stats = BulkImporter(batch_size=2, workers=0, checkpoint_path=checkpoint, echo=lambda *a: None).run(
+            {"customers": self.customers, "part_descriptions": self.descriptions, "tickets": self.tickets})
+        self.assertEqual(stats["customers"], {"imported": 0, "rejected": 0})
+        self.assertEqual(stats["tickets"], {"imported": 2, "rejected": 1})
+        self.assertEqual(db.session.query(Customers).count(), 2)
+
+    def test_cli(self):
+        result = self.app.test_cli_runner().invoke(args=[
+            "import", "run", "--customers", self.customers, "--workers", "0", "--passwords-hashed"
+        ])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("customers: 2 imported, 1 rejected", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from sqlalchemy import event
+from config import TestConfig
+from app import create_app
+from app.models import db, InventoryPartDescription, Part, OutboxEvent
+from app.util.loader import get_loader, prefetch
+
+
+class TestBatchLoader(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.descriptions = [InventoryPartDescription(name=f"Part {i}", price=float(i)) for i in range(5)]
+        db.session.add_all(self.descriptions)
+        db.session.commit()
+        self.parts = [Part(desc_id=description.id) for description in self.descriptions for _ in range(2)]
+        db.session.add_all(self.parts)
+        db.session.commit()
+        self.ids = [description.id for description in self.descriptions]
+        db.session.expunge_all()
+
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.record)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_pending_ids_are_coalesced_and_memoized(self):
+        loader = get_loader(InventoryPartDescription)
+        loader.want(*self.ids[:3])
+        first = loader.load(self.ids[3])
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(first.name, "Part 3")
+
+        found = loader.load_many(self.ids[:4] + [999])
+        self.assertEqual([d.name if d else None for d in found], ["Part 0", "Part 1", "Part 2", "Part 3", None])
+        # The miss costs one more query; repeating it costs nothing
+        self.assertEqual(len(self.statements), 2)
+        self.assertIsNone(loader.load(999))
+        self.assertEqual(len(self.statements), 2)
+
+    def test_prefetch_serves_many_to_one_lazy_loads(self):
+        parts = db.session.query(Part).all()
+        prefetch(parts, "desc_id", InventoryPartDescription)
+        self.assertEqual({part.inventory_description.name for part in parts}, {f"Part {i}" for i in range(5)})
+        self.assertEqual(len(self.statements), 2)
+
+    def test_only_supported_models(self):
+        with self.assertRaises(ValueError):
+            get_loader(OutboxEvent)
+
+    def test_parts_list_does_not_query_per_part(self):
+        response = self.client.get("/parts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 10)
+        self.assertEqual(len([sql for sql in self.statements if sql.lstrip().startswith("SELECT")]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,10 @@ from flask import json
 from werkzeug.security import generate_password_hash
 from config import TestConfig
 from app import create_app
-from app.models import db, Mechanics
+from datetime import date
+from app.models import db, Mechanics, Customers, ServiceTickets
 from app.util.auth import encode_token
+from app.util.pagination import encode_cursor
 
 # This is a critical line that makes sure Python can find the 'app' module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -30,6 +32,10 @@ class TestMechanicsRoutes(unittest.TestCase):
         response = self.client.get("/mechanics/")
         self.assertEqual(response.status_code, 200)
 
+    def test_get_all_mechanics_hides_password_from_field_selection(self):
+        response = self.client.get("/mechanics/?fields=id,password")
+        self.assertEqual(response.status_code, 400)
+
     def test_login(self):
         # Create a test mechanic to log in
         test_mechanic = Mechanics(
@@ -68,6 +74,51 @@ class TestMechanicsRoutes(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 201)
 
+    def test_my_queue_filters_orders_and_paginates(self):
+        mechanic = Mechanics(email="queue@example.com", password=generate_password_hash("password"), role="mechanic")
+        other = Mechanics(email="other@example.com", password=generate_password_hash("password"), role="mechanic")
+        customer = Customers(first_name="Q", last_name="Customer", email="q@example.com", phone="555-0100",
+                             address="1 Main St", password="x", username="qcustomer")
+        db.session.add_all([mechanic, other, customer])
+        db.session.commit()
+
+        def ticket(status, priority, day, mechanics):
+            t = ServiceTickets(customer_id=customer.id, service_description="work", price=0, vin="VIN",
+                               status=status, priority=priority, service_date=date(2026, 1, day))
+            t.mechanic.extend(mechanics)
+            return t
+
+        urgent = ticket("In Progress", 5, 10, [mechanic])
+        old = ticket("Assigned", 0, 1, [mechanic])
+        newer = ticket("Awaiting Parts", 0, 2, [mechanic, other])
+        done = ticket("Complete", 9, 1, [mechanic])
+        not_mine = ticket("Assigned", 9, 1, [other])
+        db.session.add_all([urgent, old, newer, done, not_mine])
+        db.session.commit()
+
+        headers = {"Authorization": f"Bearer {encode_token(mechanic.id, 'mechanic')}"}
+        response = self.client.get("/mechanics/my-queue?limit=2", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        page = response.get_json()
+        self.assertEqual([t["id"] for t in page["tickets"]], [urgent.id, old.id])
+        self.assertIsNotNone(page["next_cursor"])
+
+        response = self.client.get(f"/mechanics/my-queue?limit=2&cursor={page['next_cursor']}", headers=headers)
+        page = response.get_json()
+        self.assertEqual([t["id"] for t in page["tickets"]], [newer.id])
+        self.assertIsNone(page["next_cursor"])
+
+        response = self.client.get("/mechanics/my-queue?status=Assigned", headers=headers)
+        self.assertEqual([t["id"] for t in response.get_json()["tickets"]], [old.id])
+
+        response = self.client.get("/mechanics/my-queue?status=Complete", headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+        # A well-formed cursor carrying the wrong types is still just an invalid cursor
+        cursor = encode_cursor([{"a": 1}, "2026-01-01", 1])
+        response = self.client.get(f"/mechanics/my-queue?cursor={cursor}", headers=headers)
+        self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+import unittest
+from datetime import date
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, OutboxEvent, TicketRollup
+from app.util import outbox
+from app.util.auth import encode_token
+from app.util.metrics import metrics
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password="x", username="jane")
+        self.mechanic = Mechanics(email="mech@example.com", password="x", role="mechanic")
+        db.session.add_all([self.customer, self.mechanic])
+        db.session.commit()
+        self.ticket = ServiceTickets(customer_id=self.customer.id, service_description="work", price=0.0,
+                                     vin="VIN", service_date=date(2026, 1, 5))
+        db.session.add(self.ticket)
+        db.session.commit()
+        self.manager_headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def pending(self):
+        return db.session.query(OutboxEvent).filter(OutboxEvent.processed_at.is_(None)).all()
+
+    def test_events_are_written_with_the_change_and_delivered_later(self):
+        self.client.put(f"/service-tickets/{self.ticket.id}/assign-mechanic/{self.mechanic.id}",
+                        headers=self.manager_headers)
+        self.client.put(f"/service-tickets/{self.ticket.id}/status", json={"status": "Complete"},
+                        headers=self.manager_headers)
+
+        self.assertEqual([event.topic for event in self.pending()], ["mechanic.assigned", "ticket.completed"])
+        self.assertEqual(db.session.query(TicketRollup).count(), 0)
+
+        self.assertEqual(outbox.run_worker(batch_size=1, once=True), 2)
+        self.assertEqual(self.pending(), [])
+        # all + customer + mechanic
+        self.assertEqual(db.session.query(TicketRollup).count(), 3)
+
+    def test_failed_handler_is_retried_without_blocking_the_batch(self):
+        calls = []
+
+        @outbox.handler("part.consumed")
+        def flaky(payload):
+            calls.append(payload["part_id"])
+            if payload["part_id"] == 1:
+                raise RuntimeError("downstream unavailable")
+
+        try:
+            outbox.emit("part.consumed", {"part_id": 1})
+            outbox.emit("part.consumed", {"part_id": 2})
+            db.session.commit()
+
+            self.assertEqual(outbox.drain(), 2)
+            failed, = self.pending()
+            self.assertEqual(failed.payload, {"part_id": 1})
+            self.assertEqual(failed.attempts, 1)
+            self.assertIn("downstream unavailable", failed.last_error)
+            # Backed off: not due again yet
+            self.assertEqual(outbox.drain(), 0)
+            self.assertEqual(calls, [1, 2])
+        finally:
+            outbox._handlers["part.consumed"].remove(flaky)
+
+    def make_due(self):
+        for event in self.pending():
+            event.available_at = outbox._utcnow()
+        db.session.commit()
+
+    def test_events_for_a_ticket_stay_in_order(self):
+        calls, failing = [], {1}
+
+        @outbox.handler("part.consumed")
+        def flaky(payload):
+            if payload["part_id"] in failing:
+                raise RuntimeError("downstream unavailable")
+            calls.append(("part.consumed", payload["ticket_id"]))
+
+        @outbox.handler("mechanic.assigned")
+        def assigned(payload):
+            calls.append(("mechanic.assigned", payload["ticket_id"]))
+
+        try:
+            outbox.emit("part.consumed", {"ticket_id": 1, "part_id": 1})
+            outbox.emit("mechanic.assigned", {"ticket_id": 1, "mechanic_id": 1})
+            outbox.emit("part.consumed", {"ticket_id": 2, "part_id": 2})
+            db.session.commit()
+
+            # Ticket 1's second event waits behind its failed first one; ticket 2 is not held up
+            self.assertEqual(outbox.drain(), 2)
+            self.assertEqual(calls, [("part.consumed", 2)])
+            self.make_due()
+            failing.clear()
+            self.assertEqual(outbox.run_worker(once=True), 2)
+            self.assertEqual(calls[1:], [("part.consumed", 1), ("mechanic.assigned", 1)])
+            self.assertEqual(self.pending(), [])
+        finally:
+            outbox._handlers["part.consumed"].remove(flaky)
+            outbox._handlers["mechanic.assigned"].remove(assigned)
+
+    def test_event_is_dead_after_max_attempts(self):
+        self.app.config["OUTBOX_MAX_ATTEMPTS"] = 2
+        metrics.reset()
+
+        @outbox.handler("part.consumed")
+        def broken(payload):
+            raise RuntimeError("bad payload")
+
+        try:
+            outbox.emit("part.consumed", {"ticket_id": 1, "part_id": 1})
+            outbox.emit("mechanic.assigned", {"ticket_id": 1, "mechanic_id": 1})
+            db.session.commit()
+
+            self.assertEqual(outbox.drain(), 1)
+            self.make_due()
+            self.assertEqual(outbox.drain(), 1)
+            dead = db.session.query(OutboxEvent).filter(OutboxEvent.dead_at.is_not(None)).one()
+            self.assertEqual((dead.topic, dead.attempts), ("part.consumed", 2))
+            self.assertEqual(metrics.get("outbox_events", topic="part.consumed", outcome="dead"), 1)
+
+            # A dead event is never claimed again and no longer holds back its ticket
+            self.assertEqual(outbox.drain(), 1)
+            self.assertEqual(self.pending(), [dead])
+            self.make_due()
+            self.assertEqual(outbox.drain(), 0)
+        finally:
+            outbox._handlers["part.consumed"].remove(broken)
+
+    def test_unknown_topic_is_rejected(self):
+        with self.assertRaises(ValueError):
+            outbox.emit("ticket.exploded", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from sqlalchemy import event
+from config import TestConfig
+from app import create_app
+from app.models import db, InventoryPartDescription, Part
+from app.util.auth import encode_token
+from app.util.part_lookup import CodeCache, get_code_cache
+
+
+class TestCodeCache(unittest.TestCase):
+    def test_lru_eviction_and_dependencies(self):
+        cache = CodeCache(max_entries=2, ttl=60)
+        cache.put("A", {"a": 1}, [("part", 1)])
+        cache.put("B", {"b": 1}, [("part", 2), ("description", 9)])
+        cache.get_many(["A"])  # A is now the most recent
+        cache.put("C", None)
+        self.assertEqual(cache.get_many(["A", "B", "C"]), {"A": {"a": 1}, "C": None})
+
+        cache.put("D", {"d": 1}, [("description", 9)])
+        cache.invalidate(dependencies=[("description", 9)])
+        self.assertEqual(cache.get_many(["C", "D"]), {"C": None})
+        cache.invalidate(codes=["C"])
+        self.assertEqual(len(cache), 0)
+
+    def test_entries_expire(self):
+        cache = CodeCache(ttl=-1)
+        cache.put("A", None)
+        self.assertEqual(cache.get_many(["A"]), {})
+
+
+class TestPartLookupRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+        self.plug = InventoryPartDescription(name="Spark Plug", price=9.5, sku="sp-100", upc="012345678905")
+        db.session.add(self.plug)
+        db.session.commit()
+        self.units = [Part(desc_id=self.plug.id, serial=f"sn-{i:04d}") for i in range(3)]
+        db.session.add_all(self.units)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_queries(self, call):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            return call(), [sql for sql in statements if sql.lstrip().startswith("SELECT")]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    def test_lookup_by_serial_sku_and_upc(self):
+        response = self.client.get("/parts/lookup?code= Sn-0001 ")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body["kind"], body["part"]["id"], body["description"]["name"]),
+                         ("serial", self.units[1].id, "Spark Plug"))
+
+        self.assertEqual(self.client.get("/parts/lookup?code=SP-100").get_json()["kind"], "sku")
+        response = self.client.get("/parts/lookup?code=012345678905")
+        self.assertEqual((response.get_json()["kind"], response.get_json()["description"]["id"]), ("upc", self.plug.id))
+        self.assertNotIn("part", response.get_json())
+
+        self.assertEqual(self.client.get("/parts/lookup?code=nope").status_code, 404)
+        self.assertEqual(self.client.get("/parts/lookup").status_code, 400)
+
+    def test_batch_lookup_is_one_query_then_cached(self):
+        codes = ["SN-0000", "sn-0001", "SN-0002", "SP-100", "missing", "SN-0000"]
+        response, selects = self.count_queries(lambda: self.client.post("/parts/lookup", json={"codes": codes}))
+        body = response.get_json()
+        self.assertEqual(sorted(body["results"]), ["SN-0000", "SN-0001", "SN-0002", "SP-100"])
+        self.assertEqual(body["missing"], ["MISSING"])
+        # One probe of the code indexes, then the matched parts and descriptions by primary key
+        self.assertEqual(len(selects), 3)
+
+        response, selects = self.count_queries(lambda: self.client.post("/parts/lookup", json={"codes": codes}))
+        self.assertEqual(response.get_json(), body)
+        self.assertEqual(selects, [])
+
+    def test_cache_follows_commits(self):
+        self.client.get("/parts/lookup?code=SN-0000")
+        self.client.get("/parts/lookup?code=SN-9999")
+        self.assertEqual(len(get_code_cache()), 2)
+
+        # Relabelling a unit drops both the old code and the cached miss for the new one
+        self.units[0].serial = "SN-9999"
+        db.session.commit()
+        self.assertEqual(self.client.get("/parts/lookup?code=SN-0000").status_code, 404)
+        self.assertEqual(self.client.get("/parts/lookup?code=SN-9999").get_json()["part"]["id"], self.units[0].id)
+
+        # A price change shows up on the units' lookups too
+        self.plug.price = 11.0
+        db.session.commit()
+        self.assertEqual(self.client.get("/parts/lookup?code=SN-9999").get_json()["description"]["price"], 11.0)
+
+    def test_codes_are_unique(self):
+        response = self.client.post("/parts/add-physical-part", headers=self.headers,
+                                    json={"desc_id": self.plug.id, "serial": " sn-0001"})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post("/parts/add-physical-part", headers=self.headers,
+                                    json={"desc_id": self.plug.id, "serial": "SN-0003"})
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post("/parts/", headers=self.headers,
+                                    json={"name": "Other Plug", "price": 8.0, "sku": "SP-100"})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post("/parts/", headers=self.headers,
+                                    json={"name": "Other Plug", "price": 8.0, "upc": "not-a-upc"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from datetime import date, timedelta
+from sqlalchemy import create_mock_engine
+from config import TestConfig
+from app import create_app
+from app.models import db, Base, Customers, Mechanics, ServiceTickets, Part, InventoryPartDescription
+from app.util.partitions import add_months, partition_name, create_partitions, partitioned_references
+
+
+def create_ddl(url):
+    statements = []
+    engine = create_mock_engine(url, lambda sql, *args, **kw: statements.append(
+        str(sql.compile(dialect=engine.dialect)).strip()))
+    Base.metadata.create_all(engine, checkfirst=False)
+    return statements
+
+
+class TestPartitionedSchema(unittest.TestCase):
+    def test_postgres_tables_are_partitioned_by_month(self):
+        statements = create_ddl("postgresql://")
+        tickets = next(s for s in statements if s.startswith("CREATE TABLE service_tickets ("))
+        self.assertIn("PRIMARY KEY (id, service_date)", tickets)
+        self.assertTrue(tickets.endswith("PARTITION BY RANGE (service_date)"))
+        self.assertIn("CREATE TABLE service_tickets_default PARTITION OF service_tickets DEFAULT", statements)
+        # Nothing can reference a partitioned table's id on its own
+        self.assertFalse([s for s in statements if "REFERENCES service_tickets (id)" in s])
+        # Every dropped foreign key is one `partitions check` covers, and its column keeps an index
+        referencing = {(table.name, column.name) for table, column, _ in partitioned_references()}
+        self.assertEqual(referencing, {("service_mechanics", "service_tickets_id"), ("parts", "ticket_id"),
+                                       ("part_reservations", "ticket_id"), ("appointments", "ticket_id")})
+        for table, column in referencing - {("service_mechanics", "service_tickets_id")}:
+            self.assertIn(f"CREATE INDEX ix_{table}_{column} ON {table} ({column})", statements)
+        self.assertIn("PRIMARY KEY (service_tickets_id, mechanics_id)",
+                      next(s for s in statements if s.startswith("CREATE TABLE service_mechanics (")))
+
+    def test_other_backends_get_a_plain_table(self):
+        statements = create_ddl("sqlite://")
+        tickets = next(s for s in statements if s.startswith("CREATE TABLE service_tickets ("))
+        self.assertIn("id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT", tickets)
+        self.assertNotIn("PARTITION", tickets)
+        self.assertTrue([s for s in statements if "REFERENCES service_tickets (id)" in s])
+
+    def test_month_arithmetic(self):
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 3, 1), -3), date(2025, 12, 1))
+        self.assertEqual(partition_name("service_tickets", date(2026, 7, 1)), "service_tickets_p202607")
+
+
+class TestDateBoundedReports(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config["REPORT_WINDOW_DAYS"] = 30
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password="x", username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", password="x")
+        db.session.add_all([self.customer, self.mechanic])
+        db.session.commit()
+        for days_ago, price in ((3, 100.0), (200, 1000.0)):
+            ticket = ServiceTickets(customer_id=self.customer.id, service_description="work", price=price,
+                                    vin="VIN1", service_date=date.today() - timedelta(days=days_ago),
+                                    status="Complete")
+            ticket.mechanic.append(self.mechanic)
+            db.session.add(ticket)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_reports_default_to_the_recent_window(self):
+        response = self.client.get("/customers/big-spenders")
+        self.assertEqual(response.get_json()[0]["total_spent"], 100.0)
+        response = self.client.get(f"/customers/big-spenders?start={date.today() - timedelta(days=365)}")
+        self.assertEqual(response.get_json()[0]["total_spent"], 1100.0)
+
+        self.assertEqual(self.client.get("/mechanics/top-mechanics").get_json()[0]["ticket_count"], 1)
+        old = date.today() - timedelta(days=200)
+        response = self.client.get(f"/mechanics/top-mechanics?start={old}&end={old}")
+        self.assertEqual(response.get_json()[0]["ticket_count"], 1)
+
+        self.assertEqual(self.client.get("/customers/big-spenders?start=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/mechanics/top-mechanics?start=2026-02-01&end=2026-01-01").status_code,
+                         400)
+
+    def test_partition_job_is_a_no_op_off_postgres(self):
+        self.assertEqual(create_partitions(3), [])
+
+    def test_check_reports_orphaned_references(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["partitions", "check"])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        # What a missing foreign key lets through: a part left pointing at a deleted ticket
+        description = InventoryPartDescription(name="Oil Filter", price=15.0)
+        db.session.add(description)
+        db.session.commit()
+        ticket = db.session.query(ServiceTickets).first()
+        db.session.add(Part(desc_id=description.id, ticket_id=ticket.id + 100))
+        db.session.commit()
+
+        result = runner.invoke(args=["partitions", "check"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("parts.ticket_id: 1", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
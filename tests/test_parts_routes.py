@@ -103,6 +103,35 @@ class PartsRoutesTestCase(unittest.TestCase):
         self.assertIsInstance(data, list)
         self.assertEqual(len(data), 2)
 
+    def test_read_all_parts_filter_sort_and_fields(self):
+        # Test GET /parts/ with the filter/sort/fields query DSL.
+        response = self.client.get(f'/parts/?filter[desc_id]={self.part_desc_two.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.get_json()], [self.part_two.id])
+
+        response = self.client.get('/parts/?sort=-id&fields=id,desc_id')
+        data = response.get_json()
+        self.assertEqual([p['id'] for p in data], [self.part_two.id, self.part_one.id])
+        self.assertEqual(set(data[0].keys()), {'id', 'desc_id'})
+
+        response = self.client.get(f'/parts/?filter[id][in]={self.part_one.id},999')
+        self.assertEqual([p['id'] for p in response.get_json()], [self.part_one.id])
+
+    def test_read_all_parts_rejects_unknown_query_fields(self):
+        # Only whitelisted (indexed) columns can be filtered or sorted on.
+        self.assertEqual(self.client.get('/parts/?filter[secret]=1').status_code, 400)
+        self.assertEqual(self.client.get('/parts/?filter[id][regex]=1').status_code, 400)
+        self.assertEqual(self.client.get('/parts/?filter[id]=abc').status_code, 400)
+        self.assertEqual(self.client.get('/parts/?fields=nope').status_code, 400)
+
+    def test_search_parts(self):
+        # Test GET /parts/search ranks catalog entries by name.
+        response = self.client.get('/parts/search?q=spark')
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()['results']
+        self.assertEqual([r['id'] for r in results], [self.part_desc_two.id])
+        self.assertIn('rank', results[0])
+
     def test_read_single_part_success(self):
         # Test GET /parts/<int:part_id> route.
         response = self.client.get(f'/parts/{self.part_one.id}')
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter, SlidingWindowCounterRateLimiter
+from config import TestConfig
+from app import create_app
+from app.util.auth import encode_token
+from app.models import db
+from app.util.metrics import metrics
+from app.util.ratelimit import rate_limit_key, resolve_policy_limit, SQLiteStorage
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.uri = f"sqlite:///{self.path}"
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_scheme_is_registered(self):
+        self.assertIsInstance(storage_from_string(self.uri), SQLiteStorage)
+
+    def test_counters_are_shared_between_storage_instances(self):
+        # Two instances on the same file stand in for two gunicorn workers.
+        worker_a = SlidingWindowCounterRateLimiter(SQLiteStorage(self.uri))
+        worker_b = SlidingWindowCounterRateLimiter(SQLiteStorage(self.uri))
+        limit = parse("3 per minute")
+
+        self.assertTrue(worker_a.hit(limit, "ip:1.2.3.4"))
+        self.assertTrue(worker_b.hit(limit, "ip:1.2.3.4"))
+        self.assertTrue(worker_a.hit(limit, "ip:1.2.3.4"))
+        self.assertFalse(worker_b.hit(limit, "ip:1.2.3.4"))
+        # Other keys are unaffected
+        self.assertTrue(worker_b.hit(limit, "ip:5.6.7.8"))
+
+    def test_moving_window(self):
+        limiter = MovingWindowRateLimiter(SQLiteStorage(self.uri))
+        limit = parse("2 per minute")
+
+        self.assertTrue(limiter.hit(limit, "user:customer:1"))
+        self.assertTrue(limiter.hit(limit, "user:customer:1"))
+        self.assertFalse(limiter.hit(limit, "user:customer:1"))
+        stats = limiter.get_window_stats(limit, "user:customer:1")
+        self.assertEqual(stats.remaining, 0)
+
+    def test_clear(self):
+        storage = SQLiteStorage(self.uri)
+        storage.incr("some-key", 60)
+        storage.incr("some-key", 60)
+        self.assertEqual(storage.get("some-key"), 2)
+        storage.clear("some-key")
+        self.assertEqual(storage.get("some-key"), 0)
+
+    def test_expired_rows_of_idle_keys_are_swept(self):
+        storage = SQLiteStorage(self.uri, sweep_interval=60)
+        conn = storage._connection()
+        count = lambda table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+        with mock.patch("app.util.ratelimit.time.time", return_value=1000.0):
+            for n in range(50):
+                storage.incr(f"LIMITER/ip:{n}/1/second/{n}", 1)
+                storage.acquire_entry(f"ip:{n}", 5, 1)
+        self.assertEqual((count("rate_limit_counters"), count("rate_limit_log")), (50, 50))
+
+        # Within the sweep interval only the key being hit is cleaned up
+        with mock.patch("app.util.ratelimit.time.time", return_value=1030.0):
+            storage.incr("fresh", 60)
+        self.assertEqual((count("rate_limit_counters"), count("rate_limit_log")), (51, 50))
+
+        with mock.patch("app.util.ratelimit.time.time", return_value=1061.0):
+            storage.acquire_entry("ip:new", 5, 60)
+        self.assertEqual((count("rate_limit_counters"), count("rate_limit_log")), (1, 1))
+
+
+class TestRateLimitKey(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+
+    def test_anonymous_requests_use_remote_address(self):
+        with self.app.test_request_context("/parts/", environ_base={"REMOTE_ADDR": "10.0.0.7"}):
+            self.assertEqual(rate_limit_key(), "ip:10.0.0.7")
+
+    def test_authenticated_requests_use_token_subject(self):
+        token = encode_token(42, "mechanic")
+        with self.app.test_request_context("/parts/", headers={"Authorization": f"Bearer {token}"}):
+            self.assertEqual(rate_limit_key(), "user:mechanic:42")
+
+    def test_invalid_token_falls_back_to_remote_address(self):
+        with self.app.test_request_context("/parts/", headers={"Authorization": "Bearer nope"},
+                                           environ_base={"REMOTE_ADDR": "10.0.0.8"}):
+            self.assertEqual(rate_limit_key(), "ip:10.0.0.8")
+
+
+class TestRateLimitPolicy(unittest.TestCase):
+    POLICY = {
+        "default": {"anonymous": "10 per hour", "*": "100 per hour"},
+        "parts_bp": {"manager": "1000 per hour"},
+        "parts_bp.read_all_parts": {"anonymous": "2 per minute"},
+    }
+
+    def setUp(self):
+        class PolicyConfig(TestConfig):
+            RATELIMIT_POLICY = self.POLICY
+        self.app = create_app(PolicyConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        metrics.reset()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_resolution_order(self):
+        self.assertEqual(resolve_policy_limit(self.POLICY, "parts_bp.read_all_parts", "anonymous"), "2 per minute")
+        self.assertEqual(resolve_policy_limit(self.POLICY, "parts_bp.read_all_parts", "manager"), "1000 per hour")
+        self.assertEqual(resolve_policy_limit(self.POLICY, "parts_bp.read_single_part", "customer"), "100 per hour")
+        self.assertEqual(resolve_policy_limit(self.POLICY, "mechanics_bp.login", "anonymous"), "10 per hour")
+
+    def test_anonymous_tier_is_rejected_and_counted(self):
+        self.assertEqual(self.client.get("/parts/").status_code, 200)
+        self.assertEqual(self.client.get("/parts/").status_code, 200)
+        self.assertEqual(self.client.get("/parts/").status_code, 429)
+
+        self.assertEqual(metrics.get("ratelimit_decisions", endpoint="parts_bp.read_all_parts",
+                                     role="anonymous", decision="allowed"), 2)
+        self.assertEqual(metrics.get("ratelimit_decisions", endpoint="parts_bp.read_all_parts",
+                                     role="anonymous", decision="rejected"), 1)
+
+    def test_authenticated_role_gets_its_own_tier(self):
+        headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+        for _ in range(5):
+            self.assertEqual(self.client.get("/parts/", headers=headers).status_code, 200)
+
+    def test_metrics_endpoint_requires_manager(self):
+        self.client.get("/parts/")
+        response = self.client.get("/metrics/", headers={"Authorization": f"Bearer {encode_token(1, 'customer')}"})
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get("/metrics/?name=ratelimit_decisions",
+                                   headers={"Authorization": f"Bearer {encode_token(1, 'manager')}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(m["labels"]["endpoint"] == "parts_bp.read_all_parts" for m in response.get_json()))
+
+
+if __name__ == "__main__":
+    unittest.main()
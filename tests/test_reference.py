@@ -0,0 +1,99 @@
+import unittest
+from datetime import date
+from sqlalchemy import event
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, InventoryPartDescription, Part, ReferenceVersion, \
+    soft_delete
+from app.util.auth import encode_token
+from app.util.reference import part_catalog, mechanic_roster, reset_reference_versions, PartDescriptionRecord
+
+
+class TestReferenceSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="x", username="jane")
+        self.mechanic = Mechanics(first_name="Bob", last_name="Wrench", email="bob@example.com", password="x")
+        self.filter = InventoryPartDescription(name="Oil Filter", price=12.5, sku="OF-1")
+        db.session.add_all([customer, self.mechanic, self.filter])
+        db.session.commit()
+        self.ticket = ServiceTickets(customer_id=customer.id, service_description="oil", price=0.0, vin="VIN",
+                                     service_date=date(2026, 1, 5), status="In Progress")
+        self.parts = [Part(desc_id=self.filter.id, ticket=self.ticket) for _ in range(2)]
+        db.session.add_all([self.ticket] + self.parts)
+        db.session.commit()
+        reset_reference_versions()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def record_queries(self, call):
+        statements = []
+        listener = lambda conn, cursor, sql, *args: statements.append(sql)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            return call(), statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    def version(self, name):
+        return db.session.get(ReferenceVersion, name).version
+
+    def test_catalog_is_loaded_once_per_version(self):
+        catalog = part_catalog()
+        self.assertEqual(catalog[self.filter.id], PartDescriptionRecord(self.filter.id, "Oil Filter", 12.5, "OF-1", None))
+
+        # Same request: no queries at all. Next request: just the version check.
+        _, statements = self.record_queries(part_catalog)
+        self.assertEqual(statements, [])
+        reset_reference_versions()
+        _, statements = self.record_queries(part_catalog)
+        self.assertEqual(len(statements), 1)
+        self.assertIn("reference_versions", statements[0])
+
+    def test_catalog_changes_move_the_version(self):
+        parts_version, mechanics_version = self.version("parts"), self.version("mechanics")
+        # Installing parts only touches the description's collection
+        db.session.add(Part(desc_id=self.filter.id))
+        db.session.commit()
+        self.assertEqual(self.version("parts"), parts_version)
+
+        self.filter.price = 20.0
+        db.session.commit()
+        self.assertEqual(self.version("parts"), parts_version + 1)
+        self.assertEqual(part_catalog()[self.filter.id].price, 20.0)
+
+        soft_delete(self.mechanic)
+        db.session.commit()
+        self.assertEqual(self.version("mechanics"), mechanics_version + 1)
+        self.assertFalse(mechanic_roster()[self.mechanic.id].active)
+
+    def test_ticket_parts_and_pricing_read_the_catalog(self):
+        response, statements = self.record_queries(lambda: self.client.get(
+            f"/service-tickets/{self.ticket.id}/parts", headers=self.headers))
+        self.assertEqual(response.get_json(), [{"part_id": part.id, "description": "Oil Filter"}
+                                               for part in self.parts])
+        response, statements = self.record_queries(lambda: self.client.get(
+            f"/service-tickets/{self.ticket.id}/parts", headers=self.headers))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in statements if "FROM inventory_part_descriptions" in sql])
+
+        response, statements = self.record_queries(lambda: self.client.put(
+            f"/service-tickets/{self.ticket.id}/status", json={"status": "Complete"}, headers=self.headers))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in statements if "FROM inventory_part_descriptions" in sql])
+        db.session.expire_all()
+        self.assertEqual(self.ticket.price, 2 * 12.5 + 150.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
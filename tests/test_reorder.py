@@ -0,0 +1,118 @@
+import unittest
+from datetime import date, datetime, timedelta
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets, InventoryPartDescription, Part, ReorderSuggestion
+from app.util.auth import encode_token
+from app.blueprints.parts.reorder import velocities, compute_suggestions
+
+TODAY = date(2026, 3, 31)
+
+
+class TestVelocities(unittest.TestCase):
+    def test_rolling_windows_stay_within_each_part(self):
+        start = date(2026, 3, 1)
+        rows = [
+            (1, start, 2), (1, start + timedelta(days=1), 3), (1, start + timedelta(days=9), 1),
+            (2, start + timedelta(days=8), 4), (2, start + timedelta(days=9), 4),
+            (3, start - timedelta(days=1), 50),  # outside the history window
+        ]
+        rates = velocities(rows, start, history_days=10, peak_window=3, velocity_days=5)
+        self.assertEqual(rates[1], (1 / 5, 5 / 3))
+        # Part 2's windows don't pick up part 1's tail
+        self.assertEqual(rates[2], (8 / 5, 8 / 3))
+        self.assertEqual(rates[3], (0.0, 0.0))
+        self.assertEqual(velocities([], start, 10, 3, 5), {})
+
+
+class TestReorderSuggestions(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config.update(REORDER_HISTORY_DAYS=28, REORDER_VELOCITY_DAYS=28, REORDER_PEAK_WINDOW_DAYS=7,
+                               REORDER_DEFAULT_LEAD_TIME_DAYS=7, REORDER_COVER_DAYS=14)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="x", username="jane")
+        self.plugs = InventoryPartDescription(name="Spark Plug", price=9.5)
+        self.filters = InventoryPartDescription(name="Oil Filter", price=12.5)
+        self.wipers = InventoryPartDescription(name="Wiper", price=20.0, reorder_point=3, reorder_quantity=10)
+        db.session.add_all([customer, self.plugs, self.filters, self.wipers])
+        db.session.commit()
+        self.ticket = ServiceTickets(customer_id=customer.id, service_description="work", price=0.0, vin="VIN",
+                                     service_date=date(2026, 1, 5), status="Complete")
+        db.session.add(self.ticket)
+        db.session.commit()
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def consume(self, description, days_ago, units):
+        consumed_at = datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()) + timedelta(hours=10)
+        db.session.add_all([Part(desc_id=description.id, ticket_id=self.ticket.id, consumed_at=consumed_at)
+                            for _ in range(units)])
+
+    def stock(self, description, units):
+        db.session.add_all([Part(desc_id=description.id) for _ in range(units)])
+
+    def test_suggestions_from_consumption_and_policy(self):
+        # Plugs: 2 a day for four weeks, 14 left -> one week of cover, well under the reorder point
+        for days_ago in range(28):
+            self.consume(self.plugs, days_ago, 2)
+        self.stock(self.plugs, 14)
+        # Filters: a few a week, plenty in stock
+        for days_ago in (1, 8, 15, 22):
+            self.consume(self.filters, days_ago, 1)
+        self.stock(self.filters, 40)
+        # Wipers: never used, but the manual reorder point is 3
+        self.stock(self.wipers, 2)
+        # Installed before consumed_at existed: counted on the ticket's service date (outside the window)
+        db.session.add(Part(desc_id=self.filters.id, ticket_id=self.ticket.id))
+        db.session.commit()
+
+        self.assertEqual(compute_suggestions(today=TODAY), 2)
+        plugs, wipers = db.session.query(ReorderSuggestion).order_by(ReorderSuggestion.rank).all()
+        self.assertEqual((plugs.desc_id, plugs.daily_velocity, plugs.peak_daily_velocity), (self.plugs.id, 2.0, 2.0))
+        self.assertEqual((plugs.reorder_point, plugs.available, plugs.days_of_cover), (14, 14, 7.0))
+        # Back above the reorder point plus two weeks of demand
+        self.assertEqual(plugs.suggested_quantity, 14 + 28 - 14)
+        self.assertEqual((wipers.desc_id, wipers.days_of_cover, wipers.suggested_quantity), (self.wipers.id, None, 10))
+
+    def test_route_pages_and_policy_update(self):
+        for description in (self.plugs, self.filters, self.wipers):
+            self.consume(description, 1, 5)
+            self.stock(description, 1)
+        db.session.commit()
+        compute_suggestions(today=TODAY)
+
+        response = self.client.get("/parts/reorder-suggestions?limit=2", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([s["rank"] for s in body["suggestions"]], [1, 2])
+        self.assertEqual(body["suggestions"][0]["inventory_description"]["name"], "Spark Plug")
+        response = self.client.get(f"/parts/reorder-suggestions?limit=2&cursor={body['next_cursor']}",
+                                   headers=self.headers)
+        self.assertEqual([s["rank"] for s in response.get_json()["suggestions"]], [3])
+        self.assertIsNone(response.get_json()["next_cursor"])
+
+        # A reorder point of 0 switches reordering off for that part
+        response = self.client.put(f"/parts/descriptions/{self.plugs.id}/reorder-policy", headers=self.headers,
+                                   json={"reorder_point": 0, "lead_time_days": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["lead_time_days"], 3)
+        compute_suggestions(today=TODAY)
+        self.assertEqual(db.session.query(ReorderSuggestion).filter_by(desc_id=self.plugs.id).count(), 0)
+
+        response = self.client.get("/parts/reorder-suggestions", headers={
+            "Authorization": f"Bearer {encode_token(2, 'mechanic')}"})
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, ServiceTickets, InventoryPartDescription, Part, PartReservation
+from app.util.auth import encode_token
+from app.util.outbox import drain
+from app.util.reservations import available_units, sweep_expired
+
+
+class TestPartReservations(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                             address="1 Main St", password="x", username="jane")
+        db.session.add(customer)
+        self.filter = InventoryPartDescription(name="Oil Filter", price=12.5)
+        db.session.add(self.filter)
+        db.session.commit()
+        self.desc_id = self.filter.id
+        db.session.add_all([Part(desc_id=self.desc_id) for _ in range(3)])
+        self.tickets = [ServiceTickets(customer_id=customer.id, service_description="oil", price=0.0, vin="VIN",
+                                       service_date=date(2026, 1, 5), status="Assigned") for _ in range(2)]
+        db.session.add_all(self.tickets)
+        db.session.commit()
+        self.ticket_ids = [ticket.id for ticket in self.tickets]
+        self.headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def reserve(self, ticket, quantity, **extra):
+        return self.client.post(f"/service-tickets/{self.ticket_ids[ticket]}/reservations", headers=self.headers,
+                                json={"desc_id": self.desc_id, "quantity": quantity, **extra})
+
+    def lapse(self, reservation_id):
+        reservation = db.session.get(PartReservation, reservation_id)
+        reservation.expires_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=1)
+        db.session.commit()
+
+    def test_holds_are_exclusive(self):
+        response = self.reserve(0, 2)
+        self.assertEqual(response.status_code, 201)
+        held = response.get_json()["part_ids"]
+        self.assertEqual(len(held), 2)
+        self.assertEqual(available_units(self.desc_id), 1)
+
+        # The other ticket can take the last unit but not more
+        self.assertEqual(self.reserve(1, 2).status_code, 409)
+        self.assertEqual(self.reserve(1, 1).status_code, 201)
+        self.assertEqual(available_units(self.desc_id), 0)
+
+        # ... nor install a unit held for the first ticket
+        response = self.client.put(f"/service-tickets/{self.ticket_ids[1]}/add-part/{held[0]}", headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        response = self.client.put(f"/service-tickets/{self.ticket_ids[0]}/add-part/{held[0]}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(db.session.get(Part, held[0]).reservation_id)
+
+    def test_lapsed_hold_frees_units_before_the_sweep(self):
+        reservation_id = self.reserve(0, 3).get_json()["id"]
+        self.assertEqual(self.reserve(1, 1).status_code, 409)
+
+        self.lapse(reservation_id)
+        self.assertEqual(available_units(self.desc_id), 3)
+        response = self.reserve(1, 2)
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(f"/service-tickets/{self.ticket_ids[0]}/reservations/{reservation_id}/fulfill",
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+        # The sweep tidies up the lapsed hold without touching the live one
+        self.assertEqual(sweep_expired(), 1)
+        self.assertEqual(db.session.get(PartReservation, reservation_id).status, "expired")
+        self.assertEqual(db.session.query(Part).filter(Part.reservation_id.is_not(None)).count(), 2)
+        self.assertEqual(sweep_expired(), 0)
+
+    def test_completing_the_ticket_installs_held_parts(self):
+        self.reserve(0, 2)
+        response = self.client.put(f"/service-tickets/{self.ticket_ids[0]}/status", headers=self.headers,
+                                   json={"status": "Complete"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["price"], 2 * 12.5 + 150.0)
+        self.assertEqual(db.session.query(Part).filter_by(ticket_id=self.ticket_ids[0]).count(), 2)
+        self.assertEqual(db.session.query(PartReservation).one().status, "fulfilled")
+        drain()
+
+        # Closed tickets can't reserve
+        self.assertEqual(self.reserve(0, 1).status_code, 409)
+
+    def test_fulfill_release_and_cancel(self):
+        first = self.reserve(0, 1).get_json()
+        response = self.client.post(f"/service-tickets/{self.ticket_ids[0]}/reservations/{first['id']}/fulfill",
+                                    headers=self.headers)
+        self.assertEqual(response.get_json()["part_ids"], first["part_ids"])
+        self.assertEqual(db.session.get(Part, first["part_ids"][0]).ticket_id, self.ticket_ids[0])
+        response = self.client.delete(f"/service-tickets/{self.ticket_ids[0]}/reservations/{first['id']}",
+                                      headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+        second = self.reserve(0, 1).get_json()
+        response = self.client.delete(f"/service-tickets/{self.ticket_ids[0]}/reservations/{second['id']}",
+                                      headers=self.headers)
+        self.assertEqual(response.get_json()["status"], "released")
+        self.assertEqual(available_units(self.desc_id), 2)
+
+        self.reserve(0, 2)
+        self.client.put(f"/service-tickets/{self.ticket_ids[0]}/status", headers=self.headers,
+                        json={"status": "Cancelled"})
+        self.assertEqual(available_units(self.desc_id), 2)
+
+        response = self.client.get(f"/service-tickets/{self.ticket_ids[0]}/reservations", headers=self.headers)
+        self.assertEqual([r["status"] for r in response.get_json()], ["released", "released", "fulfilled"])
+        # Another ticket's reservation isn't reachable through this one
+        response = self.client.delete(f"/service-tickets/{self.ticket_ids[1]}/reservations/{second['id']}",
+                                      headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
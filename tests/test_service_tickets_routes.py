@@ -0,0 +1,310 @@
+import unittest
+from datetime import date
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets, InventoryPartDescription, Part
+from app.util.auth import encode_token
+from app.util.concurrency import StaleDataError
+
+
+class TestServiceTicketsRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password=generate_password_hash("password"), username="jane")
+        self.mechanic = Mechanics(email="mech@example.com", password=generate_password_hash("password"),
+                                  first_name="Mike", last_name="Mechanic", role="mechanic")
+        db.session.add_all([self.customer, self.mechanic])
+        db.session.commit()
+
+        self.manager_headers = {"Authorization": f"Bearer {encode_token(1, 'manager')}"}
+        self.mechanic_headers = {"Authorization": f"Bearer {encode_token(self.mechanic.id, 'mechanic')}"}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_ticket(self, description="Oil change", vin="1HGCM82633A004352", price=0.0, **kwargs):
+        ticket = ServiceTickets(customer_id=self.customer.id, service_description=description, vin=vin,
+                                price=price, service_date=kwargs.pop("service_date", date(2026, 1, 15)), **kwargs)
+        db.session.add(ticket)
+        db.session.commit()
+        return ticket
+
+    def test_create_starts_pending(self):
+        payload = {"customer_id": self.customer.id, "service_description": "Oil change", "price": 0.0,
+                   "vin": "1HGCM82633A004352", "service_date": "2026-01-15"}
+        response = self.client.post("/service-tickets/", json=payload, headers=self.manager_headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.get_json()["status"], response.get_json()["priority"]), ("Pending", 0))
+
+        for extra in ({"status": "Complete"}, {"status": "Bogus", "priority": 999}):
+            response = self.client.post("/service-tickets/", json={**payload, **extra}, headers=self.manager_headers)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(db.session.query(ServiceTickets).count(), 1)
+
+    def test_search_ranks_matching_tickets(self):
+        civic = self.create_ticket("Brake squeal on a 2019 Civic, replace front pads")
+        self.create_ticket("Brake fluid flush on a 2015 Accord")
+        self.create_ticket("Oil change")
+
+        response = self.client.get("/service-tickets/search?q=brake squeal civic", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        self.assertEqual([r["id"] for r in results], [civic.id])
+
+        # Last term matches as a prefix
+        response = self.client.get("/service-tickets/search?q=brak", headers=self.manager_headers)
+        self.assertEqual(len(response.get_json()["results"]), 2)
+
+    def test_search_sees_updates_and_deletes(self):
+        ticket = self.create_ticket("Rattle in the dashboard")
+        ticket.service_description = "Squeaky serpentine belt"
+        db.session.commit()
+
+        response = self.client.get("/service-tickets/search?q=rattle", headers=self.manager_headers)
+        self.assertEqual(response.get_json()["results"], [])
+        response = self.client.get("/service-tickets/search?q=serpentine", headers=self.manager_headers)
+        self.assertEqual(len(response.get_json()["results"]), 1)
+
+        db.session.delete(ticket)
+        db.session.commit()
+        response = self.client.get("/service-tickets/search?q=serpentine", headers=self.manager_headers)
+        self.assertEqual(response.get_json()["results"], [])
+
+    def test_search_by_vin_and_query_syntax_is_escaped(self):
+        ticket = self.create_ticket(vin="2T1BURHE0JC123456")
+        response = self.client.get("/service-tickets/search?q=2T1BURHE0JC123456", headers=self.manager_headers)
+        self.assertEqual([r["id"] for r in response.get_json()["results"]], [ticket.id])
+
+        response = self.client.get('/service-tickets/search?q=" OR NEAR(', headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_requires_query(self):
+        response = self.client.get("/service-tickets/search", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_vehicle_history_uses_normalized_vin(self):
+        first = self.create_ticket(vin="1hgcm8-2633a 004352", service_date=date(2025, 3, 1))
+        second = self.create_ticket(vin="1HGCM82633A004352", service_date=date(2026, 1, 1))
+        self.create_ticket(vin="JH4KA7561PC008269")
+        self.assertEqual(first.vin, "1HGCM82633A004352")
+
+        response = self.client.get("/service-tickets/by-vin/1hgcm82633a004352", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t["id"] for t in response.get_json()], [first.id, second.id])
+
+    def test_vin_prefix_search(self):
+        self.create_ticket(vin="1HGCM82633A004352")
+        self.create_ticket(vin="1HGCM82633A004353")
+        self.create_ticket(vin="1HGCM82633A004353")
+        self.create_ticket(vin="JH4KA7561PC008269")
+
+        response = self.client.get("/service-tickets/by-vin?vin_prefix=1hgcm", headers=self.manager_headers)
+        self.assertEqual(response.get_json()["vins"], ["1HGCM82633A004352", "1HGCM82633A004353"])
+
+        # New VINs committed after the index was loaded are visible immediately
+        self.create_ticket(vin="1HGCM00000A000000")
+        response = self.client.get("/service-tickets/by-vin?vin_prefix=1HGCM&limit=1", headers=self.manager_headers)
+        self.assertEqual(response.get_json()["vins"], ["1HGCM00000A000000"])
+
+    def test_vin_prefix_search_without_memory_index(self):
+        self.app.config["VIN_PREFIX_INDEX_ENABLED"] = False
+        self.create_ticket(vin="1HGCM82633A004352")
+        self.create_ticket(vin="JH4KA7561PC008269")
+        response = self.client.get("/service-tickets/by-vin?vin_prefix=JH4", headers=self.manager_headers)
+        self.assertEqual(response.get_json()["vins"], ["JH4KA7561PC008269"])
+        self.assertEqual(self.client.get("/service-tickets/by-vin", headers=self.manager_headers).status_code, 400)
+    def test_stale_if_match_returns_conflict_with_current_state(self):
+        ticket = self.create_ticket()
+        etag = self.client.get(f"/service-tickets/{ticket.id}", headers=self.manager_headers).headers["ETag"]
+        self.assertEqual(etag, '"1"')
+
+        # Another client moves the ticket on
+        response = self.client.put(f"/service-tickets/{ticket.id}/assign-mechanic/{self.mechanic.id}",
+                                   headers=dict(self.manager_headers, **{"If-Match": etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"2"')
+
+        response = self.client.put(f"/service-tickets/{ticket.id}/status", json={"status": "Cancelled"},
+                                   headers=dict(self.manager_headers, **{"If-Match": etag}))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()["current"]["status"], "Assigned")
+        self.assertEqual(response.get_json()["current"]["version_id"], 2)
+
+        response = self.client.put(f"/service-tickets/{ticket.id}/status", json={"status": "In Progress"},
+                                   headers=dict(self.manager_headers, **{"If-Match": '"2"'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], '"3"')
+
+        response = self.client.get(f"/service-tickets/{ticket.id}",
+                                   headers=dict(self.manager_headers, **{"If-None-Match": '"3"'}))
+        self.assertEqual(response.status_code, 304)
+
+    def test_a_part_can_only_be_installed_once(self):
+        first, second = self.create_ticket(), self.create_ticket(vin="2T1BURHE0JC000001")
+        description = InventoryPartDescription(name="Brake Pad", price=40.0)
+        db.session.add(description)
+        db.session.commit()
+        part = Part(desc_id=description.id)
+        db.session.add(part)
+        db.session.commit()
+
+        response = self.client.put(f"/service-tickets/{first.id}/add-part/{part.id}", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.put(f"/service-tickets/{second.id}/add-part/{part.id}", headers=self.manager_headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()["current"]["ticket_id"], first.id)
+
+    def test_stale_write_is_rejected_at_flush(self):
+        ticket = self.create_ticket()
+        # A concurrent writer bumps the row behind this session's back
+        db.session.connection().execute(
+            ServiceTickets.__table__.update().where(ServiceTickets.id == ticket.id).values(version_id=2)
+        )
+        ticket.status = "Cancelled"
+        with self.assertRaises(StaleDataError):
+            db.session.commit()
+        db.session.rollback()
+
+    def create_parts(self, count, price=40.0):
+        description = InventoryPartDescription(name="Brake Pad", price=price)
+        db.session.add(description)
+        db.session.commit()
+        parts = [Part(desc_id=description.id) for _ in range(count)]
+        db.session.add_all(parts)
+        db.session.commit()
+        return [part.id for part in parts]
+
+    def test_batch_applies_operations_in_one_transaction(self):
+        ticket = self.create_ticket()
+        part_ids = self.create_parts(2)
+        operations = [{"op": "assign_mechanic", "mechanic_id": self.mechanic.id}]
+        operations += [{"op": "add_part", "part_id": part_id} for part_id in part_ids]
+        operations.append({"op": "set_status", "status": "Complete"})
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.post(f"/service-tickets/{ticket.id}/batch", json={"operations": operations},
+                                        headers=self.manager_headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["status"], "Complete")
+        self.assertEqual(body["price"], 230.0)
+        # The parts being added are fetched by id once (the ticket's own parts come with the ticket)
+        self.assertEqual(len([sql for sql in statements if sql.startswith("SELECT") and "FROM parts" in sql
+                              and "parts.id IN" in sql]), 1)
+
+        db.session.expire_all()
+        ticket = db.session.get(ServiceTickets, ticket.id)
+        self.assertEqual([m.id for m in ticket.mechanic], [self.mechanic.id])
+        self.assertEqual(sorted(p.id for p in ticket.parts), part_ids)
+
+    def test_failed_batch_operation_rolls_back_everything(self):
+        ticket = self.create_ticket()
+        part_id, = self.create_parts(1)
+        response = self.client.post(f"/service-tickets/{ticket.id}/batch", json={"operations": [
+            {"op": "assign_mechanic", "mechanic_id": self.mechanic.id},
+            {"op": "add_part", "part_id": part_id},
+            {"op": "add_part", "part_id": 999},
+        ]}, headers=self.manager_headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.get_json()["operation"], 2)
+
+        db.session.expire_all()
+        self.assertEqual(db.session.get(ServiceTickets, ticket.id).mechanic, [])
+        self.assertIsNone(db.session.get(Part, part_id).ticket_id)
+
+        response = self.client.post(f"/service-tickets/{ticket.id}/batch", json={"operations": [{"op": "add_part"}]},
+                                    headers=self.manager_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_multi_ticket_batch(self):
+        first, second = self.create_ticket(), self.create_ticket(vin="2T1BURHE0JC000001")
+        part_id, = self.create_parts(1)
+        response = self.client.post("/service-tickets/batch", json={"tickets": [
+            {"ticket_id": second.id, "operations": [{"op": "assign_mechanic", "mechanic_id": self.mechanic.id}]},
+            {"ticket_id": first.id, "operations": [{"op": "add_part", "part_id": part_id},
+                                                   {"op": "set_status", "status": "In Progress"}]},
+        ]}, headers=self.manager_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(t["id"], t["status"]) for t in response.get_json()],
+                         [(second.id, "Assigned"), (first.id, "In Progress")])
+
+        # The part is taken now, so reusing it fails the whole batch
+        response = self.client.post("/service-tickets/batch", json={"tickets": [
+            {"ticket_id": second.id, "operations": [{"op": "set_status", "status": "Cancelled"},
+                                                    {"op": "add_part", "part_id": part_id}]},
+        ]}, headers=self.manager_headers)
+        self.assertEqual(response.status_code, 409)
+        db.session.expire_all()
+        self.assertEqual(db.session.get(ServiceTickets, second.id).status, "Assigned")
+
+    def count_queries(self, call):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            return call(), [sql for sql in statements if sql.lstrip().startswith("SELECT")]
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+    def test_include_embeds_the_ticket_graph_in_fixed_queries(self):
+        ticket = self.create_ticket()
+        second_mechanic = Mechanics(email="two@example.com", password="secret", role="mechanic")
+        db.session.add(second_mechanic)
+        db.session.commit()
+        ticket.mechanic.extend([self.mechanic, second_mechanic])
+        for part_id in self.create_parts(3):
+            ticket.parts.append(db.session.get(Part, part_id))
+        db.session.commit()
+        ticket_id = ticket.id
+
+        response, selects = self.count_queries(lambda: self.client.get(
+            f"/service-tickets/{ticket_id}?include=customer,mechanics,parts.inventory_description",
+            headers=self.manager_headers))
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["customer"]["email"], "jane@example.com")
+        self.assertNotIn("password", body["customer"])
+        self.assertEqual(len(body["mechanics"]), 2)
+        self.assertNotIn("password", body["mechanics"][0])
+        self.assertEqual(len(body["parts"]), 3)
+        self.assertEqual(body["parts"][0]["inventory_description"]["name"], "Brake Pad")
+        self.assertEqual(len(selects), 3)
+
+        # Same number of queries for a whole list
+        self.create_ticket(vin="2T1BURHE0JC000001")
+        response, selects = self.count_queries(lambda: self.client.get(
+            "/service-tickets/?include=customer,mechanics,parts.inventory_description",
+            headers=self.manager_headers))
+        self.assertEqual([len(t["parts"]) for t in response.get_json()], [3, 0])
+        self.assertEqual(len(selects), 3)
+
+        response = self.client.get(f"/service-tickets/{ticket_id}?include=parts", headers=self.manager_headers)
+        self.assertNotIn("inventory_description", response.get_json()["parts"][0])
+        self.assertNotIn("customer", response.get_json())
+
+    def test_unknown_include_is_rejected(self):
+        ticket = self.create_ticket()
+        response = self.client.get(f"/service-tickets/{ticket.id}?include=customer.password",
+                                   headers=self.manager_headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
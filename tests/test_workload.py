@@ -0,0 +1,113 @@
+import unittest
+from datetime import date
+from config import TestConfig
+from app import create_app
+from app.models import db, Customers, Mechanics, ServiceTickets
+from app.util.auth import encode_token
+from app.util.workload import WorkloadBalancer, get_workload_balancer, reserve_assignment
+
+
+class TestAutoAssign(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.customer = Customers(first_name="Jane", last_name="Doe", email="jane@example.com", phone="555-0101",
+                                  address="1 Main St", password="x", username="jane")
+        self.mechanics = [Mechanics(email=f"mech{i}@example.com", password="x", role="mechanic") for i in range(3)]
+        manager = Mechanics(email="boss@example.com", password="x", role="manager")
+        db.session.add_all([self.customer, manager] + self.mechanics)
+        db.session.commit()
+        self.mechanic_ids = [mechanic.id for mechanic in self.mechanics]
+        self.headers = {"Authorization": f"Bearer {encode_token(manager.id, 'manager')}"}
+
+        # Starting loads: 2, 0, 1 open tickets (plus a closed one that doesn't count)
+        for mechanic, status in [(0, "Assigned"), (0, "In Progress"), (2, "Awaiting Parts"), (1, "Complete")]:
+            ticket = self.create_ticket(status)
+            ticket.mechanic.append(self.mechanics[mechanic])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_ticket(self, status="Pending"):
+        ticket = ServiceTickets(customer_id=self.customer.id, service_description="work", price=0.0, vin="VIN",
+                                service_date=date(2026, 1, 5), status=status)
+        db.session.add(ticket)
+        db.session.commit()
+        return ticket
+
+    def loads(self):
+        return [get_workload_balancer().loads()[mechanic_id] for mechanic_id in self.mechanic_ids]
+
+    def test_rebuilt_from_open_assignments(self):
+        self.assertEqual(self.loads(), [2, 0, 1])
+
+    def test_auto_assign_picks_least_loaded_and_tracks_changes(self):
+        ticket = self.create_ticket()
+        response = self.client.post(f"/service-tickets/{ticket.id}/auto-assign", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["mechanic_id"], self.mechanic_ids[1])
+        self.assertEqual(self.loads(), [2, 1, 1])
+
+        response = self.client.post(f"/service-tickets/{ticket.id}/auto-assign", headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+        # Closing a ticket and manual assignments flow into the counts
+        self.client.put(f"/service-tickets/{ticket.id}/status", json={"status": "Complete"}, headers=self.headers)
+        self.assertEqual(self.loads(), [2, 0, 1])
+        other = self.create_ticket()
+        self.client.put(f"/service-tickets/{other.id}/assign-mechanic/{self.mechanic_ids[2]}", headers=self.headers)
+        self.assertEqual(self.loads(), [2, 0, 2])
+
+        # ... and agree with a fresh rebuild
+        balancer = get_workload_balancer()
+        incremental = balancer.loads()
+        balancer.rebuild()
+        self.assertEqual(balancer.loads(), incremental)
+
+    def test_batch_spreads_tickets(self):
+        tickets = [self.create_ticket() for _ in range(4)]
+        closed = self.create_ticket("Cancelled")
+        response = self.client.post("/service-tickets/auto-assign", headers=self.headers,
+                                    json={"ticket_ids": [t.id for t in tickets] + [closed.id, 999]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([a["mechanic_id"] for a in body["assigned"]],
+                         [self.mechanic_ids[1], self.mechanic_ids[1], self.mechanic_ids[2], self.mechanic_ids[0]])
+        self.assertEqual([s["ticket_id"] for s in body["skipped"]], [closed.id, 999])
+        self.assertEqual(self.loads(), [3, 2, 2])
+
+    def test_rolled_back_reservation_is_released(self):
+        ticket = self.create_ticket()
+        self.loads()
+        mechanic = reserve_assignment(ticket)
+        self.assertEqual(mechanic.id, self.mechanic_ids[1])
+        self.assertEqual(self.loads(), [2, 1, 1])
+        db.session.rollback()
+        self.assertEqual(self.loads(), [2, 0, 1])
+
+
+class TestWorkloadBalancer(unittest.TestCase):
+    def balancer(self, loads):
+        balancer = WorkloadBalancer()
+        balancer.seed(loads)
+        return balancer
+
+    def test_pick_skips_excluded_and_stale_entries(self):
+        balancer = self.balancer({1: 0, 2: 0, 3: 5})
+        self.assertEqual(balancer.pick(exclude={1}), 2)
+        self.assertEqual(balancer.pick(), 1)
+        balancer.adjust(1, 10)
+        balancer.remove_mechanic(2)
+        self.assertEqual(balancer.pick(), 3)
+        self.assertIsNone(self.balancer({}).pick())
+
+
+if __name__ == "__main__":
+    unittest.main()